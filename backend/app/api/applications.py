@@ -1,10 +1,15 @@
 # backend/app/api/applications.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, validator
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
+import io
+import csv
+import json
 import logging
-from app.core.database import save_application, get_applications, get_application, save_generated_content, update_application_status, get_applications_by_status, get_application_stats
+from app.core.database import save_application, import_applications, search_applications, iter_applications_export, get_applications, get_applications_by_ids, get_application, find_similar_applications, update_application_status, get_applications_by_status, get_application_stats, check_application_stats, next_page_cursor, APPLICATION_FIELDS, APPLICATION_SUMMARY_FIELDS
 from app.core.validators import validate_url, validate_text_length, sanitize_text
+from app.core import match_index, profile_cache, dedup
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -45,14 +50,46 @@ class ApplicationIn(BaseModel):
         return sanitize_text(v)
 
 class ApplicationOut(BaseModel):
+    id: int
+    company: Optional[str] = None
+    position: Optional[str] = None
+    job_url: Optional[str] = None
+    job_text: Optional[str] = None
+    status: Optional[str] = None
+    applied_date: str
+    notes: Optional[str] = None
+    duplicate_of: Optional[int] = None
+
+class SearchHitOut(BaseModel):
     id: int
     company: str
     position: str
-    job_url: str
-    job_text: str
-    status: str
+    job_url: Optional[str] = None
+    status: Optional[str] = None
     applied_date: str
-    notes: str
+    source: str
+    snippet: str
+    rank: float
+
+class RankedApplicationOut(BaseModel):
+    id: int
+    company: str
+    position: str
+    job_url: Optional[str] = None
+    status: Optional[str] = None
+    applied_date: str
+    score: float
+    coverage: float
+
+class SimilarApplicationOut(BaseModel):
+    id: int
+    company: str
+    position: str
+    job_url: Optional[str] = None
+    status: Optional[str] = None
+    applied_date: str
+    duplicate_of: Optional[int] = None
+    similarity: float
 
 class StatusUpdateIn(BaseModel):
     status: str
@@ -80,20 +117,206 @@ def create_application(app_data: ApplicationIn):
             app_data.job_text,
             app_data.notes
         )
-        return {"id": app_id, "message": "Application saved"}
+        saved = get_applications_by_ids([app_id], fields=('duplicate_of',))
+        duplicate_of = saved[0]['duplicate_of'] if saved else None
+        if duplicate_of is not None:
+            logger.info(f"Application {app_id} is a near-duplicate of {duplicate_of}")
+        return {"id": app_id, "duplicate_of": duplicate_of, "message": "Application saved"}
     except Exception as e:
         logger.error(f"Failed to save application: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/applications", response_model=List[ApplicationOut])
-def list_applications():
+IMPORT_FIELDS = ('company', 'position', 'job_url', 'job_text', 'notes')
+IMPORT_FORMATS = ('ndjson', 'csv')
+# Only the first few row errors are reported back
+MAX_IMPORT_ERRORS = 100
+# Export output is flushed to the client in chunks of about this many characters
+EXPORT_CHUNK_CHARS = 64 * 1024
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+class ImportOut(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+
+def _import_records(file: UploadFile, fmt: str) -> Iterator[tuple]:
+    """Yield (line number, raw record) pairs from an upload without reading it all into memory"""
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_no, line in enumerate(text, 1):
+            if line.strip():
+                yield line_no, line
+
+def _row_error(e: Exception) -> str:
+    if hasattr(e, "errors"):
+        return "; ".join(err["msg"] for err in e.errors())
+    return str(e)
+
+def _validated_rows(records: Iterable[tuple], result: dict) -> Iterator[tuple]:
+    """Validate records with ApplicationIn, yielding insert tuples and recording failures in result"""
+    for line_no, record in records:
+        try:
+            if isinstance(record, str):
+                record = json.loads(record)
+            if not isinstance(record, dict):
+                raise ValueError("Row must be an object")
+            app = ApplicationIn(**{k: v for k, v in record.items() if k in IMPORT_FIELDS and v is not None})
+        except ValueError as e:
+            result["failed"] += 1
+            if len(result["errors"]) < MAX_IMPORT_ERRORS:
+                result["errors"].append({"line": line_no, "error": _row_error(e)})
+            continue
+        yield (app.company, app.position, app.job_url, app.job_text, app.notes)
+
+def _chunked(lines: Iterable[str]) -> Iterator[str]:
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_CHARS:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+def _csv_lines(apps: Iterable[dict]) -> Iterator[str]:
+    """CSV rows for exported applications; generated_content is a JSON column"""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(APPLICATION_FIELDS + ('generated_content',))
+    for app in apps:
+        writer.writerow([app[f] for f in APPLICATION_FIELDS] + [json.dumps(app['generated_content'])])
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+    yield out.getvalue()
+
+def _parse_fields(fields: Optional[str]) -> tuple:
+    """Turn the ?fields= selector into a column list; list views default to the summary columns"""
+    if not fields:
+        return APPLICATION_SUMMARY_FIELDS
+    if fields == "all":
+        return APPLICATION_FIELDS
+    return tuple(f.strip() for f in fields.split(",") if f.strip())
+
+@router.get("/applications", response_model=List[ApplicationOut], response_model_exclude_unset=True)
+def list_applications(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns, or 'all'"),
+):
     try:
-        apps = get_applications()
+        apps = get_applications(limit=limit, cursor=cursor, fields=_parse_fields(fields))
+        next_cursor = next_page_cursor(apps, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return apps
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get applications: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/applications/search", response_model=List[SearchHitOut])
+def search_applications_endpoint(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    status: Optional[str] = None,
+):
+    try:
+        return search_applications(q, limit=limit, offset=offset, status=status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Search failed for {q!r}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/applications/rank", response_model=List[RankedApplicationOut])
+def rank_applications(
+    limit: int = Query(20, ge=1, le=200),
+    status: Optional[str] = None,
+):
+    """Saved postings that best match the profile's resume, scored locally without the LLM"""
+    try:
+        artifacts = profile_cache.get_resume_artifacts()
+        if artifacts is None:
+            raise HTTPException(status_code=400, detail="No resume found in profile")
+        app_ids = None
+        if status is not None:
+            app_ids = [app['id'] for app in get_applications_by_status(status, fields=('id',))]
+        ranked = match_index.rank(artifacts.keywords, limit=limit, app_ids=app_ids)
+        details = {app['id']: app for app in get_applications_by_ids([r['id'] for r in ranked], fields=APPLICATION_SUMMARY_FIELDS)}
+        return [{**details[r['id']], **r} for r in ranked if r['id'] in details]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to rank applications: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/applications/import", response_model=ImportOut)
+def import_applications_endpoint(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="'ndjson' or 'csv'; defaults to the file extension"),
+):
+    fmt = format or ("csv" if (file.filename or "").lower().endswith(".csv") else "ndjson")
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Must be one of: {', '.join(IMPORT_FORMATS)}")
+    try:
+        logger.info(f"Importing applications from {file.filename} ({fmt})")
+        result = {"imported": 0, "failed": 0, "errors": []}
+        result["imported"] = import_applications(_validated_rows(_import_records(file, fmt), result))
+        return result
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read import file: {str(e)}")
+    except Exception as e:
+        logger.error(f"Failed to import applications: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/applications/export")
+def export_applications(
+    format: str = Query("ndjson", description="'ndjson' or 'csv'"),
+    status: Optional[str] = None,
+):
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Must be one of: {', '.join(IMPORT_FORMATS)}")
+    apps = iter_applications_export(status)
+    if format == "csv":
+        lines, media_type = _csv_lines(apps), "text/csv"
+    else:
+        lines, media_type = (json.dumps(app) + "\n" for app in apps), "application/x-ndjson"
+    return StreamingResponse(
+        _chunked(lines),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="applications.{format}"'}
+    )
+
+# Declared before /applications/{app_id}, which would otherwise capture "stats"
+@router.get("/applications/stats")
+def get_stats(days: int = Query(30, ge=1, le=3650, description="Window for recent_applications")):
+    try:
+        stats = get_application_stats(recent_days=days)
+        return stats
+    except Exception as e:
+        logger.error(f"Failed to get application stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/applications/stats/check")
+def check_stats(repair: bool = False):
+    try:
+        return check_application_stats(repair=repair)
+    except Exception as e:
+        logger.error(f"Failed to check application stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/applications/{app_id}")
 def get_application_detail(app_id: int):
     try:
@@ -119,20 +342,39 @@ def update_status(app_id: int, status_data: StatusUpdateIn):
         logger.error(f"Failed to update status for application {app_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/applications/status/{status}")
-def get_applications_by_status_endpoint(status: str):
+@router.get("/applications/status/{status}", response_model=List[ApplicationOut], response_model_exclude_unset=True)
+def get_applications_by_status_endpoint(
+    status: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns, or 'all'"),
+):
     try:
-        apps = get_applications_by_status(status)
+        apps = get_applications_by_status(status, limit=limit, cursor=cursor, fields=_parse_fields(fields))
+        next_cursor = next_page_cursor(apps, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return apps
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get applications by status {status}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/applications/stats")
-def get_stats():
+@router.get("/applications/{app_id}/similar", response_model=List[SimilarApplicationOut])
+def get_similar_applications(
+    app_id: int,
+    threshold: float = Query(dedup.DUPLICATE_THRESHOLD, ge=dedup.MIN_THRESHOLD, le=1.0, description="Minimum Jaccard similarity of the job text"),
+    limit: int = Query(20, ge=1, le=dedup.MAX_CANDIDATES),
+):
     try:
-        stats = get_application_stats()
-        return stats
+        similar = find_similar_applications(app_id, threshold=threshold, limit=limit)
+        if similar is None:
+            raise HTTPException(status_code=404, detail="Application not found")
+        return similar
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Failed to get application stats: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.error(f"Failed to find applications similar to {app_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
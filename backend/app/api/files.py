@@ -1,49 +1,120 @@
 # backend/app/api/files.py
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, Request
+from starlette.datastructures import UploadFile
 from pydantic import BaseModel
+import os
+import shutil
+import asyncio
 import logging
-from app.core.file_parser import parse_resume_file
+import tempfile
+from app.core.file_parser import parse_resume_file_async
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
 class ResumeUploadOut(BaseModel):
     filename: str
     text: str
     message: str
 
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File is larger than the {MAX_UPLOAD_BYTES} byte limit")
+
+def _limited_request(request: Request) -> Request:
+    """
+    The request with its body capped at MAX_UPLOAD_BYTES plus multipart
+    framing. An oversized Content-Length is refused before anything is read,
+    and a body without one (chunked) is refused as soon as it passes the cap,
+    rather than after the whole upload has been spooled.
+    """
+    limit = MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > limit:
+        raise _too_large()
+    received = 0
+
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        received += len(message.get("body", b""))
+        if received > limit:
+            raise _too_large()
+        return message
+
+    return Request(request.scope, receive)
+
+def _spool_to_path(upload: UploadFile, suffix: str) -> str:
+    """
+    Copy an upload to a named temp file and return its path, so the parser
+    processes can open the file themselves. Runs in a thread.
+    """
+    fd, path = tempfile.mkstemp(prefix="applypilot-upload-", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            upload.file.seek(0)
+            shutil.copyfileobj(upload.file, out, 1024 * 1024)
+        return path
+    except BaseException:
+        os.remove(path)
+        raise
+
+# The form is parsed here rather than declared with File(...): FastAPI reads
+# declared form bodies before the endpoint (or any dependency) runs, too
+# late to refuse an oversized upload
 @router.post("/upload-resume", response_model=ResumeUploadOut)
-async def upload_resume(file: UploadFile = File(...)):
+async def upload_resume(request: Request):
+    form = None
+    path = None
     try:
+        form = await _limited_request(request).form(max_files=1)
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=422, detail="A resume file is required in the 'file' field")
+
         # Validate file type
-        if not file.filename.lower().endswith(('.pdf', '.docx')):
+        if not file.filename or not file.filename.lower().endswith(('.pdf', '.docx')):
             raise HTTPException(
-                status_code=400, 
+                status_code=400,
                 detail="Only PDF and DOCX files are supported"
             )
-        
-        # Read file content
-        file_content = await file.read()
-        
-        # Parse the file
+        if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+            raise _too_large()
+
+        # Parse the file in the process pool, off the event loop. The workers
+        # are given a path rather than the bytes
+        path = await asyncio.to_thread(_spool_to_path, file, os.path.splitext(file.filename)[1].lower())
         logger.info(f"Parsing resume file: {file.filename}")
-        resume_text = parse_resume_file(file.filename, file_content)
-        
+        resume_text = await parse_resume_file_async(file.filename, path)
+
         if not resume_text.strip():
             raise HTTPException(
                 status_code=400,
                 detail="No text could be extracted from the file"
             )
-        
+
         return {
             "filename": file.filename,
             "text": resume_text,
             "message": "Resume uploaded and parsed successfully"
         }
-        
+
+    except HTTPException:
+        raise
     except ValueError as e:
         logger.error(f"File parsing error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
+    except TimeoutError as e:
+        logger.error(f"File parsing timed out: {str(e)}")
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error(f"Resume upload failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if path:
+            os.remove(path)
+        if form is not None:
+            await form.close()
@@ -1,11 +1,15 @@
 # backend/app/api/jobs.py
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, validator
-from typing import List
+from typing import AsyncIterator, Callable, List, Optional
+import json
+import asyncio
 import logging
-from app.core.scraper import scrape_job_text
-from app.core.llm_client import generate_resume_bullets, generate_short_answer, generate_cover_letter
-from app.core.database import save_application, save_generated_content, get_user_profile
+from app.core.scraper import scrape_job_text, scrape_many
+from app.core import scrape_cache, llm_cache, profile_cache, job_queue, batch_generation
+from app.core.llm_client import generate_cover_letter, agenerate_resume_bullets, agenerate_short_answer, agenerate_tailored_content, parse_bullets, astream_cover_letter, astream_short_answer, get_usage_stats
+from app.core.database import save_application_with_content, save_generated_content, get_applications_by_ids, get_applications_by_status
 from app.core.validators import validate_url, validate_text_length, sanitize_text
 
 logger = logging.getLogger(__name__)
@@ -13,6 +17,7 @@ router = APIRouter()
 
 class ScrapeIn(BaseModel):
     url: str
+    refresh: bool = False  # Bypass the scrape cache and refetch
     
     @validator('url')
     def validate_url_format(cls, v):
@@ -25,9 +30,48 @@ class ScrapeOut(BaseModel):
     title: str = ""
     company: str = ""
 
+MAX_BATCH_URLS = 500
+
+class ScrapeBatchIn(BaseModel):
+    urls: List[str]
+    refresh: bool = False
+    
+    @validator('urls')
+    def validate_urls(cls, v):
+        if not v:
+            raise ValueError('At least one URL is required')
+        if len(v) > MAX_BATCH_URLS:
+            raise ValueError(f'At most {MAX_BATCH_URLS} URLs can be scraped per batch')
+        return [url.strip() for url in v]
+
+class ScrapeBatchItem(BaseModel):
+    url: str
+    ok: bool
+    job_text: str = ""
+    title: str = ""
+    company: str = ""
+    error: str = ""
+
+class ScrapeBatchOut(BaseModel):
+    results: List[ScrapeBatchItem]
+    succeeded: int
+    failed: int
+
+class ScrapeCacheStatsOut(BaseModel):
+    hits: int
+    misses: int
+    revalidated: int
+    refreshed: int
+    evicted: int
+    hit_rate: float
+    entries: int
+    size_bytes: int
+
 class TailorIn(BaseModel):
     job_text: str
     resume_text: str = ""  # Optional, will use profile if empty
+    use_cache: bool = True  # Set False to force fresh generations
+    single_call: bool = False  # Generate bullets and answer in one structured call
     
     @validator('job_text')
     def validate_job_text(cls, v):
@@ -50,6 +94,7 @@ class CoverLetterIn(BaseModel):
     resume_text: str = ""  # Optional, will use profile if empty
     company_name: str = ""
     position_title: str = ""
+    use_cache: bool = True  # Set False to force a fresh generation
     
     @validator('job_text')
     def validate_job_text(cls, v):
@@ -78,33 +123,167 @@ class CoverLetterIn(BaseModel):
 class CoverLetterOut(BaseModel):
     cover_letter: str
 
+class TailorJobIn(TailorIn):
+    application_id: Optional[int] = None  # Save the bullets and answer to this application when set
+
+class CoverLetterJobIn(CoverLetterIn):
+    application_id: Optional[int] = None  # Save the letter to this application instead of creating one
+
+# Upper bound on applications per batch request
+MAX_BATCH_APPLICATIONS = 200
+BATCH_FIELDS = ('id', 'company', 'position', 'job_text')
+
+class BatchCoverLetterIn(BaseModel):
+    application_ids: Optional[List[int]] = None
+    status: Optional[str] = None  # Alternatively, every application with this status
+    resume_text: str = ""  # Optional, will use profile if empty
+    use_cache: bool = True
+    
+    @validator('application_ids')
+    def validate_application_ids(cls, v):
+        if v is not None and not 1 <= len(v) <= MAX_BATCH_APPLICATIONS:
+            raise ValueError(f'Between 1 and {MAX_BATCH_APPLICATIONS} application IDs are allowed')
+        return v
+    
+    @validator('status', always=True)
+    def validate_selection(cls, v, values):
+        if (v is None) == (values.get('application_ids') is None):
+            raise ValueError('Provide either application_ids or status')
+        return v
+    
+    @validator('resume_text')
+    def validate_resume_text(cls, v):
+        if v and not validate_text_length(v, min_length=50):
+            raise ValueError('Resume text must be at least 50 characters')
+        return sanitize_text(v)
+
+class JobSubmittedOut(BaseModel):
+    job_id: int
+    status: str
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    application_id: Optional[int] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+class LLMUsageStatsOut(BaseModel):
+    calls: int
+    prompt_tokens: int
+    avg_prompt_tokens: float
+    input_tokens: int
+    compacted_tokens: int
+    tokens_saved: int
+
+class AnswerIn(BaseModel):
+    job_text: str
+    question: str = "Why are you a good fit?"
+    resume_text: str = ""  # Optional, will use profile if empty
+    application_id: Optional[int] = None  # Save the answer to this application when set
+    use_cache: bool = True
+    
+    @validator('job_text')
+    def validate_job_text(cls, v):
+        if not validate_text_length(v, min_length=20):
+            raise ValueError('Job text must be at least 20 characters')
+        return sanitize_text(v)
+    
+    @validator('question')
+    def validate_question(cls, v):
+        if not validate_text_length(v, min_length=5, max_length=1000):
+            raise ValueError('Question must be between 5 and 1000 characters')
+        return sanitize_text(v)
+    
+    @validator('resume_text')
+    def validate_resume_text(cls, v):
+        if v and not validate_text_length(v, min_length=50):
+            raise ValueError('Resume text must be at least 50 characters')
+        return sanitize_text(v)
+
+class LLMCacheStatsOut(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
+    bytes_saved: int
+    latency_saved_ms: float
+    entries: int
+    size_bytes: int
+    total_hits: int
+    total_bytes_saved: int
+    total_latency_saved_ms: float
+
+def _to_scrape_out(result: dict) -> dict:
+    """Map a scraper result onto the ScrapeOut field names"""
+    return {
+        "job_text": result.get("description", ""),
+        "title": result.get("title", ""),
+        "company": result.get("company", ""),
+    }
+
 @router.post("/scrape", response_model=ScrapeOut)
 def scrape(in_data: ScrapeIn):
     try:
         logger.info(f"Scraping job from URL: {in_data.url}")
-        out = scrape_job_text(in_data.url)
-        return out
+        out = scrape_job_text(in_data.url, use_cache=not in_data.refresh)
+        return _to_scrape_out(out)
     except Exception as e:
         logger.error(f"Scraping failed for {in_data.url}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/scrape/batch", response_model=ScrapeBatchOut)
+async def scrape_batch(in_data: ScrapeBatchIn):
+    logger.info(f"Batch scraping {len(in_data.urls)} URLs")
+    valid_urls = [url for url in in_data.urls if validate_url(url)]
+    scraped = dict(zip(valid_urls, await scrape_many(valid_urls, use_cache=not in_data.refresh)))
+    
+    results = []
+    for url in in_data.urls:
+        result = scraped.get(url)
+        if result is None:
+            results.append({"url": url, "ok": False, "error": "Invalid URL format"})
+        elif result["ok"]:
+            results.append({"url": url, "ok": True, **_to_scrape_out(result)})
+        else:
+            results.append({"url": url, "ok": False, "error": result["error"]})
+    
+    succeeded = sum(1 for r in results if r["ok"])
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+@router.get("/scrape/cache/stats", response_model=ScrapeCacheStatsOut)
+def scrape_cache_stats():
+    try:
+        return scrape_cache.get_stats()
+    except Exception as e:
+        logger.error(f"Failed to get scrape cache stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/tailor", response_model=TailorOut)
-def tailor(in_data: TailorIn):
+async def tailor(in_data: TailorIn):
     try:
         logger.info("Generating tailored resume content")
         
         # Use profile resume if not provided
-        resume_text = in_data.resume_text
-        if not resume_text:
-            profile = get_user_profile()
-            if profile and profile.get('resume_text'):
-                resume_text = profile['resume_text']
-            else:
-                raise HTTPException(status_code=400, detail="No resume text provided and no profile found")
+        resume_text = await asyncio.to_thread(_resolve_resume_text, in_data.resume_text)
+        
+        if in_data.single_call:
+            return await agenerate_tailored_content(in_data.job_text, resume_text, use_cache=in_data.use_cache)
         
-        bullets = generate_resume_bullets(in_data.job_text, resume_text)
-        answer = generate_short_answer(in_data.job_text, "Why are you a good fit?", resume_text)
-        return {"bullets": bullets, "answer": answer}
+        # Both generations are independent; run them concurrently so latency
+        # is the slower of the two round-trips rather than their sum
+        bullets, answer = await asyncio.gather(
+            agenerate_resume_bullets(in_data.job_text, resume_text, use_cache=in_data.use_cache),
+            agenerate_short_answer(in_data.job_text, "Why are you a good fit?", resume_text, use_cache=in_data.use_cache),
+        )
+        return {"bullets": parse_bullets(bullets), "answer": answer}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Tailoring failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -115,31 +294,186 @@ def cover_letter(in_data: CoverLetterIn):
         logger.info("Generating cover letter")
         
         # Use profile resume if not provided
-        resume_text = in_data.resume_text
-        if not resume_text:
-            profile = get_user_profile()
-            if profile and profile.get('resume_text'):
-                resume_text = profile['resume_text']
-            else:
-                raise HTTPException(status_code=400, detail="No resume text provided and no profile found")
+        resume_text = _resolve_resume_text(in_data.resume_text)
         
         letter = generate_cover_letter(
             in_data.job_text, 
             resume_text, 
             in_data.company_name, 
-            in_data.position_title
+            in_data.position_title,
+            use_cache=in_data.use_cache
         )
         
         # Save application if company/position provided
-        if in_data.company_name and in_data.position_title:
-            app_id = save_application(
-                in_data.company_name,
-                in_data.position_title,
-                job_text=in_data.job_text
-            )
-            save_generated_content(app_id, "cover_letter", letter)
+        _save_cover_letter(in_data, letter)
         
         return {"cover_letter": letter}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Cover letter generation failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+def _resolve_resume_text(resume_text: str) -> str:
+    """Use the given resume text, falling back to the saved profile's"""
+    if resume_text:
+        return resume_text
+    artifacts = profile_cache.get_resume_artifacts()
+    if artifacts is not None:
+        return artifacts.text
+    raise HTTPException(status_code=400, detail="No resume text provided and no profile found")
+
+def _save_cover_letter(in_data: CoverLetterIn, letter: str) -> Optional[int]:
+    """Save the application and its letter if company/position were provided"""
+    if not (in_data.company_name and in_data.position_title):
+        return None
+    return save_application_with_content(
+        in_data.company_name,
+        in_data.position_title,
+        "cover_letter",
+        letter,
+        job_text=in_data.job_text
+    )
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _sse_stream(chunks: AsyncIterator[str], on_complete: Callable[[str], dict]) -> AsyncIterator[str]:
+    """
+    Relay generated text as Server-Sent Events: one 'token' event per delta,
+    then a 'done' event once on_complete has persisted the full text, or an
+    'error' event if generation fails midway.
+    """
+    parts = []
+    try:
+        async for delta in chunks:
+            parts.append(delta)
+            yield _sse("token", {"text": delta})
+        result = await asyncio.to_thread(on_complete, "".join(parts))
+        yield _sse("done", result)
+    except Exception as e:
+        logger.error(f"Streaming generation failed: {str(e)}")
+        yield _sse("error", {"detail": str(e)})
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@router.post("/cover-letter/stream")
+async def cover_letter_stream(in_data: CoverLetterIn):
+    logger.info("Streaming cover letter")
+    resume_text = await asyncio.to_thread(_resolve_resume_text, in_data.resume_text)
+    chunks = astream_cover_letter(
+        in_data.job_text,
+        resume_text,
+        in_data.company_name,
+        in_data.position_title,
+        use_cache=in_data.use_cache
+    )
+    
+    def on_complete(letter: str) -> dict:
+        return {"application_id": _save_cover_letter(in_data, letter)}
+    
+    return StreamingResponse(_sse_stream(chunks, on_complete), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/answer/stream")
+async def answer_stream(in_data: AnswerIn):
+    logger.info("Streaming short answer")
+    resume_text = await asyncio.to_thread(_resolve_resume_text, in_data.resume_text)
+    chunks = astream_short_answer(in_data.job_text, in_data.question, resume_text, use_cache=in_data.use_cache)
+    
+    def on_complete(answer: str) -> dict:
+        if in_data.application_id is not None:
+            save_generated_content(in_data.application_id, "short_answer", answer)
+        return {"application_id": in_data.application_id}
+    
+    return StreamingResponse(_sse_stream(chunks, on_complete), media_type="text/event-stream", headers=SSE_HEADERS)
+
+def _batch_applications(in_data: BatchCoverLetterIn) -> list:
+    if in_data.application_ids is not None:
+        return get_applications_by_ids(in_data.application_ids, fields=BATCH_FIELDS)
+    # One past the cap, to tell a filter that matches too many from one that fits
+    return get_applications_by_status(in_data.status, limit=MAX_BATCH_APPLICATIONS + 1, fields=BATCH_FIELDS)
+
+async def _batch_events(apps: list, resume_text: str, use_cache: bool) -> AsyncIterator[str]:
+    """SSE for a batch: 'start', one 'progress' per application as it finishes, then 'done'"""
+    yield _sse("start", {"total": len(apps)})
+    succeeded = failed = 0
+    try:
+        async for result in batch_generation.generate_cover_letters(apps, resume_text, use_cache):
+            if result["ok"]:
+                succeeded += 1
+            else:
+                failed += 1
+            yield _sse("progress", {**result, "done": succeeded + failed, "total": len(apps)})
+        yield _sse("done", {"succeeded": succeeded, "failed": failed, "total": len(apps)})
+    except Exception as e:
+        logger.error(f"Batch cover letter generation failed: {str(e)}")
+        yield _sse("error", {"detail": str(e)})
+
+@router.post("/cover-letter/batch")
+async def cover_letter_batch(in_data: BatchCoverLetterIn):
+    # The profile is read once for the whole batch
+    resume_text = await asyncio.to_thread(_resolve_resume_text, in_data.resume_text)
+    try:
+        apps = await asyncio.to_thread(_batch_applications, in_data)
+    except Exception as e:
+        logger.error(f"Failed to load applications for batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not apps:
+        raise HTTPException(status_code=404, detail="No matching applications found")
+    if len(apps) > MAX_BATCH_APPLICATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"More than {MAX_BATCH_APPLICATIONS} applications have status '{in_data.status}'; "
+                   f"pass application_ids to generate in smaller batches"
+        )
+    logger.info(f"Generating {len(apps)} cover letters")
+    return StreamingResponse(
+        _batch_events(apps, resume_text, in_data.use_cache),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.post("/cover-letter/async", response_model=JobSubmittedOut, status_code=202)
+async def cover_letter_async(in_data: CoverLetterJobIn):
+    try:
+        job_id = await job_queue.submit("cover_letter", in_data.dict())
+        logger.info(f"Queued cover letter job {job_id}")
+        return {"job_id": job_id, "status": "queued"}
+    except Exception as e:
+        logger.error(f"Failed to queue cover letter: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/tailor/async", response_model=JobSubmittedOut, status_code=202)
+async def tailor_async(in_data: TailorJobIn):
+    try:
+        job_id = await job_queue.submit("tailor", in_data.dict())
+        logger.info(f"Queued tailoring job {job_id}")
+        return {"job_id": job_id, "status": "queued"}
+    except Exception as e:
+        logger.error(f"Failed to queue tailoring: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/generations/{job_id}", response_model=JobOut)
+def get_generation_job(job_id: int):
+    try:
+        job = job_queue.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get job {job_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/llm-cache/stats", response_model=LLMCacheStatsOut)
+def llm_cache_stats():
+    try:
+        return llm_cache.get_stats()
+    except Exception as e:
+        logger.error(f"Failed to get LLM cache stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/llm-usage/stats", response_model=LLMUsageStatsOut)
+def llm_usage_stats():
+    return get_usage_stats()
@@ -3,7 +3,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, validator
 from typing import Optional
 import logging
-from app.core.database import save_user_profile, get_user_profile
+from app.core.database import save_user_profile
+from app.core import profile_cache
 from app.core.validators import validate_email, validate_phone, validate_text_length, sanitize_text
 
 logger = logging.getLogger(__name__)
@@ -73,7 +74,7 @@ def create_or_update_profile(profile_data: ProfileIn):
 @router.get("/profile", response_model=Optional[ProfileOut])
 def get_profile():
     try:
-        profile = get_user_profile()
+        profile = profile_cache.get_profile()
         return profile
     except Exception as e:
         logger.error(f"Failed to get profile: {str(e)}")
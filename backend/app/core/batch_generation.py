@@ -0,0 +1,111 @@
+# backend/app/core/batch_generation.py
+import os
+import time
+import asyncio
+import logging
+import openai
+from typing import AsyncIterator, Dict, List
+from app.core.database import save_generated_contents
+from app.core.llm_client import agenerate_cover_letter
+
+logger = logging.getLogger(__name__)
+
+# Concurrency for batch generation adapts to the upstream rate limit (AIMD):
+# every 429 halves the number of requests in flight, and each full window of
+# successes adds one back, up to the maximum
+BATCH_INITIAL_CONCURRENCY = int(os.getenv("BATCH_INITIAL_CONCURRENCY", "4"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+BATCH_MAX_ATTEMPTS = int(os.getenv("BATCH_MAX_ATTEMPTS", "5"))
+BATCH_BACKOFF_SECONDS = float(os.getenv("BATCH_BACKOFF_SECONDS", "2"))
+
+class AdaptiveLimiter:
+    """
+    Async concurrency limit with additive increase / multiplicative decrease.
+    Throttles within the cooldown of the last decrease count as one, so a
+    burst of 429s from requests already in flight halves the limit once.
+    """
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.active = 0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_throttle(self, cooldown: float = 1.0):
+        now = time.monotonic()
+        if now - self._last_decrease >= cooldown:
+            self.limit = max(self.minimum, self.limit / 2)
+            self._last_decrease = now
+            logger.warning(f"Upstream rate limited; batch concurrency now {int(self.limit)}")
+
+def _retry_after(error: openai.RateLimitError, attempt: int) -> float:
+    """Seconds to wait before retrying: the server's Retry-After, else exponential"""
+    try:
+        return float(error.response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return BATCH_BACKOFF_SECONDS * 2 ** (attempt - 1)
+
+async def _generate_one(app: Dict, resume_text: str, use_cache: bool, limiter: AdaptiveLimiter) -> Dict:
+    if not app.get('job_text'):
+        return {"application_id": app['id'], "ok": False, "error": "Application has no job text"}
+    for attempt in range(1, BATCH_MAX_ATTEMPTS + 1):
+        try:
+            async with limiter:
+                letter = await agenerate_cover_letter(
+                    app['job_text'], resume_text, app.get('company') or "", app.get('position') or "",
+                    use_cache=use_cache
+                )
+            limiter.on_success()
+            return {"application_id": app['id'], "ok": True, "cover_letter": letter}
+        except openai.RateLimitError as e:
+            limiter.on_throttle()
+            if attempt == BATCH_MAX_ATTEMPTS:
+                return {"application_id": app['id'], "ok": False, "error": f"Rate limited: {str(e)}"}
+            await asyncio.sleep(_retry_after(e, attempt))
+        except Exception as e:
+            return {"application_id": app['id'], "ok": False, "error": str(e)}
+
+async def generate_cover_letters(apps: List[Dict], resume_text: str, use_cache: bool = True) -> AsyncIterator[Dict]:
+    """
+    Generate a cover letter for each application (id, company, position,
+    job_text), yielding a result per application as it completes. All
+    letters are saved to generated_content in one transaction at the end, or
+    whatever finished if the consumer stops early.
+    """
+    limiter = AdaptiveLimiter(BATCH_INITIAL_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    tasks = [asyncio.create_task(_generate_one(app, resume_text, use_cache, limiter)) for app in apps]
+    letters, saved = [], False
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            if result['ok']:
+                letters.append((result['application_id'], "cover_letter", result['cover_letter']))
+            yield result
+        if letters:
+            await asyncio.to_thread(save_generated_contents, letters)
+        saved = True
+    finally:
+        for task in tasks:
+            task.cancel()
+        if letters and not saved:
+            # Closed early (e.g. the client went away): keep what finished.
+            # The save runs off the event loop like the normal path, shielded
+            # so that cancelling the closing task again doesn't abandon it.
+            await asyncio.shield(asyncio.to_thread(save_generated_contents, letters))
+        if letters:
+            logger.info(f"Saved {len(letters)} batch cover letter(s)")
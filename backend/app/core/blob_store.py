@@ -0,0 +1,65 @@
+# backend/app/core/blob_store.py
+import hashlib
+import sqlite3
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from app.core.compression import compress_text
+
+# applications.job_text and generated_content.content live in the blobs table,
+# keyed by the SHA-256 of the text, and rows reference them by hash: a
+# posting saved again with every cover letter, or the same letter generated
+# twice, is stored once. Blobs hold the compressed value (see compression.py);
+# the hash is of the plain text, so it doesn't depend on the codec. refcount
+# is maintained by triggers on the referencing tables, which also delete a
+# blob once nothing references it (see migration 10).
+
+class Blob(NamedTuple):
+    hash: bytes
+    text: str
+    data: Optional[object]  # The value to store, or None if the blob already existed when prepared
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+def prepare(conn: sqlite3.Connection, texts: Sequence[Optional[str]]) -> List[Optional[Blob]]:
+    """
+    Hash each text and compress those not stored yet; None stays None. Meant
+    to run in the caller's thread before the write, so duplicates cost the
+    writer neither compression nor a blob insert.
+    """
+    hashes = [text_hash(text) if text is not None else None for text in texts]
+    wanted = list({h for h in hashes if h is not None})
+    stored = set()
+    # Well under SQLite's bound-parameter limit per query
+    for start in range(0, len(wanted), 500):
+        chunk = wanted[start:start + 500]
+        stored.update(row[0] for row in conn.execute(
+            f"SELECT hash FROM blobs WHERE hash IN ({', '.join('?' * len(chunk))})", chunk
+        ))
+    compressed: Dict[bytes, object] = {}
+    blobs = []
+    for text, h in zip(texts, hashes):
+        if h is None:
+            blobs.append(None)
+            continue
+        if h not in stored and h not in compressed:
+            compressed[h] = compress_text(text)
+        blobs.append(Blob(h, text, compressed.get(h)))
+    return blobs
+
+def put(conn: sqlite3.Connection, blob: Optional[Blob]) -> Optional[bytes]:
+    """Store the blob unless it exists and return its hash, the value to
+    reference it by. Runs inside the write transaction; the reference itself
+    bumps refcount."""
+    if blob is None:
+        return None
+    data = blob.data
+    if data is None:
+        if conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (blob.hash,)).fetchone():
+            return blob.hash
+        # Collected between prepare() and this write
+        data = compress_text(blob.text)
+    conn.execute("INSERT INTO blobs (hash, data) VALUES (?, ?) ON CONFLICT (hash) DO NOTHING", (blob.hash, data))
+    return blob.hash
+
+def put_many(conn: sqlite3.Connection, blobs: Sequence[Optional[Blob]]) -> List[Optional[bytes]]:
+    return [put(conn, blob) for blob in blobs]
@@ -0,0 +1,226 @@
+# backend/app/core/compaction.py
+import os
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Resumes and postings may be up to 50k characters each, but a generation only
+# needs the parts of the resume that match what the posting asks for. When
+# the inputs exceed the budget they are cut down to their most relevant
+# sections, so prompt size (and latency/cost) follows the budget instead of
+# the document. A budget of 0 disables compaction.
+PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "3000"))
+# Share of the budget reserved for the posting; whatever one side doesn't use
+# goes to the other
+JOB_BUDGET_SHARE = 0.4
+# Sections longer than this are split further so ranking stays fine-grained
+MAX_CHUNK_CHARS = 600
+CHARS_PER_TOKEN = 4
+
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+BULLET_RE = re.compile(r"^\s*(?:[-*•▪●]|\d+[.)])\s+")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?;])\s+")
+REQUIREMENT_HEADING_RE = re.compile(
+    r"requirement|qualification|skills|experience|must have|nice to have|what you('ll)? (bring|need|have)|you have|about you|responsibilit",
+    re.IGNORECASE,
+)
+BOILERPLATE_RE = re.compile(
+    r"equal opportunity|eeo|accommodation|privacy (policy|notice)|e-verify|benefits|perks|pay transparency|salary range",
+    re.IGNORECASE,
+)
+
+STOPWORDS = set("""
+a about above after all also an and any are as at be been being both but by can could did do does
+doing for from further had has have having he her here hers him his how i if in into is it its itself
+just me more most my no nor not of off on once only or other our ours out over own same she should so
+some such than that the their theirs them then there these they this those through to too under until
+up very was we were what when where which while who whom why will with would you your yours work
+working team teams role job company including etc using use used within across well new strong
+""".split())
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+def estimate_tokens(text: str) -> int:
+    """Token count for text: exact with tiktoken installed, otherwise ~4 chars per token"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased content words, keeping tech terms like c++, c# and node.js intact"""
+    return [w for w in WORD_RE.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped or BULLET_RE.match(stripped) or len(stripped) > 60:
+        return False
+    return stripped.endswith(":") or stripped.isupper() or (len(stripped.split()) <= 5 and not stripped.endswith("."))
+
+def _split_long_line(line: str) -> List[str]:
+    """Cut a line over MAX_CHUNK_CHARS into pieces at sentence ends, then at
+    spaces, then anywhere, so one-paragraph documents still get chunked"""
+    if len(line) <= MAX_CHUNK_CHARS:
+        return [line]
+    pieces, current = [], ""
+    for sentence in SENTENCE_END_RE.split(line):
+        words = sentence.split(" ") if len(sentence) > MAX_CHUNK_CHARS else [sentence]
+        for word in words:
+            while len(word) > MAX_CHUNK_CHARS:
+                if current:
+                    pieces.append(current)
+                    current = ""
+                pieces.append(word[:MAX_CHUNK_CHARS])
+                word = word[MAX_CHUNK_CHARS:]
+            if current and len(current) + 1 + len(word) > MAX_CHUNK_CHARS:
+                pieces.append(current)
+                current = ""
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_sections(text: str) -> List[str]:
+    """
+    Split a document into chunks that can be kept or dropped independently.
+    Blank lines and heading-like lines start a new chunk (headings stay with
+    the text under them); chunks over MAX_CHUNK_CHARS are cut at line breaks,
+    and single lines over it at sentence or word boundaries.
+    """
+    chunks, current, size = [], [], 0
+    for line in (piece for raw in text.splitlines() for piece in _split_long_line(raw)):
+        if not line.strip() or (_is_heading(line) and current and not _is_heading(current[-1])):
+            if current:
+                chunks.append("\n".join(current))
+            current, size = ([line] if line.strip() else []), len(line)
+            continue
+        # Never leave a heading on its own
+        if size + len(line) > MAX_CHUNK_CHARS and current and not (len(current) == 1 and _is_heading(current[0])):
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return [c.strip("\n") for c in chunks if c.strip()]
+
+def requirement_terms(job_text: str) -> Counter:
+    """Term weights for a posting; terms under requirement-style headings count double
+    and boilerplate sections (EEO, benefits, ...) are ignored"""
+    weights = Counter()
+    for chunk in split_sections(job_text):
+        if BOILERPLATE_RE.search(chunk):
+            continue
+        factor = 2 if REQUIREMENT_HEADING_RE.search(chunk.splitlines()[0]) else 1
+        for term in tokenize(chunk):
+            weights[term] += factor
+    return weights
+
+def rank_chunks(chunks: List[str], query: Counter, k1: float = 1.2, b: float = 0.75,
+                term_counts: Optional[List[Counter]] = None) -> List[float]:
+    """BM25 score of each chunk against the weighted query terms. term_counts
+    may pass precomputed Counter(tokenize(chunk)) for each chunk."""
+    if not chunks or not query:
+        return [0.0] * len(chunks)
+    if term_counts is None:
+        term_counts = [Counter(tokenize(c)) for c in chunks]
+    lengths = [sum(tc.values()) for tc in term_counts]
+    avg_len = (sum(lengths) / len(lengths)) or 1.0
+    df = Counter(t for tc in term_counts for t in tc)
+    n = len(chunks)
+    scores = []
+    for tc, length in zip(term_counts, lengths):
+        score = 0.0
+        for term, tf in tc.items():
+            if term not in query:
+                continue
+            idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+            score += query[term] * idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_len))
+        scores.append(score)
+    return scores
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """The longest prefix of text that fits in budget tokens, cut at a space where possible"""
+    if estimate_tokens(text) <= budget:
+        return text
+    if _encoding is not None:
+        prefix = _encoding.decode(_encoding.encode(text, disallowed_special=())[:max(budget, 0)])
+    else:
+        prefix = text[:max(budget, 0) * CHARS_PER_TOKEN]
+    cut = prefix.rfind(" ")
+    return prefix[:cut] if cut > len(prefix) // 2 else prefix
+
+def _fill_budget(chunks: List[str], scores: List[float], budget: int) -> str:
+    """Keep the best-scoring chunks that fit in budget tokens, in original order.
+    Chunks with a negative score are dropped. If no chunk fits whole, the best
+    one is truncated to the budget, so non-empty input never comes back empty."""
+    costs = [estimate_tokens(c) + 1 for c in chunks]
+    order = sorted(range(len(chunks)), key=lambda i: (-scores[i], i))
+    keep, used = set(), 0
+    for i in order:
+        if scores[i] >= 0 and used + costs[i] <= budget:
+            keep.add(i)
+            used += costs[i]
+    if not keep and chunks:
+        return truncate_to_tokens(chunks[order[0]], max(budget - 1, 1))
+    return "\n\n".join(chunks[i] for i in sorted(keep))
+
+def compact_job_text(job_text: str, budget: int) -> str:
+    """Cut a posting down to budget tokens, preferring requirement sections and dropping boilerplate first"""
+    if estimate_tokens(job_text) <= budget:
+        return job_text
+    chunks = split_sections(job_text)
+    scores = []
+    for i, chunk in enumerate(chunks):
+        if BOILERPLATE_RE.search(chunk):
+            scores.append(-1.0)
+        elif REQUIREMENT_HEADING_RE.search(chunk.splitlines()[0]):
+            scores.append(2.0)
+        else:
+            # Earlier sections (title, summary) matter more than later ones
+            scores.append(1.0 - i / (len(chunks) + 1))
+    return _fill_budget(chunks, scores, budget)
+
+def compact_resume_text(resume_text: str, budget: int, query: Counter, sections: Optional[List[str]] = None,
+                        section_terms: Optional[List[Counter]] = None) -> str:
+    """Cut a resume down to budget tokens, keeping the chunks most relevant to query"""
+    if estimate_tokens(resume_text) <= budget:
+        return resume_text
+    if sections is None:
+        sections, section_terms = split_sections(resume_text), None
+    return _fill_budget(sections, rank_chunks(sections, query, term_counts=section_terms), budget)
+
+def compact_inputs(job_text: str, resume_text: str, budget: int = PROMPT_TOKEN_BUDGET,
+                   resume_sections: Optional[List[str]] = None,
+                   resume_section_terms: Optional[List[Counter]] = None,
+                   resume_tokens: Optional[int] = None) -> Tuple[str, str, Dict[str,int]]:
+    """
+    Fit a posting and resume into budget tokens combined. Returns the compacted
+    texts and token estimates before and after. The resume_* arguments may
+    pass precomputed split_sections(resume_text), the term counts of those
+    sections and estimate_tokens(resume_text) to skip recomputing them.
+    """
+    job_tokens = estimate_tokens(job_text)
+    if resume_tokens is None:
+        resume_tokens = estimate_tokens(resume_text)
+    stats = {"input_tokens": job_tokens + resume_tokens}
+    if budget <= 0 or job_tokens + resume_tokens <= budget:
+        stats["compacted_tokens"] = stats["input_tokens"]
+        return job_text, resume_text, stats
+
+    job_budget = int(budget * JOB_BUDGET_SHARE)
+    if resume_tokens < budget - job_budget:
+        job_budget = budget - resume_tokens
+    compact_job = compact_job_text(job_text, job_budget)
+    resume_budget = budget - estimate_tokens(compact_job)
+    compact_resume = compact_resume_text(resume_text, resume_budget, requirement_terms(job_text),
+                                         resume_sections, resume_section_terms)
+
+    stats["compacted_tokens"] = estimate_tokens(compact_job) + estimate_tokens(compact_resume)
+    return compact_job, compact_resume, stats
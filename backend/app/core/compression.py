@@ -0,0 +1,223 @@
+# backend/app/core/compression.py
+import os
+import time
+import zlib
+import struct
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# job_text and generated content (held in the blob store, see blob_store.py)
+# are stored compressed once they reach COMPRESS_MIN_BYTES. A compressed value
+# is a BLOB whose first byte names the codec; TEXT values (short ones, values
+# written with compression off) are stored and returned as is, so both kinds
+# can sit in one column.
+# decompress_text is also an SQL function, used by the full-text index.
+# zlib is the default because it ships with Python, so any deployment can
+# read the database. zstd is opt-in (APPLYPILOT_COMPRESSION=zstd) and needs
+# the optional zstandard package on every machine that reads the database;
+# with it, a dictionary trained on the saved postings makes small documents
+# compress far better. One is trained by the migration when there is enough
+# text, or later with database.train_compression_dictionary().
+COMPRESSION = os.getenv("APPLYPILOT_COMPRESSION", "zlib")  # zlib, zstd or none
+COMPRESS_MIN_BYTES = int(os.getenv("APPLYPILOT_COMPRESS_MIN_BYTES", "512"))
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = int(os.getenv("APPLYPILOT_ZSTD_LEVEL", "3"))
+DICT_SIZE = 64 * 1024
+# Training needs enough samples to find what they have in common
+DICT_MIN_SAMPLES = 200
+DICT_MAX_SAMPLES = 5000
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODEC_ZSTD_DICT = 3  # followed by the dictionary id as 4 bytes, big-endian
+ZSTD_CODECS = frozenset((CODEC_ZSTD, CODEC_ZSTD_DICT))
+COMPRESSED_COLUMNS = ('job_text', 'content')
+# (table, column) pairs holding compressed values: the blob store since
+# migration 10, applications and generated_content before it
+TEXT_SOURCES = (('blobs', 'data'),)
+
+_local = threading.local()
+_lock = threading.Lock()
+_dictionaries: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+_active_dictionary: Optional[int] = None
+_db_path: Optional[str] = None
+
+def _codec(name: str):
+    if name == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression needs the zstandard package")
+        return name
+    if name in ("zlib", "none"):
+        return name
+    raise ValueError(f"Unknown APPLYPILOT_COMPRESSION: {name}")
+
+_CODEC = _codec(COMPRESSION)
+
+def _zstd_compressor(dict_id: Optional[int]):
+    cache = getattr(_local, "compressors", None)
+    if cache is None:
+        cache = _local.compressors = {}
+    if dict_id not in cache:
+        data = _dictionaries[dict_id] if dict_id is not None else None
+        cache[dict_id] = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=data, write_content_size=True)
+    return cache[dict_id]
+
+def _zstd_decompressor(dict_id: Optional[int]):
+    cache = getattr(_local, "decompressors", None)
+    if cache is None:
+        cache = _local.decompressors = {}
+    if dict_id not in cache:
+        data = None
+        if dict_id is not None:
+            data = _dictionaries[dict_id] if dict_id in _dictionaries else _load_dictionary(dict_id)
+        cache[dict_id] = zstandard.ZstdDecompressor(dict_data=data)
+    return cache[dict_id]
+
+def compress_text(text: Optional[str], codec: Optional[str] = None) -> Union[str, bytes, None]:
+    """The value to store for text: a compressed BLOB, or text itself when
+    it is short, compression is off, or compressing doesn't pay. codec
+    overrides APPLYPILOT_COMPRESSION."""
+    codec = _codec(codec) if codec is not None else _CODEC
+    if text is None or codec == "none" or len(text) < COMPRESS_MIN_BYTES // 4:
+        return text
+    raw = text.encode("utf-8")
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return text
+    if codec == "zstd":
+        dict_id = _active_dictionary
+        if dict_id is None:
+            blob = bytes([CODEC_ZSTD]) + _zstd_compressor(None).compress(raw)
+        else:
+            blob = bytes([CODEC_ZSTD_DICT]) + struct.pack(">I", dict_id) + _zstd_compressor(dict_id).compress(raw)
+    else:
+        blob = bytes([CODEC_ZLIB]) + zlib.compress(raw, ZLIB_LEVEL)
+    return blob if len(blob) < len(raw) else text
+
+def decompress_text(value):
+    """Inverse of compress_text; anything that isn't a compressed BLOB is returned unchanged"""
+    if not isinstance(value, bytes) or not value:
+        return value
+    codec = value[0]
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(value[1:]).decode("utf-8")
+    if zstandard is None:
+        raise RuntimeError("This value is zstd-compressed; install the zstandard package to read it")
+    if codec == CODEC_ZSTD:
+        return _zstd_decompressor(None).decompress(value[1:]).decode("utf-8")
+    if codec == CODEC_ZSTD_DICT:
+        (dict_id,) = struct.unpack(">I", value[1:5])
+        return _zstd_decompressor(dict_id).decompress(value[5:]).decode("utf-8")
+    raise ValueError(f"Unknown compression codec {codec}")
+
+def decompress_row(row: Dict) -> Dict:
+    """Decompress the compressed columns present in a row dict, in place"""
+    for column in COMPRESSED_COLUMNS:
+        value = row.get(column)
+        if isinstance(value, bytes):
+            row[column] = decompress_text(value)
+    return row
+
+def register_functions(conn: sqlite3.Connection):
+    """Make decompress_text() available to SQL on this connection; the
+    full-text triggers and views need it for every write"""
+    conn.create_function("decompress_text", 1, decompress_text, deterministic=True)
+
+def load_dictionaries(db_path: str):
+    """Load the trained dictionaries from the database; the newest one is
+    used for new writes"""
+    global _active_dictionary, _db_path
+    _db_path = db_path
+    if zstandard is None:
+        return
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT id, data FROM compression_dictionaries ORDER BY id").fetchall()
+    except sqlite3.OperationalError:
+        rows = []  # Schema not migrated yet
+    finally:
+        conn.close()
+    with _lock:
+        for dict_id, data in rows:
+            _dictionaries[dict_id] = zstandard.ZstdCompressionDict(data)
+        if rows:
+            _active_dictionary = rows[-1][0]
+
+def _load_dictionary(dict_id: int):
+    """A dictionary trained by another process since this one loaded them"""
+    if _db_path is not None:
+        load_dictionaries(_db_path)
+    if dict_id not in _dictionaries:
+        raise ValueError(f"Unknown compression dictionary {dict_id}")
+    return _dictionaries[dict_id]
+
+def _samples(conn: sqlite3.Connection, sources: Sequence[Tuple[str, str]]) -> List[bytes]:
+    rows = []
+    for table, column in sources:
+        rows += conn.execute(f"""
+            SELECT decompress_text({column}) FROM {table}
+            WHERE {column} IS NOT NULL ORDER BY rowid DESC LIMIT ?
+        """, (DICT_MAX_SAMPLES,)).fetchall()
+    return [row[0].encode("utf-8") for row in rows if row[0]]
+
+def train_dictionary(conn: sqlite3.Connection, sources: Sequence[Tuple[str, str]] = TEXT_SOURCES,
+                     codec: Optional[str] = None) -> Optional[int]:
+    """
+    Train a zstd dictionary on the most recent postings and generated content
+    and make it the one new writes use. Returns its ID, or None when zstd is
+    not in use (codec overrides APPLYPILOT_COMPRESSION) or there are too few
+    samples. Existing rows keep the dictionary they were written with until
+    recompress_all rewrites them.
+    """
+    global _active_dictionary
+    if (codec or _CODEC) != "zstd":
+        return None
+    samples = _samples(conn, sources)
+    if len(samples) < DICT_MIN_SAMPLES:
+        return None
+    trained = zstandard.train_dictionary(DICT_SIZE, samples, level=ZSTD_LEVEL)
+    dict_id = conn.execute(
+        "INSERT INTO compression_dictionaries (data, created_at) VALUES (?, ?)",
+        (trained.as_bytes(), time.time())
+    ).lastrowid
+    with _lock:
+        _dictionaries[dict_id] = zstandard.ZstdCompressionDict(trained.as_bytes())
+        _active_dictionary = dict_id
+    logger.info(f"Trained compression dictionary {dict_id} on {len(samples)} samples")
+    return dict_id
+
+def recompress_all(conn: sqlite3.Connection, sources: Sequence[Tuple[str, str]] = TEXT_SOURCES,
+                   batch_size: int = 500, codec: Optional[str] = None,
+                   only: Optional[frozenset] = None) -> int:
+    """Rewrite every stored job_text and content value with the current
+    settings, or with codec. With only, a set of codec bytes, just values
+    compressed with one of those are rewritten. Returns the number of values
+    changed."""
+    changed = 0
+    for table, column in sources:
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                f"SELECT rowid, {column} FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?", (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            updates = []
+            for row_id, value in rows:
+                if only is not None and not (isinstance(value, bytes) and value and value[0] in only):
+                    continue
+                stored = compress_text(decompress_text(value), codec)
+                if stored != value:
+                    updates.append((stored, row_id))
+            conn.executemany(f"UPDATE {table} SET {column} = ? WHERE rowid = ?", updates)
+            changed += len(updates)
+            last_id = rows[-1][0]
+    return changed
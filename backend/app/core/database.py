@@ -1,119 +1,454 @@
 # backend/app/core/database.py
 import sqlite3
 import os
+import json
+import re
+import base64
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Optional, Sequence
+from app.core.migrations import run_migrations
+from app.core import dedup, compression, blob_store
 
-DB_PATH = "applypilot.db"
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("APPLYPILOT_DB_PATH", "applypilot.db")
+
+# Connection tuning. Each thread keeps one connection open for the life of the
+# process instead of reconnecting (and re-running PRAGMAs) on every call.
+BUSY_TIMEOUT_MS = int(os.getenv("APPLYPILOT_DB_BUSY_TIMEOUT_MS", "5000"))
+CACHE_SIZE_KB = int(os.getenv("APPLYPILOT_DB_CACHE_SIZE_KB", "20000"))
+MMAP_SIZE_BYTES = int(os.getenv("APPLYPILOT_DB_MMAP_SIZE", str(128 * 1024 * 1024)))
+
+# Group commit. Writes are handed to a single writer thread, which commits
+# everything queued so far in one transaction (one WAL sync) instead of one
+# per call; callers block until their write is committed. WRITE_BATCH_WAIT_MS
+# lets the writer hold a batch open briefly for more writes to arrive.
+WRITE_QUEUE_ENABLED = os.getenv("APPLYPILOT_WRITE_QUEUE", "1") != "0"
+WRITE_BATCH_MAX = int(os.getenv("APPLYPILOT_WRITE_BATCH_MAX", "256"))
+WRITE_BATCH_WAIT_MS = float(os.getenv("APPLYPILOT_WRITE_BATCH_WAIT_MS", "0"))
+
+_local = threading.local()
+_schema_lock = threading.RLock()
+_schema_ready = False
+
+def _configure_connection(conn: sqlite3.Connection):
+    """Apply journal, durability and cache settings to a new connection"""
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    # WAL lets readers proceed while a writer holds the lock
+    conn.execute("PRAGMA journal_mode = WAL")
+    # NORMAL is durable across application crashes in WAL mode and skips the
+    # per-commit fsync of the main database file
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    compression.register_functions(conn)
+
+def get_connection() -> sqlite3.Connection:
+    """Return the calling thread's pooled connection, opening it on first use"""
+    conn = getattr(_local, "conn", None)
+    # A forked worker must not reuse a connection inherited from its parent
+    if conn is not None and _local.pid == os.getpid():
+        return conn
+
+    # isolation_level=None puts the connection in autocommit mode; writes are
+    # grouped explicitly by transaction() below
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    _configure_connection(conn)
+    _local.conn = conn
+    _local.pid = os.getpid()
+    _local.depth = 0
+    # The app runs init_db() at startup; this covers scripts and workers that
+    # touch the database before (or without) that hook
+    if not _schema_ready:
+        init_db()
+    return conn
+
+def close_connection():
+    """Close the calling thread's pooled connection, if any"""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.pid == os.getpid():
+        conn.close()
+    _local.conn = None
+
+@contextmanager
+def transaction():
+    """Run the enclosed statements in a single write transaction.
+
+    BEGIN IMMEDIATE takes the write lock up front, so a busy database is
+    handled by busy_timeout at the start of the transaction rather than by a
+    failed lock upgrade halfway through it. Nested blocks join the outer
+    transaction.
+    """
+    conn = get_connection()
+    if _local.depth:
+        _local.depth += 1
+        try:
+            yield conn
+        finally:
+            _local.depth -= 1
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    _local.depth = 1
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
+    finally:
+        _local.depth = 0
 
 def init_db():
-    """Initialize the database with required tables"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # User profile table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_profile (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            email TEXT,
-            phone TEXT,
-            resume_text TEXT,
-            preferences TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Applications table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS applications (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            company TEXT NOT NULL,
-            position TEXT NOT NULL,
-            job_url TEXT,
-            job_text TEXT,
-            status TEXT DEFAULT 'applied',
-            applied_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            notes TEXT
-        )
-    """)
-    
-    # Generated content table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS generated_content (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            application_id INTEGER,
-            content_type TEXT NOT NULL,
-            content TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (application_id) REFERENCES applications (id)
-        )
-    """)
-    
-    conn.commit()
-    conn.close()
+    """Bring the database schema up to date. Safe to call more than once."""
+    global _schema_ready
+    with _schema_lock:
+        if _schema_ready:
+            return
+        # Before migrating: migrations that rewrite stored text must be able to
+        # read values compressed with a trained dictionary
+        compression.load_dictionaries(DB_PATH)
+        version = run_migrations(get_connection())
+        logger.info(f"Database schema at version {version}")
+        _schema_ready = True
 
-def save_application(company: str, position: str, job_url: str = "", job_text: str = "", notes: str = "") -> int:
-    """Save a job application and return the ID"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        INSERT INTO applications (company, position, job_url, job_text, notes)
+_writer_lock = threading.Lock()
+_writer_queue: Optional[queue.Queue] = None
+_writer_thread: Optional[threading.Thread] = None
+_writer_pid: Optional[int] = None
+
+def _run_batch(batch: List[tuple]):
+    """Apply a batch of writes in one transaction, each under its own savepoint
+    so a failing write is rolled back without taking the others with it"""
+    results = []
+    try:
+        with transaction() as conn:
+            for fn, args, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT write_op")
+                try:
+                    results.append((future, fn(conn, *args), None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_op")
+                    results.append((future, None, e))
+                conn.execute("RELEASE write_op")
+    except Exception as e:
+        logger.error(f"Write batch of {len(batch)} failed: {str(e)}")
+        for future, _, _ in results:
+            future.set_exception(e)
+        for _, _, future in batch[len(results):]:
+            if not future.done():
+                future.set_exception(e)
+        return
+    # Results are only released once the batch is committed
+    for future, result, error in results:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+def _writer_loop(q: queue.Queue):
+    while True:
+        item = q.get()
+        if item is None:
+            return
+        batch = [item]
+        deadline = time.monotonic() + WRITE_BATCH_WAIT_MS / 1000
+        stop = False
+        while len(batch) < WRITE_BATCH_MAX:
+            try:
+                remaining = deadline - time.monotonic()
+                item = q.get(timeout=remaining) if remaining > 0 else q.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        _run_batch(batch)
+        if stop:
+            return
+
+def _get_writer_queue() -> queue.Queue:
+    global _writer_queue, _writer_thread, _writer_pid
+    with _writer_lock:
+        # Threads do not survive fork, so a forked worker starts its own writer
+        if _writer_queue is None or _writer_pid != os.getpid():
+            _writer_queue = queue.Queue()
+            _writer_thread = threading.Thread(target=_writer_loop, args=(_writer_queue,), name="db-writer", daemon=True)
+            _writer_thread.start()
+            _writer_pid = os.getpid()
+        return _writer_queue
+
+def close_write_queue():
+    """Commit pending writes and stop the writer thread (called on app shutdown)"""
+    global _writer_queue, _writer_thread
+    with _writer_lock:
+        if _writer_queue is None or _writer_pid != os.getpid():
+            return
+        _writer_queue.put(None)
+        _writer_thread.join()
+        _writer_queue = _writer_thread = None
+
+def _write(fn: Callable[..., Any], *args) -> Any:
+    """Run fn(conn, *args) in a write transaction and return its result"""
+    # Inside an open transaction the write must join it: handing it to the
+    # writer would wait on the lock this thread already holds
+    in_transaction = getattr(_local, "conn", None) is not None and _local.pid == os.getpid() and _local.depth
+    if not WRITE_QUEUE_ENABLED or in_transaction:
+        with transaction() as conn:
+            return fn(conn, *args)
+    future = Future()
+    _get_writer_queue().put((fn, args, future))
+    return future.result()
+
+def _insert_application(conn: sqlite3.Connection, company: str, position: str, job_url: str,
+                        job_text: Optional[blob_store.Blob], notes: str,
+                        fingerprint: Optional[dedup.Fingerprint] = None,
+                        duplicate: Optional[dedup.Duplicate] = None) -> int:
+    cursor = conn.execute("""
+        INSERT INTO applications (company, position, job_url, job_text_hash, notes)
         VALUES (?, ?, ?, ?, ?)
-    """, (company, position, job_url, job_text, notes))
-    
-    app_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    """, (company, position, job_url, blob_store.put(conn, job_text), notes))
+    dedup.record(conn, cursor.lastrowid, fingerprint, duplicate)
+    return cursor.lastrowid
+
+def _insert_generated_content(conn: sqlite3.Connection, application_id: int, content_type: str, content: blob_store.Blob):
+    conn.execute("""
+        INSERT INTO generated_content (application_id, content_type, content_hash)
+        VALUES (?, ?, ?)
+    """, (application_id, content_type, blob_store.put(conn, content)))
+
+def _insert_application_with_content(conn: sqlite3.Connection, company: str, position: str, job_url: str,
+                                     job_text: Optional[blob_store.Blob], notes: str,
+                                     fingerprint: Optional[dedup.Fingerprint], duplicate: Optional[dedup.Duplicate],
+                                     content_type: str, content: blob_store.Blob) -> int:
+    app_id = _insert_application(conn, company, position, job_url, job_text, notes, fingerprint, duplicate)
+    _insert_generated_content(conn, app_id, content_type, content)
     return app_id
 
+def _insert_applications(conn: sqlite3.Connection, rows: List[tuple], fingerprints: List[Optional[dedup.Fingerprint]],
+                         duplicates: List[Optional[dedup.Duplicate]]) -> int:
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM applications").fetchone()[0]
+    hashes = blob_store.put_many(conn, [row[3] for row in rows])
+    conn.executemany("""
+        INSERT INTO applications (company, position, job_url, job_text_hash, notes)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(company, position, job_url, h, notes) for (company, position, job_url, _, notes), h in zip(rows, hashes)])
+    # The write lock is held, so the new rows are exactly those past last_id, in order
+    new_ids = [row[0] for row in conn.execute("SELECT id FROM applications WHERE id > ? ORDER BY id", (last_id,))]
+    for app_id, fingerprint, duplicate in zip(new_ids, fingerprints, duplicates):
+        dedup.record(conn, app_id, fingerprint, duplicate, new_ids)
+    return len(rows)
+
+def _insert_generated_contents(conn: sqlite3.Connection, rows: List[tuple]) -> int:
+    hashes = blob_store.put_many(conn, [row[2] for row in rows])
+    conn.executemany("""
+        INSERT INTO generated_content (application_id, content_type, content_hash)
+        VALUES (?, ?, ?)
+    """, [(application_id, content_type, h) for (application_id, content_type, _), h in zip(rows, hashes)])
+    return len(rows)
+
+def _prepare_blobs(texts: Sequence[Optional[str]]) -> List[Optional[blob_store.Blob]]:
+    # Hashing and compression are CPU work; keep them out of the writer
+    return blob_store.prepare(get_connection(), texts)
+
+def _check_duplicates(job_texts: Sequence[Optional[str]]) -> tuple:
+    """Fingerprints of postings about to be saved and what each nearly
+    duplicates, found in the caller's thread like _prepare_blobs"""
+    fingerprints = [dedup.fingerprint(text) for text in job_texts]
+    return fingerprints, dedup.find_duplicates(get_connection(), fingerprints)
+
+def save_application(company: str, position: str, job_url: str = "", job_text: str = "", notes: str = "") -> int:
+    """Save a job application and return the ID. Near-duplicates of an earlier
+    posting get duplicate_of set."""
+    (job_blob,) = _prepare_blobs([job_text])
+    (fingerprint,), (duplicate,) = _check_duplicates([job_text])
+    return _write(_insert_application, company, position, job_url, job_blob, notes, fingerprint, duplicate)
+
 def save_generated_content(application_id: int, content_type: str, content: str):
     """Save generated content (resume bullets, cover letter, etc.)"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        INSERT INTO generated_content (application_id, content_type, content)
-        VALUES (?, ?, ?)
-    """, (application_id, content_type, content))
-    
-    conn.commit()
-    conn.close()
+    (content_blob,) = _prepare_blobs([content])
+    _write(_insert_generated_content, application_id, content_type, content_blob)
 
-def get_applications() -> List[Dict]:
-    """Get all applications"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+def save_generated_contents(rows: Sequence[tuple]) -> int:
+    """Save several (application_id, content_type, content) rows in one transaction"""
+    if not rows:
+        return 0
+    content_blobs = _prepare_blobs([content for _, _, content in rows])
+    return _write(_insert_generated_contents, [
+        (application_id, content_type, blob) for (application_id, content_type, _), blob in zip(rows, content_blobs)
+    ])
+
+def _insert_generated_output(conn: sqlite3.Connection, application_id: Optional[int], new_application: Optional[tuple],
+                             contents: List[tuple], then: Optional[Callable[[sqlite3.Connection, Optional[int]], Any]]) -> Optional[int]:
+    if application_id is None and new_application is not None:
+        application_id = _insert_application(conn, *new_application)
+    if application_id is not None and contents:
+        _insert_generated_contents(conn, [(application_id, content_type, blob) for content_type, blob in contents])
+    if then is not None:
+        then(conn, application_id)
+    return application_id
+
+def save_generated_output(contents: Sequence[tuple], application_id: Optional[int] = None,
+                          new_application: Optional[tuple] = None,
+                          then: Optional[Callable[[sqlite3.Connection, Optional[int]], Any]] = None) -> Optional[int]:
+    """
+    Save (content_type, content) pairs in one transaction, to application_id
+    or else to an application created from new_application, a (company,
+    position, job_text) tuple; with neither, nothing is saved. then(conn,
+    application_id) runs last in the same transaction, so what it writes
+    commits together with the content, and an exception from it saves
+    nothing. Returns the application ID.
+    """
+    texts = [content for _, content in contents]
+    if application_id is None and new_application is not None:
+        texts.append(new_application[2])
+    blobs = _prepare_blobs(texts)
+    prepared_application = None
+    if application_id is None and new_application is not None:
+        company, position, job_text = new_application
+        (fingerprint,), (duplicate,) = _check_duplicates([job_text])
+        prepared_application = (company, position, "", blobs.pop(), "", fingerprint, duplicate)
+    prepared_contents = [(content_type, blob) for (content_type, _), blob in zip(contents, blobs)]
+    return _write(_insert_generated_output, application_id, prepared_application, prepared_contents, then)
+
+def save_application_with_content(company: str, position: str, content_type: str, content: str,
+                                  job_url: str = "", job_text: str = "", notes: str = "") -> int:
+    """Save an application together with one piece of generated content, atomically. Returns the ID."""
+    job_blob, content_blob = _prepare_blobs([job_text, content])
+    (fingerprint,), (duplicate,) = _check_duplicates([job_text])
+    return _write(_insert_application_with_content, company, position, job_url, job_blob, notes,
+                  fingerprint, duplicate, content_type, content_blob)
+
+# Columns that list views may request. job_text and notes can hold up to 50k
+# characters each, so they are left out unless explicitly asked for.
+APPLICATION_FIELDS = ('id', 'company', 'position', 'job_url', 'job_text', 'status', 'applied_date', 'notes', 'duplicate_of')
+APPLICATION_SUMMARY_FIELDS = ('id', 'company', 'position', 'job_url', 'status', 'applied_date')
+
+# job_text and generated content are stored in the blob store (see
+# blob_store.py); rows hold the hash, resolved here at read time
+_COLUMN_SQL = {'job_text': "(SELECT data FROM blobs WHERE hash = job_text_hash) AS job_text"}
+CONTENT_COLUMNS = ("id, application_id, content_type, "
+                   "(SELECT data FROM blobs WHERE hash = content_hash) AS content, created_at")
+
+def _columns_sql(columns: Sequence[str]) -> str:
+    return ', '.join(_COLUMN_SQL.get(c, c) for c in columns)
+
+def encode_cursor(applied_date: str, app_id: int) -> str:
+    """Encode a keyset position as an opaque pagination cursor"""
+    raw = json.dumps([applied_date, app_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a pagination cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        applied_date, app_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(applied_date), int(app_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+def next_page_cursor(apps: List[Dict], limit: Optional[int]) -> Optional[str]:
+    """Return the cursor for the page after apps, or None on the last page"""
+    if not limit or len(apps) < limit:
+        return None
+    last = apps[-1]
+    return encode_cursor(last['applied_date'], last['id'])
+
+def _select_applications(status: Optional[str], limit: Optional[int], cursor: Optional[str],
+                         fields: Optional[Sequence[str]]) -> List[Dict]:
+    """Keyset-paginated, column-projected read of applications, newest first"""
+    if fields is None:
+        fields = APPLICATION_FIELDS
+    unknown = [f for f in fields if f not in APPLICATION_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Must be among: {', '.join(APPLICATION_FIELDS)}")
+    # id and applied_date form the keyset, so they are always selected
+    columns = ['id', 'applied_date'] + [f for f in fields if f not in ('id', 'applied_date')]
     
-    cursor.execute("SELECT * FROM applications ORDER BY applied_date DESC")
-    apps = [dict(row) for row in cursor.fetchall()]
+    where, params = [], []
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    if cursor:
+        where.append("(applied_date, id) < (?, ?)")
+        params.extend(decode_cursor(cursor))
     
-    conn.close()
-    return apps
+    sql = f"SELECT {_columns_sql(columns)} FROM applications"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY applied_date DESC, id DESC"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    
+    conn = get_connection()
+    return [compression.decompress_row(dict(row)) for row in conn.execute(sql, params).fetchall()]
+
+def get_applications(limit: Optional[int] = None, cursor: Optional[str] = None,
+                     fields: Optional[Sequence[str]] = None) -> List[Dict]:
+    """Get applications, optionally one page at a time and with only some columns"""
+    return _select_applications(None, limit, cursor, fields)
+
+def get_applications_by_ids(app_ids: Sequence[int], fields: Optional[Sequence[str]] = None) -> List[Dict]:
+    """Get the given applications (missing IDs are skipped), in the order requested"""
+    if fields is None:
+        fields = APPLICATION_FIELDS
+    unknown = [f for f in fields if f not in APPLICATION_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Must be among: {', '.join(APPLICATION_FIELDS)}")
+    if not app_ids:
+        return []
+    columns = ['id'] + [f for f in fields if f != 'id']
+    conn = get_connection()
+    rows = conn.execute(
+        f"SELECT {_columns_sql(columns)} FROM applications WHERE id IN ({', '.join('?' * len(app_ids))})",
+        list(app_ids)
+    ).fetchall()
+    by_id = {row['id']: compression.decompress_row(dict(row)) for row in rows}
+    return [by_id[app_id] for app_id in dict.fromkeys(app_ids) if app_id in by_id]
 
 def get_application(app_id: int) -> Optional[Dict]:
     """Get a specific application with its generated content"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute("SELECT * FROM applications WHERE id = ?", (app_id,))
+    cursor.execute(f"SELECT {_columns_sql(APPLICATION_FIELDS)} FROM applications WHERE id = ?", (app_id,))
     app = cursor.fetchone()
     
     if app:
-        app = dict(app)
-        cursor.execute("SELECT * FROM generated_content WHERE application_id = ?", (app_id,))
-        app['generated_content'] = [dict(row) for row in cursor.fetchall()]
+        app = compression.decompress_row(dict(app))
+        cursor.execute(f"SELECT {CONTENT_COLUMNS} FROM generated_content WHERE application_id = ?", (app_id,))
+        app['generated_content'] = [compression.decompress_row(dict(row)) for row in cursor.fetchall()]
     
-    conn.close()
     return app
 
-def save_user_profile(name: str = "", email: str = "", phone: str = "", resume_text: str = "", preferences: str = "") -> int:
-    """Save or update user profile"""
-    conn = sqlite3.connect(DB_PATH)
+def find_similar_applications(app_id: int, threshold: float = dedup.DUPLICATE_THRESHOLD, limit: int = 20) -> Optional[List[Dict]]:
+    """Saved postings whose job text nearly matches this application's, most
+    similar first, or None if the application doesn't exist"""
+    conn = get_connection()
+    row = conn.execute(f"SELECT {_columns_sql(['job_text'])} FROM applications WHERE id = ?", (app_id,)).fetchone()
+    if row is None:
+        return None
+    fingerprint = dedup.fingerprint(compression.decompress_text(row['job_text']))
+    if fingerprint is None:
+        return []
+    matches = dedup.find_similar(conn, fingerprint, threshold, limit, exclude_id=app_id)
+    details = {app['id']: app for app in get_applications_by_ids([m['id'] for m in matches], fields=APPLICATION_SUMMARY_FIELDS)}
+    return [{**details[m['id']], **m} for m in matches if m['id'] in details]
+
+def _upsert_user_profile(conn: sqlite3.Connection, name: str, email: str, phone: str, resume_text: str, preferences: str) -> int:
     cursor = conn.cursor()
     
     # Check if profile exists
@@ -123,31 +458,181 @@ def save_user_profile(name: str = "", email: str = "", phone: str = "", resume_t
     if existing:
         cursor.execute("""
             UPDATE user_profile 
-            SET name=?, email=?, phone=?, resume_text=?, preferences=?, updated_at=CURRENT_TIMESTAMP
+            SET name=?, email=?, phone=?, resume_text=?, preferences=?, updated_at=CURRENT_TIMESTAMP,
+                version=version + 1
             WHERE id=?
         """, (name, email, phone, resume_text, preferences, existing[0]))
-        profile_id = existing[0]
-    else:
-        cursor.execute("""
-            INSERT INTO user_profile (name, email, phone, resume_text, preferences)
-            VALUES (?, ?, ?, ?, ?)
-        """, (name, email, phone, resume_text, preferences))
-        profile_id = cursor.lastrowid
+        return existing[0]
+    cursor.execute("""
+        INSERT INTO user_profile (name, email, phone, resume_text, preferences)
+        VALUES (?, ?, ?, ?, ?)
+    """, (name, email, phone, resume_text, preferences))
+    return cursor.lastrowid
+
+def save_user_profile(name: str = "", email: str = "", phone: str = "", resume_text: str = "", preferences: str = "") -> int:
+    """Save or update user profile"""
+    return _write(_upsert_user_profile, name, email, phone, resume_text, preferences)
+
+# Rows per transaction for bulk import, and per query for export
+IMPORT_CHUNK_SIZE = 500
+EXPORT_BATCH_SIZE = 500
+
+def _prepare_import_chunk(chunk: List[tuple]) -> tuple:
+    """Rows with job_text as a prepared blob, their fingerprints and what
+    each duplicates (an earlier chunk is committed by now, so it counts)"""
+    job_blobs = _prepare_blobs([row[3] for row in chunk])
+    rows = [(company, position, job_url, blob, notes)
+            for (company, position, job_url, _, notes), blob in zip(chunk, job_blobs)]
+    return (rows, *_check_duplicates([row[3] for row in chunk]))
+
+def import_applications(rows: Iterable[tuple], chunk_size: int = IMPORT_CHUNK_SIZE) -> int:
+    """
+    Insert (company, position, job_url, job_text, notes) tuples in chunks of
+    chunk_size, one executemany and one transaction per chunk, consuming rows
+    lazily. Returns the number of rows inserted.
+    """
+    total, chunk = 0, []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            total += _write(_insert_applications, *_prepare_import_chunk(chunk))
+            chunk = []
+    if chunk:
+        total += _write(_insert_applications, *_prepare_import_chunk(chunk))
+    return total
+
+def train_compression_dictionary() -> Optional[int]:
+    """Train a zstd dictionary on recent text for new writes to use. Values
+    already stored keep the dictionary they were written with."""
+    with transaction() as conn:
+        return compression.train_dictionary(conn)
+
+def iter_applications_export(status: Optional[str] = None, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Dict]:
+    """
+    Yield every application (all columns plus its generated_content), oldest
+    first. Rows are read batch_size at a time by id, so memory stays constant
+    however large the table is.
+    """
+    last_id = 0
+    while True:
+        conn = get_connection()
+        sql = f"SELECT {_columns_sql(APPLICATION_FIELDS)} FROM applications WHERE id > ?"
+        params = [last_id]
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        sql += " ORDER BY id LIMIT ?"
+        params.append(batch_size)
+        apps = [compression.decompress_row(dict(row)) for row in conn.execute(sql, params).fetchall()]
+        if not apps:
+            return
+        
+        ids = [app['id'] for app in apps]
+        content = {app_id: [] for app_id in ids}
+        rows = conn.execute(
+            f"SELECT {CONTENT_COLUMNS} FROM generated_content WHERE application_id IN ({', '.join('?' * len(ids))}) ORDER BY id",
+            ids
+        ).fetchall()
+        for row in rows:
+            content[row['application_id']].append(compression.decompress_row(dict(row)))
+        
+        for app in apps:
+            app['generated_content'] = content[app['id']]
+            yield app
+        last_id = ids[-1]
+
+# Column weights for bm25() over applications_fts (company, position,
+# job_text, notes): a hit in the title or company outranks one in the body
+SEARCH_WEIGHTS = (10.0, 10.0, 1.0, 2.0)
+SNIPPET_TOKENS = 12
+SEARCH_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query in which every word must match. Words
+    are quoted, so FTS5 operators and punctuation in the input are taken
+    literally.
+    """
+    terms = SEARCH_TERM_RE.findall(text)
+    if not terms:
+        raise ValueError("Search query must contain at least one word")
+    return " ".join(f'"{t}"' for t in terms)
+
+def search_applications(query: str, limit: int = 20, offset: int = 0, status: Optional[str] = None) -> List[Dict]:
+    """
+    Full-text search over applications and their generated content, best
+    match first. Each application appears once, with a snippet from its best
+    matching field; 'source' says whether that was the application itself or
+    a piece of generated content (by content_type).
+    """
+    match = fts_query(query)
+    conn = get_connection()
+    top = offset + limit
+    status_join = "JOIN applications a ON a.id = {} AND a.status = ?" if status else ""
+    status_params = [status] if status else []
+    
+    # Every application on the requested page is among the best `top`
+    # applications of at least one index, so each index is asked for its own
+    # top rows only. SQLite evaluates snippet() after the sort, for the rows
+    # that survive the LIMIT, so it costs next to nothing here.
+    best = {}
+    for app_id, rank, snippet in conn.execute(f"""
+        SELECT applications_fts.rowid, bm25(applications_fts, {', '.join(map(str, SEARCH_WEIGHTS))}) AS rank,
+               snippet(applications_fts, -1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS})
+        FROM applications_fts {status_join.format('applications_fts.rowid')}
+        WHERE applications_fts MATCH ? ORDER BY rank LIMIT ?
+    """, status_params + [match, top]):
+        best[app_id] = (rank, 'application', snippet)
+    
+    # An application can have several matching pieces of content, so keep
+    # widening the window until it covers `top` distinct applications
+    window = top
+    while True:
+        rows = conn.execute(f"""
+            SELECT g.application_id, bm25(generated_content_fts) AS rank, g.content_type,
+                   snippet(generated_content_fts, 0, '<mark>', '</mark>', '…', {SNIPPET_TOKENS})
+            FROM generated_content_fts JOIN generated_content g ON g.id = generated_content_fts.rowid
+            {status_join.format('g.application_id')}
+            WHERE generated_content_fts MATCH ? ORDER BY rank LIMIT ?
+        """, status_params + [match, window]).fetchall()
+        if len(rows) < window or len({row[0] for row in rows}) >= top:
+            break
+        window *= 2
+    for app_id, rank, content_type, snippet in rows:
+        if app_id is not None and (app_id not in best or rank < best[app_id][0]):
+            best[app_id] = (rank, content_type, snippet)
+    
+    page = sorted(best.items(), key=lambda item: (item[1][0], item[0]))[offset:top]
+    if not page:
+        return []
+    ids = [app_id for app_id, _ in page]
+    apps = {row['id']: dict(row) for row in conn.execute(f"""
+        SELECT id, company, position, job_url, status, applied_date
+        FROM applications WHERE id IN ({', '.join('?' * len(ids))})
+    """, ids).fetchall()}
     
-    conn.commit()
-    conn.close()
-    return profile_id
+    results = []
+    for app_id, (rank, source, snippet) in page:
+        app = apps[app_id]
+        app.update(source=source, snippet=snippet, rank=rank)
+        results.append(app)
+    return results
+
+def get_profile_version() -> Optional[tuple]:
+    """(id, version) of the saved profile, or None without one. version goes
+    up with every save, in every process, so this one-row rowid read tells a
+    cached copy (see profile_cache.py) whether it is current."""
+    row = get_connection().execute("SELECT id, version FROM user_profile ORDER BY id LIMIT 1").fetchone()
+    return tuple(row) if row else None
 
 def get_user_profile() -> Optional[Dict]:
     """Get user profile"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute("SELECT * FROM user_profile LIMIT 1")
+    cursor.execute("SELECT * FROM user_profile ORDER BY id LIMIT 1")
     profile = cursor.fetchone()
     
-    conn.close()
     return dict(profile) if profile else None
 
 def update_application_status(app_id: int, status: str, notes: str = "") -> bool:
@@ -157,54 +642,69 @@ def update_application_status(app_id: int, status: str, notes: str = "") -> bool
     if status not in valid_statuses:
         raise ValueError(f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
     
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute(
+    return _write(_update_application_status, app_id, status, notes)
+
+def _update_application_status(conn: sqlite3.Connection, app_id: int, status: str, notes: str) -> bool:
+    cursor = conn.execute(
         "UPDATE applications SET status = ?, notes = ? WHERE id = ?",
         (status, notes, app_id)
     )
-    
-    updated = cursor.rowcount > 0
-    conn.commit()
-    conn.close()
-    return updated
+    return cursor.rowcount > 0
 
-def get_applications_by_status(status: str = None) -> List[Dict]:
+def get_applications_by_status(status: str = None, limit: Optional[int] = None, cursor: Optional[str] = None,
+                               fields: Optional[Sequence[str]] = None) -> List[Dict]:
     """Get applications filtered by status"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    if status:
-        cursor.execute("SELECT * FROM applications WHERE status = ? ORDER BY applied_date DESC", (status,))
-    else:
-        cursor.execute("SELECT * FROM applications ORDER BY applied_date DESC")
-    
-    apps = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return apps
+    return _select_applications(status, limit, cursor, fields)
 
-def get_application_stats() -> Dict:
-    """Get application statistics"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT COUNT(*) FROM applications")
-    total = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT status, COUNT(*) FROM applications GROUP BY status")
-    status_counts = dict(cursor.fetchall())
+# Window for recent_applications in get_application_stats
+RECENT_DAYS = 30
+
+def get_application_stats(recent_days: int = RECENT_DAYS) -> Dict:
+    """Get application statistics from the trigger-maintained counters.
+    Cost depends on the number of statuses and days in the window, not on
+    the number of applications."""
+    conn = get_connection()
     
-    cursor.execute("SELECT COUNT(*) FROM applications WHERE applied_date >= date('now', '-30 days')")
-    recent = cursor.fetchone()[0]
+    status_counts = {
+        (status or None): count
+        for status, count in conn.execute("SELECT status, count FROM application_status_counts WHERE count > 0")
+    }
+    recent = conn.execute(
+        "SELECT COALESCE(SUM(count), 0) FROM application_daily_counts WHERE day >= date('now', ?)",
+        (f"-{int(recent_days)} days",)
+    ).fetchone()[0]
     
-    conn.close()
     return {
-        "total_applications": total,
+        "total_applications": sum(status_counts.values()),
         "status_breakdown": status_counts,
         "recent_applications": recent
     }
 
-# Initialize database on import
-init_db()
\ No newline at end of file
+_STATS_QUERIES = {
+    "application_status_counts": "SELECT COALESCE(status, ''), COUNT(*) FROM applications GROUP BY 1",
+    "application_daily_counts": "SELECT date(applied_date), COUNT(*) FROM applications GROUP BY 1",
+}
+
+def check_application_stats(repair: bool = False) -> Dict:
+    """
+    Recount applications from scratch and compare with the stats counters.
+    Returns the keys whose counters drifted as {table: {key: [stored, actual]}};
+    with repair=True the counters are rebuilt from the recount in the same
+    transaction.
+    """
+    with transaction() as conn:
+        drift = {}
+        for table, query in _STATS_QUERIES.items():
+            key = "status" if table == "application_status_counts" else "day"
+            actual = dict(conn.execute(query).fetchall())
+            stored = {k: v for k, v in conn.execute(f"SELECT {key}, count FROM {table}") if v}
+            diffs = {k: [stored.get(k, 0), actual.get(k, 0)] for k in set(actual) | set(stored)
+                     if stored.get(k, 0) != actual.get(k, 0)}
+            if diffs:
+                drift[table] = diffs
+            if repair:
+                conn.execute(f"DELETE FROM {table}")
+                conn.executemany(f"INSERT INTO {table} ({key}, count) VALUES (?, ?)", actual.items())
+    if drift:
+        logger.warning(f"Application stats counters drifted: {drift}")
+    return {"consistent": not drift, "repaired": repair and bool(drift), "drift": drift}
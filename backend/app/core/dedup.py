@@ -0,0 +1,188 @@
+# backend/app/core/dedup.py
+import os
+import re
+import zlib
+import sqlite3
+import numpy as np
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from app.core.compression import decompress_text
+
+# Near-duplicate postings (reposts, the same role on several boards) are found
+# with MinHash over word 5-shingles and LSH banding: 120 hashes in 20 bands
+# of 6, so two postings share at least one bucket with probability ~92% at
+# Jaccard 0.7, ~99.8% at 0.8 and ~1.5% at 0.3. Candidates from the buckets
+# are then compared exactly. The hash seeds and shapes are baked into the
+# stored buckets; changing any of them needs a migration that re-buckets
+# every application.
+# Comparing means reading, decompressing and shingling up to MAX_CANDIDATES
+# stored postings, so find_duplicates does it in the caller's thread before
+# the insert, and record() in the write transaction only applies the result.
+# Two near-duplicates saved at the same moment can both go unflagged; the
+# similar-postings lookup still finds them.
+SHINGLE_SIZE = 5
+NUM_HASHES = 120
+LSH_BANDS = 20
+LSH_ROWS = NUM_HASHES // LSH_BANDS
+# Exact Jaccard similarity at or above which a new posting is flagged as a
+# duplicate. A few edited words or a different board's header and footer
+# keep a repost well above it. Below ~0.6 the banding starts missing pairs.
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.7"))
+MIN_THRESHOLD = 0.6
+# Candidates verified per lookup, those sharing the most buckets first
+MAX_CANDIDATES = 50
+
+WORD_RE = re.compile(r"\w+")
+
+# How find_similar reads a candidate's text, as (key, stored value): the key
+# is the blob hash, so candidates sharing a blob are compared once
+JOB_TEXT_SQL = "a.job_text_hash, (SELECT data FROM blobs WHERE hash = a.job_text_hash)"
+
+_rng = np.random.default_rng(0x5EED_D00D)
+# Shingle hash: a random odd multiplier per word position
+_SHINGLE_MULTIPLIERS = (_rng.integers(0, 2**63, SHINGLE_SIZE, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+# MinHash family: multiply-shift hashing, h(x) = ((a*x + b) mod 2^64) >> 32
+_HASH_A = ((_rng.integers(0, 2**63, NUM_HASHES, dtype=np.uint64) << np.uint64(1)) | np.uint64(1))[:, None]
+_HASH_B = _rng.integers(0, 2**63, NUM_HASHES, dtype=np.uint64)[:, None]
+# Band keys: a random odd multiplier per row within the band, plus a random
+# offset per band so equal rows in different bands land in different buckets
+_BAND_MULTIPLIERS = (_rng.integers(0, 2**63, NUM_HASHES // LSH_BANDS, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+_BAND_OFFSETS = _rng.integers(0, 2**63, LSH_BANDS, dtype=np.uint64)
+
+class Fingerprint(NamedTuple):
+    shingles: np.ndarray    # sorted unique shingle hashes
+    buckets: List[int]      # one LSH bucket per band
+
+class Duplicate(NamedTuple):
+    """What a posting about to be inserted nearly duplicates: a saved
+    application, or an earlier posting of the same batch"""
+    app_id: Optional[int]
+    batch_index: Optional[int]
+    similarity: float
+
+def shingles(text: str) -> np.ndarray:
+    """Sorted unique 32-bit hashes of the text's word 5-shingles"""
+    words = WORD_RE.findall(text.lower())
+    if not words:
+        return np.zeros(0, np.uint64)
+    hashes = np.fromiter(map(zlib.crc32, map(str.encode, words)), np.uint64, len(words))
+    k = min(SHINGLE_SIZE, len(hashes))
+    n = len(hashes) - k + 1
+    combined = hashes[:n] * _SHINGLE_MULTIPLIERS[0]
+    for j in range(1, k):
+        combined += hashes[j:j + n] * _SHINGLE_MULTIPLIERS[j]
+    return np.unique(combined >> np.uint64(32))
+
+def minhash(shingle_hashes: np.ndarray) -> np.ndarray:
+    values = _HASH_A * shingle_hashes[None, :]
+    values += _HASH_B
+    values >>= np.uint64(32)
+    return values.min(axis=1).astype(np.uint32)
+
+def lsh_buckets(signature: np.ndarray) -> List[int]:
+    """A signed 64-bit key per band, as stored in SQLite"""
+    bands = signature.astype(np.uint64).reshape(LSH_BANDS, LSH_ROWS)
+    keys = (bands * _BAND_MULTIPLIERS).sum(axis=1, dtype=np.uint64) + _BAND_OFFSETS
+    return keys.view(np.int64).tolist()
+
+def fingerprint(text: Optional[str]) -> Optional[Fingerprint]:
+    """Shingles and LSH buckets for a posting, or None if it has no words"""
+    hashes = shingles(text or "")
+    if not len(hashes):
+        return None
+    return Fingerprint(hashes, lsh_buckets(minhash(hashes)))
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    if not len(a) or not len(b):
+        return 0.0
+    shared = len(np.intersect1d(a, b, assume_unique=True))
+    return shared / (len(a) + len(b) - shared)
+
+def find_similar(conn: sqlite3.Connection, fp: Fingerprint, threshold: float = DUPLICATE_THRESHOLD,
+                 limit: int = MAX_CANDIDATES, exclude_id: Optional[int] = None,
+                 text_sql: str = JOB_TEXT_SQL, shingle_cache: Optional[Dict] = None) -> List[Dict]:
+    """
+    Applications whose job text has Jaccard similarity >= threshold with the
+    fingerprint, most similar first, as {id, duplicate_of, similarity}. Only
+    applications sharing an LSH bucket are read, so the cost depends on the
+    number of candidates, not the size of the table. shingle_cache, keyed
+    like text_sql, lets lookups for a batch shingle each candidate once.
+    """
+    if shingle_cache is None:
+        shingle_cache = {}
+    placeholders = ",".join("?" * len(fp.buckets))
+    rows = conn.execute(f"""
+        SELECT a.id, a.duplicate_of, {text_sql}
+        FROM (
+            SELECT application_id, COUNT(*) AS shared FROM application_lsh
+            WHERE bucket IN ({placeholders}) AND application_id IS NOT ?
+            GROUP BY application_id ORDER BY shared DESC, application_id LIMIT ?
+        ) AS c
+        JOIN applications a ON a.id = c.application_id
+    """, (*fp.buckets, exclude_id, MAX_CANDIDATES)).fetchall()
+    similarities = {}
+    matches = []
+    for app_id, duplicate_of, key, data in rows:
+        if key not in similarities:
+            if key not in shingle_cache:
+                shingle_cache[key] = shingles(decompress_text(data) or "")
+            similarities[key] = jaccard(fp.shingles, shingle_cache[key])
+        similarity = similarities[key]
+        if similarity >= threshold:
+            matches.append({"id": app_id, "duplicate_of": duplicate_of, "similarity": round(similarity, 4)})
+    matches.sort(key=lambda m: (-m['similarity'], m['id']))
+    return matches[:limit]
+
+def find_duplicates(conn: sqlite3.Connection, fps: Sequence[Optional[Fingerprint]],
+                    text_sql: str = JOB_TEXT_SQL) -> List[Optional[Duplicate]]:
+    """
+    For each posting about to be inserted, in order, the one it nearly
+    duplicates: the most similar saved application, or an earlier posting
+    in fps if that is more similar. None where there is no such posting.
+    """
+    duplicates = []
+    batch_buckets: Dict[int, List[int]] = {}
+    shingle_cache: Dict = {}
+    for i, fp in enumerate(fps):
+        if fp is None:
+            duplicates.append(None)
+            continue
+        best = None
+        saved = find_similar(conn, fp, limit=1, text_sql=text_sql, shingle_cache=shingle_cache)
+        if saved:
+            best = Duplicate(saved[0]['id'], None, saved[0]['similarity'])
+        shared = Counter(j for bucket in fp.buckets for j in batch_buckets.get(bucket, ()))
+        for j, _ in shared.most_common(MAX_CANDIDATES):
+            similarity = round(jaccard(fp.shingles, fps[j].shingles), 4)
+            if similarity >= DUPLICATE_THRESHOLD and (best is None or similarity > best.similarity):
+                best = Duplicate(None, j, similarity)
+        duplicates.append(best)
+        for bucket in fp.buckets:
+            batch_buckets.setdefault(bucket, []).append(i)
+    return duplicates
+
+def record(conn: sqlite3.Connection, app_id: int, fp: Optional[Fingerprint],
+           duplicate: Optional[Duplicate] = None, batch_ids: Sequence[int] = ()) -> Optional[int]:
+    """
+    Index a newly inserted application and, if find_duplicates matched it,
+    point its duplicate_of at the matched posting's original; batch_ids maps
+    batch indexes to the IDs they were inserted as. Returns the original's
+    ID or None. Runs inside the insert's transaction, with primary-key reads
+    only.
+    """
+    if fp is None:
+        return None
+    original = None
+    if duplicate is not None:
+        target = batch_ids[duplicate.batch_index] if duplicate.batch_index is not None else duplicate.app_id
+        # Resolved now rather than by find_duplicates: the match may have
+        # been flagged, or deleted, since
+        row = conn.execute("SELECT COALESCE(duplicate_of, id) FROM applications WHERE id = ?", (target,)).fetchone()
+        if row is not None:
+            original = row[0]
+            conn.execute("UPDATE applications SET duplicate_of = ? WHERE id = ?", (original, app_id))
+    conn.executemany(
+        "INSERT OR IGNORE INTO application_lsh (bucket, application_id) VALUES (?, ?)",
+        [(bucket, app_id) for bucket in fp.buckets]
+    )
+    return original
@@ -0,0 +1,137 @@
+# backend/app/core/extractors.py
+import re
+import json
+import html as html_lib
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+# Cheap, parser-free extraction stages that run before the scraper builds a
+# BeautifulSoup tree. Each returns a partial {"title", "company",
+# "description"} dict; the scraper only falls back to DOM heuristics for
+# fields still missing afterwards.
+
+SiteExtractor = Callable[[str, str], Dict[str,str]]
+
+_registry: Dict[str, SiteExtractor] = {}
+
+JSON_LD_RE = re.compile(
+    r'<script\b[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>',
+    re.IGNORECASE | re.DOTALL,
+)
+META_RE = re.compile(r'<meta\b[^>]*>', re.IGNORECASE)
+ATTR_RE = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+BLOCK_BREAK_RE = re.compile(r'<\s*(?:br|/p|/li|/h[1-6]|/div|/ul|/ol|/tr)\b[^>]*>', re.IGNORECASE)
+TAG_RE = re.compile(r'<[^>]+>')
+
+def register_extractor(*domains: str):
+    """Register a site extractor for one or more domains (subdomains included)"""
+    def decorator(fn: SiteExtractor) -> SiteExtractor:
+        for domain in domains:
+            _registry[domain.lower()] = fn
+        return fn
+    return decorator
+
+def find_extractor(url: str) -> Optional[SiteExtractor]:
+    """Return the extractor registered for url's host or its closest parent domain"""
+    host = urlparse(url).netloc.lower().split(":")[0]
+    parts = host.split(".")
+    for i in range(len(parts) - 1):
+        extractor = _registry.get(".".join(parts[i:]))
+        if extractor:
+            return extractor
+    return None
+
+def html_fragment_to_text(fragment: str) -> str:
+    """Flatten an HTML snippet (as embedded in JSON-LD) to text, one block per line"""
+    text = html_lib.unescape(fragment)
+    text = BLOCK_BREAK_RE.sub("\n", text)
+    text = html_lib.unescape(TAG_RE.sub("", text))
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+def _iter_nodes(data):
+    """Yield every JSON object in a JSON-LD document, including @graph members"""
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        for key in ("@graph", "mainEntity"):
+            if key in data:
+                yield from _iter_nodes(data[key])
+
+def _is_job_posting(node: Dict) -> bool:
+    kind = node.get("@type")
+    kinds = kind if isinstance(kind, list) else [kind]
+    return "JobPosting" in kinds
+
+def extract_json_ld(html: str) -> Dict[str,str]:
+    """Pull title/company/description from a schema.org JobPosting block, if any"""
+    for match in JSON_LD_RE.finditer(html):
+        try:
+            data = json.loads(match.group(1).strip(), strict=False)
+        except ValueError:
+            continue
+        for node in _iter_nodes(data):
+            if not _is_job_posting(node):
+                continue
+            fields = {}
+            if isinstance(node.get("title"), str):
+                fields["title"] = html_lib.unescape(node["title"]).strip()
+            org = node.get("hiringOrganization")
+            if isinstance(org, list):
+                org = org[0] if org else None
+            name = org.get("name") if isinstance(org, dict) else org
+            if isinstance(name, str):
+                fields["company"] = html_lib.unescape(name).strip()
+            if isinstance(node.get("description"), str):
+                fields["description"] = html_fragment_to_text(node["description"])
+            return {k: v for k, v in fields.items() if v}
+    return {}
+
+def extract_open_graph(html: str) -> Dict[str,str]:
+    """Read og:title / og:site_name meta tags. Used only as a last resort: on job
+    boards og:site_name is the board, not the employer."""
+    meta = {}
+    for tag in META_RE.finditer(html):
+        attrs = {m.group(1).lower(): m.group(2) if m.group(2) is not None else m.group(3)
+                 for m in ATTR_RE.finditer(tag.group(0))}
+        key = attrs.get("property") or attrs.get("name")
+        if key in ("og:title", "og:site_name") and attrs.get("content"):
+            meta.setdefault(key, html_lib.unescape(attrs["content"]).strip())
+    fields = {}
+    if meta.get("og:title"):
+        fields["title"] = meta["og:title"]
+    if meta.get("og:site_name"):
+        fields["company"] = meta["og:site_name"]
+    return fields
+
+def extract_structured(html: str, url: str) -> Dict[str,str]:
+    """Run the fast stages: JSON-LD first, then any site extractor for the domain"""
+    fields = extract_json_ld(html)
+    extractor = find_extractor(url)
+    if extractor:
+        for key, value in extractor(html, url).items():
+            if value and not fields.get(key):
+                fields[key] = value
+    return fields
+
+def _path_segments(url: str) -> List[str]:
+    return [p for p in urlparse(url).path.split("/") if p]
+
+def _company_from_slug(slug: str) -> str:
+    return " ".join(word.capitalize() for word in re.split(r"[-_]+", slug) if word)
+
+# Hosted applicant-tracking boards put the employer's slug in the URL, which
+# is a reliable company name when the page has no JSON-LD.
+
+@register_extractor("jobs.lever.co", "boards.greenhouse.io", "job-boards.greenhouse.io", "jobs.ashbyhq.com")
+def _board_slug_extractor(html: str, url: str) -> Dict[str,str]:
+    segments = _path_segments(url)
+    return {"company": _company_from_slug(segments[0])} if segments else {}
+
+@register_extractor("myworkdayjobs.com")
+def _workday_extractor(html: str, url: str) -> Dict[str,str]:
+    # <tenant>.wd5.myworkdayjobs.com/...
+    tenant = urlparse(url).netloc.split(".")[0]
+    return {"company": _company_from_slug(tenant)} if tenant else {}
@@ -2,19 +2,61 @@
 import PyPDF2
 from docx import Document
 import io
-from typing import Optional
+import os
+import asyncio
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+# PDF/DOCX parsing is CPU-bound pure Python, so uploads are parsed in a
+# separate process pool to keep it off the event loop and the GIL
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "2"))
+PARSE_TIMEOUT_SECONDS = float(os.getenv("PARSE_TIMEOUT_SECONDS", "30"))
+
+# PDFs with at least this many pages are split into page ranges that are
+# extracted by several workers at once
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+# Extracted text keyed by file type and SHA-256 of the bytes, so re-uploading
+# the same resume skips parsing entirely
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "256"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def file_type(filename: str) -> str:
+    """'pdf' or 'docx'; raises ValueError for anything else"""
+    filename_lower = filename.lower()
+    if filename_lower.endswith('.pdf'):
+        return "pdf"
+    elif filename_lower.endswith('.docx'):
+        return "docx"
+    raise ValueError("Unsupported file type. Only PDF and DOCX files are supported.")
+
+def _cache_get(kind: str, digest: str) -> Optional[str]:
+    with _cache_lock:
+        text = _cache.get((kind, digest))
+        if text is not None:
+            _cache.move_to_end((kind, digest))
+        return text
+
+def _cache_put(kind: str, digest: str, text: str):
+    with _cache_lock:
+        _cache[(kind, digest)] = text
+        _cache.move_to_end((kind, digest))
+        while len(_cache) > PARSE_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
 
 def extract_text_from_pdf(file_content: bytes) -> str:
     """Extract text from PDF file"""
     try:
         pdf_file = io.BytesIO(file_content)
         pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        
-        return text.strip()
+        return "\n".join(page.extract_text() or "" for page in pdf_reader.pages).strip()
     except Exception as e:
         raise ValueError(f"Failed to parse PDF: {str(e)}")
 
@@ -23,22 +65,124 @@ def extract_text_from_docx(file_content: bytes) -> str:
     try:
         docx_file = io.BytesIO(file_content)
         doc = Document(docx_file)
-        
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        
-        return text.strip()
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
     except Exception as e:
         raise ValueError(f"Failed to parse DOCX: {str(e)}")
 
+def _extract(kind: str, file_content: bytes) -> str:
+    if kind == "pdf":
+        return extract_text_from_pdf(file_content)
+    return extract_text_from_docx(file_content)
+
 def parse_resume_file(filename: str, file_content: bytes) -> str:
     """Parse resume file and extract text"""
-    filename_lower = filename.lower()
-    
-    if filename_lower.endswith('.pdf'):
-        return extract_text_from_pdf(file_content)
-    elif filename_lower.endswith('.docx'):
-        return extract_text_from_docx(file_content)
-    else:
-        raise ValueError("Unsupported file type. Only PDF and DOCX files are supported.")
\ No newline at end of file
+    kind = file_type(filename)
+    digest = hashlib.sha256(file_content).hexdigest()
+    text = _cache_get(kind, digest)
+    if text is None:
+        text = _extract(kind, file_content)
+        _cache_put(kind, digest, text)
+    return text
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# The pool workers are handed the spooled upload's path and read it
+# themselves, so the file's bytes are never pickled across processes
+
+def pdf_page_count(path: str) -> int:
+    """Number of pages in a PDF (runs inside a pool worker)"""
+    try:
+        return len(PyPDF2.PdfReader(io.BytesIO(_read(path))).pages)
+    except Exception as e:
+        raise ValueError(f"Failed to parse PDF: {str(e)}")
+
+def extract_pdf_range(path: str, start: int, stop: int) -> str:
+    """Text of pages [start, stop) of a PDF (runs inside a pool worker)"""
+    try:
+        pages = PyPDF2.PdfReader(io.BytesIO(_read(path))).pages
+        return "\n".join(pages[i].extract_text() or "" for i in range(start, stop))
+    except Exception as e:
+        raise ValueError(f"Failed to parse PDF: {str(e)}")
+
+def extract_path(kind: str, path: str) -> str:
+    """Text of a whole file on disk (runs inside a pool worker)"""
+    return _extract(kind, _read(path))
+
+def _page_ranges(page_count: int, parts: int) -> List[range]:
+    size = -(-page_count // parts)
+    return [range(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn rather than fork: the server process has running threads
+        _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def shutdown_parse_pool():
+    """Stop the parser processes (called on app shutdown)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _kill_pool(pool: ProcessPoolExecutor):
+    """Drop a pool whose worker is stuck on a pathological file. Parses still
+    running in it fail with BrokenProcessPool and are retried on a new pool."""
+    global _pool
+    if _pool is pool:
+        _pool = None
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+async def _parse_in_pool(pool: ProcessPoolExecutor, kind: str, path: str) -> str:
+    loop = asyncio.get_running_loop()
+    if kind == "pdf" and PARSE_WORKERS > 1:
+        page_count = await loop.run_in_executor(pool, pdf_page_count, path)
+        if page_count >= PDF_PARALLEL_MIN_PAGES:
+            parts = await asyncio.gather(*[
+                loop.run_in_executor(pool, extract_pdf_range, path, r.start, r.stop)
+                for r in _page_ranges(page_count, PARSE_WORKERS)
+            ])
+            return "\n".join(parts).strip()
+    return await loop.run_in_executor(pool, extract_path, kind, path)
+
+async def parse_resume_file_async(filename: str, path: str) -> str:
+    """
+    Parse an upload spooled to path in the process pool, giving up after
+    PARSE_TIMEOUT_SECONDS. Repeat uploads of the same file are served from
+    the cache.
+    """
+    kind = file_type(filename)
+    digest = await asyncio.to_thread(_file_digest, path)
+    text = _cache_get(kind, digest)
+    if text is not None:
+        return text
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + PARSE_TIMEOUT_SECONDS
+    for attempt in range(2):
+        pool = _get_pool()
+        try:
+            text = await asyncio.wait_for(_parse_in_pool(pool, kind, path), deadline - loop.time())
+            break
+        except asyncio.TimeoutError:
+            _kill_pool(pool)
+            raise TimeoutError(f"Parsing {filename} took longer than {PARSE_TIMEOUT_SECONDS:g} seconds")
+        except BrokenProcessPool:
+            # Another upload's timeout (or a crashed worker) took the pool
+            # down under this parse; retry once on a fresh one
+            _kill_pool(pool)
+            if attempt or deadline <= loop.time():
+                raise
+    _cache_put(kind, digest, text)
+    return text
@@ -0,0 +1,294 @@
+# backend/app/core/job_queue.py
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import openai
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.database import get_connection, transaction, save_generated_output
+from app.core import profile_cache
+from app.core.llm_client import agenerate_cover_letter, agenerate_resume_bullets, agenerate_short_answer, agenerate_tailored_content, parse_bullets
+
+logger = logging.getLogger(__name__)
+
+# Generations submitted in async mode are stored in generation_jobs and run by
+# a pool of asyncio workers in each API process, so the request that submits
+# them returns immediately and the work survives client disconnects and
+# worker restarts. Claiming is a single conditional UPDATE, so any number of
+# processes can share the table. GENERATION_WORKERS=0 disables the pool in a
+# process (run `python -m app.core.job_queue` elsewhere instead).
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "4"))
+GENERATION_MAX_ATTEMPTS = int(os.getenv("GENERATION_MAX_ATTEMPTS", "4"))
+GENERATION_BACKOFF_SECONDS = float(os.getenv("GENERATION_BACKOFF_SECONDS", "2"))
+GENERATION_BACKOFF_MAX_SECONDS = float(os.getenv("GENERATION_BACKOFF_MAX_SECONDS", "60"))
+GENERATION_JOB_TIMEOUT = float(os.getenv("GENERATION_JOB_TIMEOUT", "180"))
+GENERATION_JOB_RETENTION_DAYS = float(os.getenv("GENERATION_JOB_RETENTION_DAYS", "7"))
+# Idle workers re-check the table this often for jobs queued by other processes
+POLL_INTERVAL_SECONDS = 1.0
+# How often one worker requeues jobs orphaned by a dead process and purges old ones
+MAINTENANCE_INTERVAL_SECONDS = 60.0
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+# Errors worth another attempt; anything else (bad request, auth, a missing
+# resume) fails the job straight away
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+_workers: List[asyncio.Task] = []
+_wakeup: Optional[asyncio.Event] = None
+
+def enqueue(kind: str, payload: Dict, max_attempts: int = GENERATION_MAX_ATTEMPTS) -> int:
+    """Persist a job and return its ID"""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    now = time.time()
+    with transaction() as conn:
+        cursor = conn.execute("""
+            INSERT INTO generation_jobs (kind, payload, max_attempts, run_after, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (kind, json.dumps(payload), max_attempts, now, now))
+        return cursor.lastrowid
+
+async def submit(kind: str, payload: Dict) -> int:
+    """Enqueue a job from the event loop and wake an idle worker"""
+    job_id = await asyncio.to_thread(enqueue, kind, payload)
+    if _wakeup is not None:
+        _wakeup.set()
+    return job_id
+
+def get_job(job_id: int) -> Optional[Dict]:
+    """Job state, with the result decoded; the payload is left out"""
+    conn = get_connection()
+    row = conn.execute("""
+        SELECT id, kind, status, attempts, max_attempts, result, error, application_id,
+               created_at, started_at, finished_at
+        FROM generation_jobs WHERE id = ?
+    """, (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
+def _claim() -> Optional[Dict]:
+    """Atomically take the next due job, marking it running"""
+    now = time.time()
+    with transaction() as conn:
+        row = conn.execute("""
+            UPDATE generation_jobs
+            SET status = 'running', attempts = attempts + 1, started_at = ?
+            WHERE id = (
+                SELECT id FROM generation_jobs
+                WHERE status = 'queued' AND run_after <= ?
+                ORDER BY run_after, id LIMIT 1
+            )
+            RETURNING id, kind, payload, attempts, max_attempts
+        """, (now, now)).fetchone()
+    return dict(row) if row else None
+
+class JobNotRunning(Exception):
+    """The job stopped being this worker's (requeued as stale, or released) while it ran"""
+
+def _mark_succeeded(conn, application_id: Optional[int], job: Dict, result: Dict):
+    # Matching the attempt too: a stale job requeued and claimed again by
+    # another worker is 'running' once more, but no longer this run's
+    cursor = conn.execute("""
+        UPDATE generation_jobs
+        SET status = 'succeeded', result = ?, error = NULL, application_id = ?, finished_at = ?
+        WHERE id = ? AND status = 'running' AND attempts = ?
+    """, (json.dumps(result), application_id, time.time(), job['id'], job['attempts']))
+    if cursor.rowcount == 0:
+        raise JobNotRunning(f"Generation job {job['id']} is no longer running attempt {job['attempts']}")
+
+def _finish(job: Dict, application_id: Optional[int], output: Tuple[Dict, List[tuple], Optional[tuple]]) -> bool:
+    """Save the job's content and mark it succeeded in one transaction, so
+    the content is saved exactly when the job counts as done. Returns False,
+    saving nothing, if the job is no longer this worker's to finish."""
+    result, contents, new_application = output
+    try:
+        save_generated_output(
+            contents, application_id, new_application,
+            then=lambda conn, app_id: _mark_succeeded(conn, app_id, job, result)
+        )
+    except JobNotRunning as e:
+        logger.warning(f"{e}; discarding its result")
+        return False
+    return True
+
+def _fail(job: Dict, error: Exception, retryable: bool):
+    """Requeue the job with exponential backoff, or mark it failed for good"""
+    message = f"{type(error).__name__}: {error}"
+    now = time.time()
+    with transaction() as conn:
+        if retryable and job['attempts'] < job['max_attempts']:
+            # Full jitter keeps jobs that failed together from retrying together
+            delay = min(GENERATION_BACKOFF_MAX_SECONDS, GENERATION_BACKOFF_SECONDS * 2 ** (job['attempts'] - 1))
+            delay *= random.uniform(0.5, 1.0)
+            conn.execute(
+                "UPDATE generation_jobs SET status = 'queued', run_after = ?, error = ? WHERE id = ?",
+                (now + delay, message, job['id'])
+            )
+            logger.warning(f"Generation job {job['id']} attempt {job['attempts']} failed, retrying in {delay:.1f}s: {message}")
+        else:
+            conn.execute(
+                "UPDATE generation_jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (message, now, job['id'])
+            )
+            logger.error(f"Generation job {job['id']} failed after {job['attempts']} attempt(s): {message}")
+
+def _release(job_id: int):
+    """Return a job interrupted by shutdown to the queue without using up an attempt"""
+    with transaction() as conn:
+        conn.execute("""
+            UPDATE generation_jobs SET status = 'queued', attempts = attempts - 1, run_after = ?
+            WHERE id = ? AND status = 'running'
+        """, (time.time(), job_id))
+
+def requeue_stale() -> int:
+    """Put back jobs left 'running' by a process that died mid-generation,
+    failing those that have no attempts left"""
+    now = time.time()
+    with transaction() as conn:
+        cursor = conn.execute("""
+            UPDATE generation_jobs
+            SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                finished_at = CASE WHEN attempts >= max_attempts THEN ? END,
+                error = 'Worker stopped during generation',
+                run_after = ?
+            WHERE status = 'running' AND started_at < ?
+        """, (now, now, now - GENERATION_JOB_TIMEOUT * 2))
+    if cursor.rowcount:
+        logger.warning(f"Requeued {cursor.rowcount} stale generation job(s)")
+    return cursor.rowcount
+
+def purge_finished() -> int:
+    """Delete finished jobs past the retention period; their content stays in generated_content"""
+    cutoff = time.time() - GENERATION_JOB_RETENTION_DAYS * 86400
+    with transaction() as conn:
+        cursor = conn.execute(
+            "DELETE FROM generation_jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+            (cutoff,)
+        )
+    return cursor.rowcount
+
+def _resume_text(payload: Dict) -> str:
+    if payload.get('resume_text'):
+        return payload['resume_text']
+    artifacts = profile_cache.get_resume_artifacts()
+    if artifacts is None:
+        raise ValueError("No resume text provided and no profile found")
+    return artifacts.text
+
+async def _run_cover_letter(payload: Dict) -> Tuple[Dict, List[tuple], Optional[tuple]]:
+    resume_text = await asyncio.to_thread(_resume_text, payload)
+    letter = await agenerate_cover_letter(
+        payload['job_text'],
+        resume_text,
+        payload.get('company_name', ""),
+        payload.get('position_title', ""),
+        use_cache=payload.get('use_cache', True)
+    )
+    new_application = None
+    if payload.get('application_id') is None and payload.get('company_name') and payload.get('position_title'):
+        new_application = (payload['company_name'], payload['position_title'], payload['job_text'])
+    return {"cover_letter": letter}, [("cover_letter", letter)], new_application
+
+async def _run_tailor(payload: Dict) -> Tuple[Dict, List[tuple], Optional[tuple]]:
+    resume_text = await asyncio.to_thread(_resume_text, payload)
+    use_cache = payload.get('use_cache', True)
+    if payload.get('single_call'):
+        result = await agenerate_tailored_content(payload['job_text'], resume_text, use_cache=use_cache)
+    else:
+        bullets, answer = await asyncio.gather(
+            agenerate_resume_bullets(payload['job_text'], resume_text, use_cache=use_cache),
+            agenerate_short_answer(payload['job_text'], "Why are you a good fit?", resume_text, use_cache=use_cache),
+        )
+        result = {"bullets": parse_bullets(bullets), "answer": answer}
+    return result, [("resume_bullets", "\n".join(result['bullets'])), ("short_answer", result['answer'])], None
+
+# kind -> coroutine taking the payload and returning (result, contents,
+# new_application): the result to report, the (content_type, content) pairs
+# to save to the payload's application_id, and, without one, the (company,
+# position, job_text) of an application to create for them. Handlers only
+# generate; _finish saves, so a handler timed out or cancelled midway leaves
+# nothing behind.
+HANDLERS: Dict[str, Callable[[Dict], Awaitable[Tuple[Dict, List[tuple], Optional[tuple]]]]] = {
+    "cover_letter": _run_cover_letter,
+    "tailor": _run_tailor,
+}
+
+async def _run_job(job: Dict):
+    payload = json.loads(job['payload'])
+    try:
+        handler = HANDLERS[job['kind']]
+        output = await asyncio.wait_for(handler(payload), GENERATION_JOB_TIMEOUT)
+    except asyncio.CancelledError:
+        # Shutting down: a blocking write is acceptable here, and awaiting
+        # anything would be cancelled too
+        _release(job['id'])
+        raise
+    except Exception as e:
+        await asyncio.to_thread(_fail, job, e, isinstance(e, RETRYABLE_ERRORS))
+        return
+    # Outside wait_for, so the timeout can't fire mid-save. If the process
+    # dies first, nothing was saved and the stale job simply runs again.
+    if await asyncio.to_thread(_finish, job, payload.get('application_id'), output):
+        logger.info(f"Generation job {job['id']} ({job['kind']}) succeeded")
+
+async def _worker(index: int):
+    last_maintenance = 0.0
+    while True:
+        try:
+            if index == 0 and time.monotonic() - last_maintenance > MAINTENANCE_INTERVAL_SECONDS:
+                last_maintenance = time.monotonic()
+                await asyncio.to_thread(requeue_stale)
+                await asyncio.to_thread(purge_finished)
+            job = await asyncio.to_thread(_claim)
+            if job is not None:
+                await _run_job(job)
+                continue
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Database trouble: don't spin, try again shortly
+            logger.error(f"Generation worker {index} error: {str(e)}")
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+def start_workers(count: int = GENERATION_WORKERS):
+    """Start the worker pool on the running event loop (called on app startup)"""
+    global _wakeup
+    if _workers or count <= 0:
+        return
+    _wakeup = asyncio.Event()
+    for i in range(count):
+        _workers.append(asyncio.create_task(_worker(i), name=f"generation-worker-{i}"))
+    logger.info(f"Started {count} generation worker(s)")
+
+async def stop_workers():
+    """Cancel the worker pool (called on app shutdown). Jobs in progress go
+    back to the queue."""
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+async def _main():
+    start_workers(max(GENERATION_WORKERS, 1))
+    await asyncio.gather(*_workers)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    asyncio.run(_main())
@@ -0,0 +1,120 @@
+# backend/app/core/llm_cache.py
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Optional
+from app.core.database import get_connection, transaction
+
+# Generations are cached by a hash of everything that determines the output,
+# so a repeated "tailor" on the same job and resume costs a local lookup
+# instead of a model round-trip. Least recently used entries are evicted
+# once either limit is exceeded.
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+# Hits are counted in memory and written back at most this often (and before
+# eviction or stats read them), so a cache hit is a plain read
+LLM_CACHE_HIT_FLUSH_SECONDS = float(os.getenv("LLM_CACHE_HIT_FLUSH_SECONDS", "5"))
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "bytes_saved": 0, "latency_saved_ms": 0.0}
+# key -> [hits, last access] not yet written back
+_pending_hits: Dict[str, list] = {}
+_last_flush = time.monotonic()
+
+def cache_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+    """SHA-256 over the canonical JSON of the request parameters"""
+    payload = json.dumps(
+        {"model": model, "prompt": prompt, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def get(key: str) -> Optional[str]:
+    """Return the cached response for key, or None on a miss"""
+    conn = get_connection()
+    row = conn.execute("SELECT response, size, latency_ms FROM llm_cache WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        with _stats_lock:
+            _stats["misses"] += 1
+        return None
+
+    with _stats_lock:
+        _stats["hits"] += 1
+        _stats["bytes_saved"] += row['size']
+        _stats["latency_saved_ms"] += row['latency_ms']
+        pending = _pending_hits.setdefault(key, [0, 0.0])
+        pending[0] += 1
+        pending[1] = time.time()
+        due = time.monotonic() - _last_flush >= LLM_CACHE_HIT_FLUSH_SECONDS
+    if due:
+        flush_hits()
+    return row['response']
+
+def _take_pending_hits() -> list:
+    global _last_flush
+    with _stats_lock:
+        rows = [(hits, last_access, key) for key, (hits, last_access) in _pending_hits.items()]
+        _pending_hits.clear()
+        _last_flush = time.monotonic()
+    return rows
+
+def _apply_hits(conn, rows: list):
+    conn.executemany(
+        "UPDATE llm_cache SET hits = hits + ?, last_access = MAX(last_access, ?) WHERE key = ?", rows
+    )
+
+def flush_hits():
+    """Write the buffered hit counts and access times back in one transaction"""
+    rows = _take_pending_hits()
+    if rows:
+        with transaction() as conn:
+            _apply_hits(conn, rows)
+
+def put(key: str, model: str, response: str, latency_ms: float):
+    """Store a response along with how long the model took to produce it"""
+    now = time.time()
+    with transaction() as conn:
+        # Eviction goes by last_access, so it must see the buffered hits
+        _apply_hits(conn, _take_pending_hits())
+        conn.execute("""
+            INSERT OR REPLACE INTO llm_cache (key, model, response, size, latency_ms, hits, created_at, last_access)
+            VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+        """, (key, model, response, len(response.encode("utf-8")), latency_ms, now, now))
+        _evict(conn)
+
+def _evict(conn):
+    """Drop least recently used entries until under both the entry and byte limits"""
+    count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+    if count <= LLM_CACHE_MAX_ENTRIES and total <= LLM_CACHE_MAX_BYTES:
+        return
+    victims = []
+    for row in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access"):
+        if count <= LLM_CACHE_MAX_ENTRIES and total <= LLM_CACHE_MAX_BYTES:
+            break
+        victims.append((row['key'],))
+        count -= 1
+        total -= row['size']
+    conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+
+def get_stats() -> Dict:
+    """Counters for this process plus lifetime totals over the entries still cached"""
+    flush_hits()
+    conn = get_connection()
+    row = conn.execute("""
+        SELECT COUNT(*) AS entries,
+               COALESCE(SUM(size), 0) AS size_bytes,
+               COALESCE(SUM(hits), 0) AS total_hits,
+               COALESCE(SUM(hits * size), 0) AS total_bytes_saved,
+               COALESCE(SUM(hits * latency_ms), 0) AS total_latency_saved_ms
+        FROM llm_cache
+    """).fetchone()
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    stats["latency_saved_ms"] = round(stats["latency_saved_ms"], 1)
+    stats.update(dict(row))
+    stats["total_latency_saved_ms"] = round(stats["total_latency_saved_ms"], 1)
+    return stats
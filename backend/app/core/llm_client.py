@@ -1,12 +1,180 @@
 # backend/app/core/llm_client.py
 import os
+import re
+import json
+import time
+import asyncio
+import logging
+import threading
 import openai
-from typing import Dict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from app.core import llm_cache, profile_cache
+from app.core.compaction import compact_inputs, estimate_tokens
 
-openai.api_key = os.getenv("OPENAI_API_KEY", "")
+logger = logging.getLogger(__name__)
 
-def generate_resume_bullets(job_text: str, resume_text: str) -> str:
-    prompt = f"""
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+MODEL = "gpt-4o-mini"  # swap if needed
+
+# One client of each kind per process. Each wraps a keep-alive HTTP
+# connection pool, so consecutive generations skip TCP/TLS setup.
+_client: Optional[openai.OpenAI] = None
+_async_client: Optional[openai.AsyncOpenAI] = None
+
+# Per-process prompt size accounting (token estimates, see compaction.py)
+_usage_lock = threading.Lock()
+_usage = {"calls": 0, "prompt_tokens": 0, "input_tokens": 0, "compacted_tokens": 0}
+
+def _record_prompt(prompt: str):
+    tokens = estimate_tokens(prompt)
+    with _usage_lock:
+        _usage["calls"] += 1
+        _usage["prompt_tokens"] += tokens
+    logger.info(f"LLM request: ~{tokens} prompt tokens")
+
+def _compact(job_text: str, resume_text: str) -> Tuple[str, str]:
+    """Fit the posting and resume into the prompt token budget"""
+    # The saved profile's resume arrives pre-split and pre-counted
+    artifacts = profile_cache.cached_artifacts(resume_text)
+    if artifacts is not None:
+        job_text, resume_text, stats = compact_inputs(
+            job_text, resume_text, resume_sections=artifacts.sections,
+            resume_section_terms=artifacts.section_terms, resume_tokens=artifacts.token_count
+        )
+    else:
+        job_text, resume_text, stats = compact_inputs(job_text, resume_text)
+    with _usage_lock:
+        _usage["input_tokens"] += stats["input_tokens"]
+        _usage["compacted_tokens"] += stats["compacted_tokens"]
+    return job_text, resume_text
+
+# In-flight compactions, so the prompts of one request (bullets and answer
+# for the same posting and resume) share a single computation
+_compactions: Dict[Tuple[str, str], asyncio.Future] = {}
+
+async def _acompact(job_text: str, resume_text: str) -> Tuple[str, str]:
+    """_compact in a worker thread: splitting, BM25 ranking and token counting
+    are CPU work that would otherwise stall the event loop"""
+    key = (job_text, resume_text)
+    future = _compactions.get(key)
+    if future is None:
+        future = asyncio.ensure_future(asyncio.to_thread(_compact, job_text, resume_text))
+        _compactions[key] = future
+        future.add_done_callback(lambda _: _compactions.pop(key, None))
+    # One caller being cancelled must not cancel the computation for the others
+    return await asyncio.shield(future)
+
+def get_usage_stats() -> Dict:
+    """Prompt token estimates for this process, and how much compaction removed"""
+    with _usage_lock:
+        stats = dict(_usage)
+    stats["tokens_saved"] = stats["input_tokens"] - stats["compacted_tokens"]
+    stats["avg_prompt_tokens"] = round(stats["prompt_tokens"] / stats["calls"], 1) if stats["calls"] else 0.0
+    return stats
+
+def _get_client() -> openai.OpenAI:
+    global _client
+    if _client is None:
+        _client = openai.OpenAI(api_key=OPENAI_API_KEY, timeout=LLM_TIMEOUT)
+    return _client
+
+def _get_async_client() -> openai.AsyncOpenAI:
+    global _async_client
+    if _async_client is None:
+        _async_client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY, timeout=LLM_TIMEOUT)
+    return _async_client
+
+async def close_async_client():
+    """Close the shared async client (called on app shutdown)"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+def _complete(prompt: str, max_tokens: int, temperature: float, use_cache: bool = True, json_mode: bool = False) -> str:
+    """Run a single-message chat completion, served from the response cache when possible.
+    With use_cache=False the cache is not read, but the fresh response still replaces the entry."""
+    _record_prompt(prompt)
+    key = llm_cache.cache_key(MODEL, prompt, temperature, max_tokens)
+    if use_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached
+
+    started = time.perf_counter()
+    resp = _get_client().chat.completions.create(**_request(prompt, max_tokens, temperature, json_mode))
+    text = resp.choices[0].message.content
+    llm_cache.put(key, MODEL, text, (time.perf_counter() - started) * 1000)
+    return text
+
+async def _acomplete(prompt: str, max_tokens: int, temperature: float, use_cache: bool = True, json_mode: bool = False) -> str:
+    """Async counterpart of _complete; cache reads and writes run in a worker thread"""
+    _record_prompt(prompt)
+    key = llm_cache.cache_key(MODEL, prompt, temperature, max_tokens)
+    if use_cache:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            return cached
+
+    started = time.perf_counter()
+    resp = await _get_async_client().chat.completions.create(**_request(prompt, max_tokens, temperature, json_mode))
+    text = resp.choices[0].message.content
+    await asyncio.to_thread(llm_cache.put, key, MODEL, text, (time.perf_counter() - started) * 1000)
+    return text
+
+async def _astream(prompt: str, max_tokens: int, temperature: float, use_cache: bool = True) -> AsyncIterator[str]:
+    """Stream a chat completion as text deltas. A cached response is yielded as
+    a single chunk; a completed stream is added to the cache."""
+    _record_prompt(prompt)
+    key = llm_cache.cache_key(MODEL, prompt, temperature, max_tokens)
+    if use_cache:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            yield cached
+            return
+
+    started = time.perf_counter()
+    parts = []
+    stream = await _get_async_client().chat.completions.create(
+        **_request(prompt, max_tokens, temperature, json_mode=False), stream=True
+    )
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            yield delta
+    await asyncio.to_thread(llm_cache.put, key, MODEL, "".join(parts), (time.perf_counter() - started) * 1000)
+
+def _request(prompt: str, max_tokens: int, temperature: float, json_mode: bool) -> Dict:
+    request = {
+        "model": MODEL,
+        "messages": [{"role":"user","content":prompt}],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+    if json_mode:
+        request["response_format"] = {"type": "json_object"}
+    return request
+
+def parse_bullets(text: str) -> List[str]:
+    """Turn the model's bullet output (a JSON list, possibly fenced, or plain lines) into a list"""
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    try:
+        data = json.loads(cleaned)
+        if isinstance(data, list):
+            return [str(item).strip() for item in data if str(item).strip()]
+    except ValueError:
+        pass
+    lines = (re.sub(r"^\s*(?:[-*\u2022]|\d+[.)])\s*", "", line).strip() for line in cleaned.splitlines())
+    return [line for line in lines if line]
+
+# The prompt builders take the posting and resume already compacted
+def _bullets_prompt(job_text: str, resume_text: str) -> str:
+    return f"""
 You are ApplyPilot, an assistant that rewrites and tailors resume bullets for maximum relevance to a job.
 Job posting:
 {job_text}
@@ -16,17 +184,9 @@ Candidate resume (bullets and experience):
 
 Produce 5-8 improved resume bullets that are concise, metric-driven if possible, and tailored to the job posting. Return them as a JSON list.
 """
-    resp = openai.ChatCompletion.create(
-        model="gpt-4o-mini",  # swap if needed
-        messages=[{"role":"user","content":prompt}],
-        max_tokens=400,
-        temperature=0.2
-    )
-    text = resp.choices[0].message.content
-    return text
 
-def generate_short_answer(job_text: str, question: str, resume_text: str) -> str:
-    prompt = f"""
+def _answer_prompt(job_text: str, question: str, resume_text: str) -> str:
+    return f"""
 Job posting:
 {job_text}
 
@@ -37,16 +197,9 @@ Question: {question}
 
 Write a 120-200 word tailored answer demonstrating fit, highlight relevant experiences, and end with one sentence describing why you'd be excited to join.
 """
-    resp = openai.ChatCompletion.create(
-        model="gpt-4o-mini",
-        messages=[{"role":"user","content":prompt}],
-        max_tokens=400,
-        temperature=0.25
-    )
-    return resp.choices[0].message.content
 
-def generate_cover_letter(job_text: str, resume_text: str, company_name: str = "", position_title: str = "") -> str:
-    prompt = f"""
+def _cover_letter_prompt(job_text: str, resume_text: str, company_name: str, position_title: str) -> str:
+    return f"""
 Job posting:
 {job_text}
 
@@ -62,10 +215,72 @@ Write a professional cover letter (3-4 paragraphs, ~300 words) that:
 - Shows understanding of the company/role
 - Closes with a strong call to action
 """
-    resp = openai.ChatCompletion.create(
-        model="gpt-4o-mini",
-        messages=[{"role":"user","content":prompt}],
-        max_tokens=500,
-        temperature=0.3
-    )
-    return resp.choices[0].message.content
+
+def _tailored_prompt(job_text: str, question: str, resume_text: str) -> str:
+    return f"""
+You are ApplyPilot, an assistant that tailors job applications.
+Job posting:
+{job_text}
+
+Candidate resume (bullets and experience):
+{resume_text}
+
+Return a JSON object with two keys:
+- "bullets": a list of 5-8 improved resume bullets that are concise, metric-driven if possible, and tailored to the job posting
+- "answer": a 120-200 word tailored answer to the question "{question}" demonstrating fit, highlighting relevant experiences, and ending with one sentence describing why you'd be excited to join
+"""
+
+def generate_resume_bullets(job_text: str, resume_text: str, use_cache: bool = True) -> str:
+    prompt = _bullets_prompt(*_compact(job_text, resume_text))
+    return _complete(prompt, max_tokens=400, temperature=0.2, use_cache=use_cache)
+
+def generate_short_answer(job_text: str, question: str, resume_text: str, use_cache: bool = True) -> str:
+    job_text, resume_text = _compact(job_text, resume_text)
+    prompt = _answer_prompt(job_text, question, resume_text)
+    return _complete(prompt, max_tokens=400, temperature=0.25, use_cache=use_cache)
+
+def generate_cover_letter(job_text: str, resume_text: str, company_name: str = "", position_title: str = "", use_cache: bool = True) -> str:
+    job_text, resume_text = _compact(job_text, resume_text)
+    prompt = _cover_letter_prompt(job_text, resume_text, company_name, position_title)
+    return _complete(prompt, max_tokens=500, temperature=0.3, use_cache=use_cache)
+
+async def agenerate_resume_bullets(job_text: str, resume_text: str, use_cache: bool = True) -> str:
+    prompt = _bullets_prompt(*await _acompact(job_text, resume_text))
+    return await _acomplete(prompt, max_tokens=400, temperature=0.2, use_cache=use_cache)
+
+async def agenerate_short_answer(job_text: str, question: str, resume_text: str, use_cache: bool = True) -> str:
+    job_text, resume_text = await _acompact(job_text, resume_text)
+    prompt = _answer_prompt(job_text, question, resume_text)
+    return await _acomplete(prompt, max_tokens=400, temperature=0.25, use_cache=use_cache)
+
+async def agenerate_cover_letter(job_text: str, resume_text: str, company_name: str = "", position_title: str = "", use_cache: bool = True) -> str:
+    job_text, resume_text = await _acompact(job_text, resume_text)
+    prompt = _cover_letter_prompt(job_text, resume_text, company_name, position_title)
+    return await _acomplete(prompt, max_tokens=500, temperature=0.3, use_cache=use_cache)
+
+async def agenerate_tailored_content(job_text: str, resume_text: str, question: str = "Why are you a good fit?",
+                                     use_cache: bool = True) -> Dict:
+    """Generate resume bullets and a short answer with one structured (JSON mode) call"""
+    job_text, resume_text = await _acompact(job_text, resume_text)
+    prompt = _tailored_prompt(job_text, question, resume_text)
+    text = await _acomplete(prompt, max_tokens=800, temperature=0.2, use_cache=use_cache, json_mode=True)
+    try:
+        data = json.loads(text)
+    except ValueError:
+        raise ValueError("Model returned malformed JSON for tailored content")
+    bullets = data.get("bullets", [])
+    if isinstance(bullets, str):
+        bullets = parse_bullets(bullets)
+    return {"bullets": [str(b).strip() for b in bullets if str(b).strip()], "answer": str(data.get("answer", "")).strip()}
+
+async def astream_short_answer(job_text: str, question: str, resume_text: str, use_cache: bool = True) -> AsyncIterator[str]:
+    job_text, resume_text = await _acompact(job_text, resume_text)
+    prompt = _answer_prompt(job_text, question, resume_text)
+    async for chunk in _astream(prompt, max_tokens=400, temperature=0.25, use_cache=use_cache):
+        yield chunk
+
+async def astream_cover_letter(job_text: str, resume_text: str, company_name: str = "", position_title: str = "", use_cache: bool = True) -> AsyncIterator[str]:
+    job_text, resume_text = await _acompact(job_text, resume_text)
+    prompt = _cover_letter_prompt(job_text, resume_text, company_name, position_title)
+    async for chunk in _astream(prompt, max_tokens=500, temperature=0.3, use_cache=use_cache):
+        yield chunk
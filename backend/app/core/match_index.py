@@ -0,0 +1,152 @@
+# backend/app/core/match_index.py
+import logging
+import threading
+import numpy as np
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from app.core.database import get_connection
+from app.core.compaction import tokenize
+from app.core.compression import decompress_text
+
+logger = logging.getLogger(__name__)
+
+# Saved postings are scored against the resume locally with BM25, so triage
+# over thousands of applications needs no LLM calls. Term frequencies live in
+# a CSR matrix (one row per application with job text) over a vocabulary that
+# only grows. Applications are append-only, so each ranking call picks up new
+# rows by reading just the ids above the last one indexed; the matrix is
+# rebuilt only if rows disappeared behind its back.
+BM25_K1 = 1.2
+BM25_B = 0.75
+LOAD_BATCH_SIZE = 1000
+
+class _Index(NamedTuple):
+    ids: np.ndarray         # application id per row, ascending
+    doc_len: np.ndarray     # token count per row
+    indptr: np.ndarray      # CSR row offsets into indices/tf
+    indices: np.ndarray     # term id per non-zero (intp: the fastest to gather with)
+    tf: np.ndarray          # term frequency per non-zero
+    df: np.ndarray          # document frequency per term
+    weights: np.ndarray     # BM25 term weight per non-zero, for the current N and average length
+    totals: np.ndarray      # sum of weights per row: a posting's score against itself
+    vocab: Dict[str, int]   # term -> id; only grows, shared by later snapshots
+    max_id: int             # highest application id seen, with or without job text
+    seen: int               # applications seen, with or without job text
+
+def _empty() -> _Index:
+    return _Index(
+        ids=np.zeros(0, np.int64), doc_len=np.zeros(0, np.float32), indptr=np.zeros(1, np.int64),
+        indices=np.zeros(0, np.intp), tf=np.zeros(0, np.float32),
+        df=np.zeros(0, np.int64), weights=np.zeros(0, np.float32), totals=np.zeros(0, np.float64),
+        vocab={}, max_id=0, seen=0,
+    )
+
+_lock = threading.Lock()
+_index = _empty()
+
+def _append(index: _Index, docs: List[Tuple[int, str]], max_id: int, seen: int) -> _Index:
+    """A new index with docs (id, job_text) added as rows"""
+    vocab = index.vocab
+    ids, lengths, row_lengths, indices, tf = [], [], [], [], []
+    for app_id, text in docs:
+        counts = Counter(tokenize(decompress_text(text) or ""))
+        if not counts:
+            continue
+        ids.append(app_id)
+        lengths.append(sum(counts.values()))
+        row_lengths.append(len(counts))
+        for term, count in counts.items():
+            indices.append(vocab.setdefault(term, len(vocab)))
+            tf.append(count)
+    new_indices = np.asarray(indices, np.intp)
+    df = np.zeros(len(vocab), np.int64)
+    df[:len(index.df)] = index.df
+    df += np.bincount(new_indices, minlength=len(vocab))
+    return _Index(
+        ids=np.concatenate([index.ids, np.asarray(ids, np.int64)]),
+        doc_len=np.concatenate([index.doc_len, np.asarray(lengths, np.float32)]),
+        indptr=np.concatenate([index.indptr, index.indptr[-1] + np.cumsum(row_lengths, dtype=np.int64)]),
+        indices=np.concatenate([index.indices, new_indices]),
+        tf=np.concatenate([index.tf, np.asarray(tf, np.float32)]),
+        df=df, weights=index.weights, totals=index.totals, vocab=vocab, max_id=max_id, seen=seen,
+    )
+
+def _weigh(index: _Index) -> _Index:
+    """Recompute the BM25 weights; idf and length normalization shift as rows are added"""
+    n = len(index.ids)
+    idf = np.log1p((n - index.df + 0.5) / (index.df + 0.5)).astype(np.float32)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * index.doc_len / max(float(index.doc_len.mean()), 1.0))
+    weights = idf[index.indices] * index.tf * (BM25_K1 + 1) / (index.tf + np.repeat(norm, np.diff(index.indptr)))
+    return index._replace(weights=weights.astype(np.float32), totals=_row_sums(index, weights))
+
+def _row_sums(index: _Index, values: np.ndarray) -> np.ndarray:
+    # Every row has at least one non-zero, so reduceat over the row offsets is exact
+    return np.add.reduceat(values, index.indptr[:-1]) if len(index.ids) else np.zeros(0, np.float32)
+
+def refresh() -> _Index:
+    """Bring the index up to date with the applications table"""
+    global _index
+    conn = get_connection()
+    # The stats counters make the common "nothing changed" check O(1)
+    max_id, total = conn.execute("""
+        SELECT (SELECT COALESCE(MAX(id), 0) FROM applications),
+               (SELECT COALESCE(SUM(count), 0) FROM application_status_counts)
+    """).fetchone()
+    index = _index
+    if index.max_id == max_id and index.seen == total:
+        return index
+    with _lock:
+        index = _index
+        indexed = conn.execute("SELECT COUNT(*) FROM applications WHERE id <= ?", (index.max_id,)).fetchone()[0]
+        if max_id < index.max_id or indexed != index.seen:
+            # Rows were removed (or the database replaced): start over
+            logger.info("Rebuilding match index")
+            index = _empty()
+        added = 0
+        while True:
+            batch = conn.execute(
+                """
+                SELECT a.id, b.data FROM applications a LEFT JOIN blobs b ON b.hash = a.job_text_hash
+                WHERE a.id > ? ORDER BY a.id LIMIT ?
+                """,
+                (index.max_id, LOAD_BATCH_SIZE)
+            ).fetchall()
+            if not batch:
+                break
+            added += len(batch)
+            index = _append(index, batch, batch[-1][0], index.seen + len(batch))
+        if added:
+            index = _weigh(index)
+            logger.info(f"Indexed {added} application(s) for matching ({len(index.ids)} with job text, {len(index.vocab)} terms)")
+        _index = index
+        return index
+
+def rank(terms: Iterable[str], limit: int = 20, app_ids: Optional[Iterable[int]] = None) -> List[Dict]:
+    """
+    Score every indexed application against the resume terms in one pass and
+    return the best `limit` as {id, score, coverage}. score is BM25 with each
+    resume term counted once; coverage is the share of the posting's own BM25
+    weight the resume matches, so long postings don't win on length alone.
+    app_ids restricts the ranking to those applications.
+    """
+    index = refresh()
+    # Terms added to the vocabulary after this snapshot was taken are unknown to it
+    term_ids = [i for i in (index.vocab.get(t) for t in terms) if i is not None and i < len(index.df)]
+    if not term_ids or not len(index.ids):
+        return []
+    # One sparse matrix-vector product: weights x (1 for each resume term)
+    query = np.zeros(len(index.df), np.float32)
+    query[term_ids] = 1
+    contributions = np.take(query, index.indices)
+    np.multiply(contributions, index.weights, out=contributions)
+    scores = _row_sums(index, contributions)
+    if app_ids is not None:
+        scores[~np.isin(index.ids, np.fromiter(app_ids, np.int64))] = 0
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+    candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return [
+        {"id": int(index.ids[row]), "score": float(scores[row]), "coverage": float(scores[row] / index.totals[row])}
+        for row in candidates
+    ]
@@ -0,0 +1,577 @@
+# backend/app/core/migrations.py
+import os
+import sqlite3
+import logging
+from typing import Callable, List, Tuple, Union
+from app.core import dedup, compression, blob_store
+
+logger = logging.getLogger(__name__)
+
+# Each migration is (version, steps). A step is either a SQL statement or a
+# callable taking the connection, for data migrations that need Python.
+# Versions must be strictly increasing; never edit a migration once released,
+# add a new one instead. The applied version is stored in PRAGMA user_version.
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+def _bucket_existing_applications(conn: sqlite3.Connection):
+    """LSH-bucket existing applications oldest first, flagging later near-duplicates"""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, job_text FROM applications WHERE id > ? ORDER BY id LIMIT 500", (last_id,)
+        ).fetchall()
+        if not rows:
+            break
+        for app_id, job_text in rows:
+            fp = dedup.fingerprint(job_text)
+            # job_text is still inline in applications at this version
+            (duplicate,) = dedup.find_duplicates(conn, [fp], text_sql="a.id, a.job_text")
+            dedup.record(conn, app_id, fp, duplicate)
+        last_id = rows[-1][0]
+
+# Where job_text and generated content were stored before the blob store
+_INLINE_TEXT = (("applications", "job_text"), ("generated_content", "content"))
+# The codec migration 9 was released with: zstd whenever zstandard was
+# importable. Migration 12 moves what it wrote to today's default.
+_MIGRATION_9_CODEC = os.getenv("APPLYPILOT_COMPRESSION", "zstd" if compression.zstandard else "zlib")
+
+def _compress_existing_text(conn: sqlite3.Connection):
+    """Compress job_text and generated content written before compression,
+    training a zstd dictionary first when there is enough to train on"""
+    compression.train_dictionary(conn, _INLINE_TEXT, codec=_MIGRATION_9_CODEC)
+    changed = compression.recompress_all(conn, _INLINE_TEXT, codec=_MIGRATION_9_CODEC)
+    logger.info(f"Compressed {changed} stored text value(s)")
+
+def _recompress_zstd_blobs(conn: sqlite3.Connection):
+    """Rewrite blobs compressed with zstd, the default before zlib, with the
+    current codec, so reading the database no longer needs zstandard. Left
+    alone when zstd has been opted into."""
+    if compression.COMPRESSION == "zstd":
+        return
+    changed = compression.recompress_all(conn, only=compression.ZSTD_CODECS)
+    logger.info(f"Recompressed {changed} zstd value(s) with {compression.COMPRESSION}")
+
+def _move_text_to_blobs(conn: sqlite3.Connection):
+    """Move job_text and generated content into the blob store, one blob per
+    distinct text. Stored values are moved as they are, compressed or not."""
+    refcounts = {}
+    for table, column, hash_column in (("applications", "job_text", "job_text_hash"),
+                                       ("generated_content", "content", "content_hash")):
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                f"SELECT id, {column} FROM {table} WHERE id > ? AND {column} IS NOT NULL ORDER BY id LIMIT 500",
+                (last_id,)
+            ).fetchall()
+            if not rows:
+                break
+            updates = []
+            for row_id, value in rows:
+                h = blob_store.text_hash(compression.decompress_text(value))
+                if h not in refcounts:
+                    refcounts[h] = 0
+                    conn.execute("INSERT INTO blobs (hash, data) VALUES (?, ?)", (h, value))
+                refcounts[h] += 1
+                updates.append((h, row_id))
+            conn.executemany(f"UPDATE {table} SET {hash_column} = ? WHERE id = ?", updates)
+            last_id = rows[-1][0]
+    conn.executemany("UPDATE blobs SET refcount = ? WHERE hash = ?", [(n, h) for h, n in refcounts.items()])
+    logger.info(f"Moved text into {len(refcounts)} blob(s)")
+
+MIGRATIONS: List[Tuple[int, List[Step]]] = [
+    (1, [
+        # Baseline schema. IF NOT EXISTS keeps this safe for databases created
+        # before migrations were tracked.
+        """
+        CREATE TABLE IF NOT EXISTS user_profile (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            email TEXT,
+            phone TEXT,
+            resume_text TEXT,
+            preferences TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS applications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company TEXT NOT NULL,
+            position TEXT NOT NULL,
+            job_url TEXT,
+            job_text TEXT,
+            status TEXT DEFAULT 'applied',
+            applied_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            notes TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS generated_content (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            application_id INTEGER,
+            content_type TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (application_id) REFERENCES applications (id)
+        )
+        """,
+    ]),
+    (2, [
+        # Status-filtered listings: WHERE status = ? ORDER BY applied_date, id
+        "CREATE INDEX IF NOT EXISTS idx_applications_status_date ON applications (status, applied_date)",
+        # Unfiltered listings and the 30-day window in get_application_stats
+        "CREATE INDEX IF NOT EXISTS idx_applications_applied_date ON applications (applied_date)",
+        # get_application() loads generated content by application
+        "CREATE INDEX IF NOT EXISTS idx_generated_content_application ON generated_content (application_id)",
+    ]),
+    (3, [
+        # Fetched job pages, keyed by normalized URL (see app/core/scrape_cache.py)
+        """
+        CREATE TABLE IF NOT EXISTS scrape_cache (
+            url TEXT PRIMARY KEY,
+            body TEXT NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            result TEXT NOT NULL,
+            parser_version INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            fetched_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_scrape_cache_last_access ON scrape_cache (last_access)",
+        "CREATE INDEX IF NOT EXISTS idx_scrape_cache_fetched_at ON scrape_cache (fetched_at)",
+    ]),
+    (4, [
+        # LLM responses keyed by a hash of the full request (see app/core/llm_cache.py)
+        """
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            latency_ms REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)",
+    ]),
+    (5, [
+        # Full-text search (see search_applications in app/core/database.py).
+        # External-content tables index the rows without storing a second
+        # copy of the text; the triggers keep them in sync.
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS applications_fts USING fts5(
+            company, position, job_text, notes,
+            content='applications', content_rowid='id',
+            tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS generated_content_fts USING fts5(
+            content,
+            content='generated_content', content_rowid='id',
+            tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_fts_insert AFTER INSERT ON applications BEGIN
+            INSERT INTO applications_fts (rowid, company, position, job_text, notes)
+            VALUES (new.id, new.company, new.position, new.job_text, new.notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_fts_delete AFTER DELETE ON applications BEGIN
+            INSERT INTO applications_fts (applications_fts, rowid, company, position, job_text, notes)
+            VALUES ('delete', old.id, old.company, old.position, old.job_text, old.notes);
+        END
+        """,
+        # Updates that only change status skip the index
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_fts_update AFTER UPDATE OF company, position, job_text, notes ON applications BEGIN
+            INSERT INTO applications_fts (applications_fts, rowid, company, position, job_text, notes)
+            VALUES ('delete', old.id, old.company, old.position, old.job_text, old.notes);
+            INSERT INTO applications_fts (rowid, company, position, job_text, notes)
+            VALUES (new.id, new.company, new.position, new.job_text, new.notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS generated_content_fts_insert AFTER INSERT ON generated_content BEGIN
+            INSERT INTO generated_content_fts (rowid, content) VALUES (new.id, new.content);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS generated_content_fts_delete AFTER DELETE ON generated_content BEGIN
+            INSERT INTO generated_content_fts (generated_content_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS generated_content_fts_update AFTER UPDATE OF content ON generated_content BEGIN
+            INSERT INTO generated_content_fts (generated_content_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            INSERT INTO generated_content_fts (rowid, content) VALUES (new.id, new.content);
+        END
+        """,
+        # Index rows that existed before this migration
+        "INSERT INTO applications_fts (applications_fts) VALUES ('rebuild')",
+        "INSERT INTO generated_content_fts (generated_content_fts) VALUES ('rebuild')",
+    ]),
+    (6, [
+        # Counters behind get_application_stats, maintained by triggers so the
+        # stats never scan applications. A NULL status is counted under ''.
+        """
+        CREATE TABLE IF NOT EXISTS application_status_counts (
+            status TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS application_daily_counts (
+            day TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_stats_insert AFTER INSERT ON applications BEGIN
+            INSERT INTO application_status_counts (status, count) VALUES (COALESCE(new.status, ''), 1)
+                ON CONFLICT (status) DO UPDATE SET count = count + 1;
+            INSERT INTO application_daily_counts (day, count) VALUES (date(new.applied_date), 1)
+                ON CONFLICT (day) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_stats_delete AFTER DELETE ON applications BEGIN
+            UPDATE application_status_counts SET count = count - 1 WHERE status = COALESCE(old.status, '');
+            UPDATE application_daily_counts SET count = count - 1 WHERE day = date(old.applied_date);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_stats_status AFTER UPDATE OF status ON applications
+        WHEN old.status IS NOT new.status BEGIN
+            UPDATE application_status_counts SET count = count - 1 WHERE status = COALESCE(old.status, '');
+            INSERT INTO application_status_counts (status, count) VALUES (COALESCE(new.status, ''), 1)
+                ON CONFLICT (status) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_stats_day AFTER UPDATE OF applied_date ON applications
+        WHEN date(old.applied_date) IS NOT date(new.applied_date) BEGIN
+            UPDATE application_daily_counts SET count = count - 1 WHERE day = date(old.applied_date);
+            INSERT INTO application_daily_counts (day, count) VALUES (date(new.applied_date), 1)
+                ON CONFLICT (day) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        INSERT INTO application_status_counts (status, count)
+        SELECT COALESCE(status, ''), COUNT(*) FROM applications GROUP BY 1
+        """,
+        """
+        INSERT INTO application_daily_counts (day, count)
+        SELECT date(applied_date), COUNT(*) FROM applications GROUP BY 1
+        """,
+    ]),
+    (7, [
+        # Background LLM generations (see app/core/job_queue.py)
+        """
+        CREATE TABLE IF NOT EXISTS generation_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            run_after REAL NOT NULL,
+            result TEXT,
+            error TEXT,
+            application_id INTEGER,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            FOREIGN KEY (application_id) REFERENCES applications (id)
+        )
+        """,
+        # Claiming: WHERE status = 'queued' AND run_after <= ? ORDER BY run_after
+        "CREATE INDEX IF NOT EXISTS idx_generation_jobs_claim ON generation_jobs (status, run_after)",
+    ]),
+    (8, [
+        # Near-duplicate postings (see app/core/dedup.py). duplicate_of points
+        # at the earliest posting of the group.
+        "ALTER TABLE applications ADD COLUMN duplicate_of INTEGER REFERENCES applications (id)",
+        "CREATE INDEX IF NOT EXISTS idx_applications_duplicate_of ON applications (duplicate_of) WHERE duplicate_of IS NOT NULL",
+        """
+        CREATE TABLE IF NOT EXISTS application_lsh (
+            bucket INTEGER NOT NULL,
+            application_id INTEGER NOT NULL,
+            PRIMARY KEY (bucket, application_id)
+        ) WITHOUT ROWID
+        """,
+        _bucket_existing_applications,
+    ]),
+    (9, [
+        # Compressed job_text and generated_content.content (see
+        # app/core/compression.py). The full-text index must see plain text,
+        # so its external content moves to views that decompress, and the
+        # triggers decompress what they index.
+        compression.register_functions,
+        """
+        CREATE TABLE IF NOT EXISTS compression_dictionaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data BLOB NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """,
+        "DROP TRIGGER IF EXISTS applications_fts_insert",
+        "DROP TRIGGER IF EXISTS applications_fts_delete",
+        "DROP TRIGGER IF EXISTS applications_fts_update",
+        "DROP TRIGGER IF EXISTS generated_content_fts_insert",
+        "DROP TRIGGER IF EXISTS generated_content_fts_delete",
+        "DROP TRIGGER IF EXISTS generated_content_fts_update",
+        "DROP TABLE IF EXISTS applications_fts",
+        "DROP TABLE IF EXISTS generated_content_fts",
+        # Before the triggers exist, so rewriting rows doesn't churn the index
+        _compress_existing_text,
+        """
+        CREATE VIEW IF NOT EXISTS applications_fts_content AS
+        SELECT id, company, position, decompress_text(job_text) AS job_text, notes FROM applications
+        """,
+        """
+        CREATE VIEW IF NOT EXISTS generated_content_fts_content AS
+        SELECT id, decompress_text(content) AS content FROM generated_content
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS applications_fts USING fts5(
+            company, position, job_text, notes,
+            content='applications_fts_content', content_rowid='id',
+            tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS generated_content_fts USING fts5(
+            content,
+            content='generated_content_fts_content', content_rowid='id',
+            tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_fts_insert AFTER INSERT ON applications BEGIN
+            INSERT INTO applications_fts (rowid, company, position, job_text, notes)
+            VALUES (new.id, new.company, new.position, decompress_text(new.job_text), new.notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_fts_delete AFTER DELETE ON applications BEGIN
+            INSERT INTO applications_fts (applications_fts, rowid, company, position, job_text, notes)
+            VALUES ('delete', old.id, old.company, old.position, decompress_text(old.job_text), old.notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_fts_update AFTER UPDATE OF company, position, job_text, notes ON applications BEGIN
+            INSERT INTO applications_fts (applications_fts, rowid, company, position, job_text, notes)
+            VALUES ('delete', old.id, old.company, old.position, decompress_text(old.job_text), old.notes);
+            INSERT INTO applications_fts (rowid, company, position, job_text, notes)
+            VALUES (new.id, new.company, new.position, decompress_text(new.job_text), new.notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS generated_content_fts_insert AFTER INSERT ON generated_content BEGIN
+            INSERT INTO generated_content_fts (rowid, content) VALUES (new.id, decompress_text(new.content));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS generated_content_fts_delete AFTER DELETE ON generated_content BEGIN
+            INSERT INTO generated_content_fts (generated_content_fts, rowid, content)
+            VALUES ('delete', old.id, decompress_text(old.content));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS generated_content_fts_update AFTER UPDATE OF content ON generated_content BEGIN
+            INSERT INTO generated_content_fts (generated_content_fts, rowid, content)
+            VALUES ('delete', old.id, decompress_text(old.content));
+            INSERT INTO generated_content_fts (rowid, content) VALUES (new.id, decompress_text(new.content));
+        END
+        """,
+        "INSERT INTO applications_fts (applications_fts) VALUES ('rebuild')",
+        "INSERT INTO generated_content_fts (generated_content_fts) VALUES ('rebuild')",
+    ]),
+    (10, [
+        # Content-addressed blob store for job_text and generated content (see
+        # app/core/blob_store.py). The full-text index keeps its contents: the
+        # views it reads are recreated over the blobs with the same columns.
+        compression.register_functions,
+        """
+        CREATE TABLE IF NOT EXISTS blobs (
+            hash BLOB PRIMARY KEY,
+            data BLOB NOT NULL,
+            refcount INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "DROP TRIGGER IF EXISTS applications_fts_insert",
+        "DROP TRIGGER IF EXISTS applications_fts_delete",
+        "DROP TRIGGER IF EXISTS applications_fts_update",
+        "DROP TRIGGER IF EXISTS generated_content_fts_insert",
+        "DROP TRIGGER IF EXISTS generated_content_fts_delete",
+        "DROP TRIGGER IF EXISTS generated_content_fts_update",
+        "DROP VIEW IF EXISTS applications_fts_content",
+        "DROP VIEW IF EXISTS generated_content_fts_content",
+        "ALTER TABLE applications ADD COLUMN job_text_hash BLOB REFERENCES blobs (hash)",
+        "ALTER TABLE generated_content ADD COLUMN content_hash BLOB REFERENCES blobs (hash)",
+        _move_text_to_blobs,
+        "ALTER TABLE applications DROP COLUMN job_text",
+        "ALTER TABLE generated_content DROP COLUMN content",
+        """
+        CREATE VIEW IF NOT EXISTS applications_fts_content AS
+        SELECT a.id, a.company, a.position, decompress_text(b.data) AS job_text, a.notes
+        FROM applications a LEFT JOIN blobs b ON b.hash = a.job_text_hash
+        """,
+        """
+        CREATE VIEW IF NOT EXISTS generated_content_fts_content AS
+        SELECT g.id, decompress_text(b.data) AS content
+        FROM generated_content g JOIN blobs b ON b.hash = g.content_hash
+        """,
+        # Index removals run BEFORE the row goes, and so before the reference
+        # triggers below can collect the blob holding the text to remove
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_fts_insert AFTER INSERT ON applications BEGIN
+            INSERT INTO applications_fts (rowid, company, position, job_text, notes)
+            VALUES (new.id, new.company, new.position,
+                    (SELECT decompress_text(data) FROM blobs WHERE hash = new.job_text_hash), new.notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_fts_delete BEFORE DELETE ON applications BEGIN
+            INSERT INTO applications_fts (applications_fts, rowid, company, position, job_text, notes)
+            VALUES ('delete', old.id, old.company, old.position,
+                    (SELECT decompress_text(data) FROM blobs WHERE hash = old.job_text_hash), old.notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_fts_update_old BEFORE UPDATE OF company, position, job_text_hash, notes ON applications BEGIN
+            INSERT INTO applications_fts (applications_fts, rowid, company, position, job_text, notes)
+            VALUES ('delete', old.id, old.company, old.position,
+                    (SELECT decompress_text(data) FROM blobs WHERE hash = old.job_text_hash), old.notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_fts_update_new AFTER UPDATE OF company, position, job_text_hash, notes ON applications BEGIN
+            INSERT INTO applications_fts (rowid, company, position, job_text, notes)
+            VALUES (new.id, new.company, new.position,
+                    (SELECT decompress_text(data) FROM blobs WHERE hash = new.job_text_hash), new.notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS generated_content_fts_insert AFTER INSERT ON generated_content BEGIN
+            INSERT INTO generated_content_fts (rowid, content)
+            VALUES (new.id, (SELECT decompress_text(data) FROM blobs WHERE hash = new.content_hash));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS generated_content_fts_delete BEFORE DELETE ON generated_content BEGIN
+            INSERT INTO generated_content_fts (generated_content_fts, rowid, content)
+            VALUES ('delete', old.id, (SELECT decompress_text(data) FROM blobs WHERE hash = old.content_hash));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS generated_content_fts_update_old BEFORE UPDATE OF content_hash ON generated_content BEGIN
+            INSERT INTO generated_content_fts (generated_content_fts, rowid, content)
+            VALUES ('delete', old.id, (SELECT decompress_text(data) FROM blobs WHERE hash = old.content_hash));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS generated_content_fts_update_new AFTER UPDATE OF content_hash ON generated_content BEGIN
+            INSERT INTO generated_content_fts (rowid, content)
+            VALUES (new.id, (SELECT decompress_text(data) FROM blobs WHERE hash = new.content_hash));
+        END
+        """,
+        # Reference counts. A blob is deleted as soon as its last reference goes.
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_blob_insert AFTER INSERT ON applications
+        WHEN new.job_text_hash IS NOT NULL BEGIN
+            UPDATE blobs SET refcount = refcount + 1 WHERE hash = new.job_text_hash;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_blob_delete AFTER DELETE ON applications
+        WHEN old.job_text_hash IS NOT NULL BEGIN
+            UPDATE blobs SET refcount = refcount - 1 WHERE hash = old.job_text_hash;
+            DELETE FROM blobs WHERE hash = old.job_text_hash AND refcount <= 0;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS applications_blob_update AFTER UPDATE OF job_text_hash ON applications
+        WHEN old.job_text_hash IS NOT new.job_text_hash BEGIN
+            UPDATE blobs SET refcount = refcount + 1 WHERE hash = new.job_text_hash;
+            UPDATE blobs SET refcount = refcount - 1 WHERE hash = old.job_text_hash;
+            DELETE FROM blobs WHERE hash = old.job_text_hash AND refcount <= 0;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS generated_content_blob_insert AFTER INSERT ON generated_content BEGIN
+            UPDATE blobs SET refcount = refcount + 1 WHERE hash = new.content_hash;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS generated_content_blob_delete AFTER DELETE ON generated_content BEGIN
+            UPDATE blobs SET refcount = refcount - 1 WHERE hash = old.content_hash;
+            DELETE FROM blobs WHERE hash = old.content_hash AND refcount <= 0;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS generated_content_blob_update AFTER UPDATE OF content_hash ON generated_content
+        WHEN old.content_hash IS NOT new.content_hash BEGIN
+            UPDATE blobs SET refcount = refcount + 1 WHERE hash = new.content_hash;
+            UPDATE blobs SET refcount = refcount - 1 WHERE hash = old.content_hash;
+            DELETE FROM blobs WHERE hash = old.content_hash AND refcount <= 0;
+        END
+        """,
+    ]),
+    (11, [
+        # Bumped by every profile save, so each process can tell with one
+        # primary-key read whether its cached profile is current (see
+        # app/core/profile_cache.py)
+        "ALTER TABLE user_profile ADD COLUMN version INTEGER NOT NULL DEFAULT 0",
+    ]),
+    (12, [
+        # zlib became the default codec; zstd is opt-in. Values are the same
+        # text either way, so the full-text index is unaffected.
+        compression.register_functions,
+        _recompress_zstd_blobs,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the schema version recorded in the database file"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def run_migrations(conn: sqlite3.Connection) -> int:
+    """Apply all pending migrations and return the resulting schema version.
+
+    Each migration runs in its own BEGIN IMMEDIATE transaction and re-checks
+    the version once the write lock is held, so several workers starting at
+    once apply every migration exactly once.
+    """
+    version = get_schema_version(conn)
+    for target, steps in MIGRATIONS:
+        if target <= version:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= target:
+                conn.execute("ROLLBACK")
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            # PRAGMA arguments cannot be bound parameters
+            conn.execute(f"PRAGMA user_version = {int(target)}")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        logger.info(f"Applied schema migration {target}")
+    return get_schema_version(conn)
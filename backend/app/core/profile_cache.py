@@ -0,0 +1,91 @@
+# backend/app/core/profile_cache.py
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, FrozenSet, List, NamedTuple, Optional
+from app.core.database import get_user_profile, get_profile_version
+from app.core.compaction import split_sections, tokenize, estimate_tokens
+
+# The saved profile is read on every generation that doesn't send its own
+# resume, so it is kept in memory along with the derived pieces compaction
+# needs. Every access checks the profile's version in the database (one
+# primary-key read), so a save made by any worker process is seen at once.
+
+class ResumeArtifacts(NamedTuple):
+    text: str  # The resume as saved; the rest derive from its normalized form
+    sections: List[str]
+    section_terms: List[Counter]
+    keywords: FrozenSet[str]
+    token_count: int
+
+class _Entry(NamedTuple):
+    profile: Optional[Dict]
+    resume: Optional[ResumeArtifacts]
+    version: Optional[tuple]  # get_profile_version() when loaded
+
+_lock = threading.Lock()
+_entry: Optional[_Entry] = None
+
+def normalize_resume_text(text: str) -> str:
+    """NFKC-normalize, unify line endings, collapse runs of spaces and blank lines"""
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+def build_resume_artifacts(resume_text: str) -> ResumeArtifacts:
+    """Everything derived from a resume that generation needs, computed once"""
+    normalized = normalize_resume_text(resume_text)
+    sections = split_sections(normalized)
+    return ResumeArtifacts(
+        text=resume_text,
+        sections=sections,
+        section_terms=[Counter(tokenize(section)) for section in sections],
+        keywords=frozenset(tokenize(normalized)),
+        token_count=estimate_tokens(resume_text),
+    )
+
+def _load() -> _Entry:
+    global _entry
+    version = get_profile_version()
+    entry = _entry
+    if entry is not None and entry.version == version:
+        return entry
+    with _lock:
+        entry = _entry
+        if entry is not None and entry.version == version:
+            return entry
+        profile = get_user_profile()
+        resume = None
+        if profile and profile.get('resume_text'):
+            resume = build_resume_artifacts(profile['resume_text'])
+        # Versioned by the row just read: a save landing between the two
+        # reads only costs one more reload
+        version = (profile['id'], profile['version']) if profile else None
+        _entry = _Entry(profile, resume, version)
+        return _entry
+
+def get_profile() -> Optional[Dict]:
+    """The saved profile, from memory when possible"""
+    profile = _load().profile
+    return dict(profile) if profile else None
+
+def get_resume_artifacts() -> Optional[ResumeArtifacts]:
+    """Precomputed artifacts for the saved profile's resume, or None without one"""
+    return _load().resume
+
+def cached_artifacts(resume_text: str) -> Optional[ResumeArtifacts]:
+    """The cached artifacts if resume_text is the saved profile's resume,
+    without touching the database"""
+    entry = _entry
+    if entry is None or entry.resume is None:
+        return None
+    if entry.resume.text is resume_text or entry.resume.text == resume_text:
+        return entry.resume
+    return None
+
+def invalidate():
+    """Drop the cached profile so the next read reloads it"""
+    global _entry
+    with _lock:
+        _entry = None
@@ -0,0 +1,162 @@
+# backend/app/core/scrape_cache.py
+import os
+import json
+import time
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from app.core.database import get_connection, transaction
+
+# Entries younger than SCRAPE_CACHE_TTL are served without touching the
+# network. Older ones are revalidated with a conditional GET, and anything
+# older than SCRAPE_CACHE_MAX_AGE (or pushed out by the size cap) is evicted.
+SCRAPE_CACHE_TTL = int(os.getenv("SCRAPE_CACHE_TTL", str(6 * 3600)))
+SCRAPE_CACHE_MAX_AGE = int(os.getenv("SCRAPE_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+SCRAPE_CACHE_MAX_BYTES = int(os.getenv("SCRAPE_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+# A fresh hit only moves the entry's LRU position, so access times are kept
+# in memory and written back at most this often (and before eviction reads
+# them): serving from the cache is a plain read
+SCRAPE_CACHE_HIT_FLUSH_SECONDS = float(os.getenv("SCRAPE_CACHE_HIT_FLUSH_SECONDS", "5"))
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {"gclid", "fbclid", "mc_cid", "mc_eid", "ref", "refid", "trk", "trackingid"}
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "revalidated": 0, "refreshed": 0, "evicted": 0}
+# normalized url -> last access not yet written back
+_pending_access: Dict[str, float] = {}
+_last_flush = time.monotonic()
+
+def _count(name: str, n: int = 1):
+    with _stats_lock:
+        _stats[name] += n
+
+def normalize_url(url: str) -> str:
+    """Canonical cache key: lowercase scheme/host, no fragment, tracking params dropped, query sorted"""
+    parts = urlsplit(url.strip())
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    path = parts.path or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ""))
+
+def lookup(url: str) -> Optional[Dict]:
+    """Return the cached entry for url, or None"""
+    conn = get_connection()
+    row = conn.execute("SELECT * FROM scrape_cache WHERE url = ?", (normalize_url(url),)).fetchone()
+    if not row:
+        return None
+    entry = dict(row)
+    entry['result'] = json.loads(entry['result'])
+    return entry
+
+def is_fresh(entry: Dict) -> bool:
+    """Whether an entry can be served without revalidation"""
+    return time.time() - entry['fetched_at'] < SCRAPE_CACHE_TTL
+
+def conditional_headers(entry: Optional[Dict]) -> Dict[str,str]:
+    """Validators for a conditional GET of a stale entry"""
+    headers = {}
+    if entry:
+        if entry.get('etag'):
+            headers["If-None-Match"] = entry['etag']
+        if entry.get('last_modified'):
+            headers["If-Modified-Since"] = entry['last_modified']
+    return headers
+
+def record_hit(url: str):
+    """Count a fresh hit and bump the entry's LRU position"""
+    key = normalize_url(url)
+    with _stats_lock:
+        _stats["hits"] += 1
+        _pending_access[key] = time.time()
+        due = time.monotonic() - _last_flush >= SCRAPE_CACHE_HIT_FLUSH_SECONDS
+    if due:
+        flush_hits()
+
+def _take_pending_access() -> list:
+    global _last_flush
+    with _stats_lock:
+        rows = [(last_access, key) for key, last_access in _pending_access.items()]
+        _pending_access.clear()
+        _last_flush = time.monotonic()
+    return rows
+
+def _apply_access(conn, rows: list):
+    conn.executemany("UPDATE scrape_cache SET last_access = MAX(last_access, ?) WHERE url = ?", rows)
+
+def flush_hits():
+    """Write the buffered access times back in one transaction"""
+    rows = _take_pending_access()
+    if rows:
+        with transaction() as conn:
+            _apply_access(conn, rows)
+
+def record_miss():
+    _count("misses")
+
+def mark_revalidated(url: str):
+    """The origin answered 304: the cached copy is fresh again"""
+    _count("revalidated")
+    now = time.time()
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE scrape_cache SET fetched_at = ?, last_access = ? WHERE url = ?",
+            (now, now, normalize_url(url))
+        )
+
+def update_result(url: str, result: Dict, parser_version: int):
+    """Replace the parsed result of an entry without refetching it"""
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE scrape_cache SET result = ?, parser_version = ? WHERE url = ?",
+            (json.dumps(result), parser_version, normalize_url(url))
+        )
+
+def store(url: str, body: str, headers, result: Dict, parser_version: int, stale: bool = False):
+    """Cache a freshly fetched page and its parsed result, then enforce the TTL and size limits"""
+    if stale:
+        _count("refreshed")
+    now = time.time()
+    with transaction() as conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO scrape_cache
+                (url, body, etag, last_modified, result, parser_version, size, fetched_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            normalize_url(url), body, headers.get("etag"), headers.get("last-modified"),
+            json.dumps(result), parser_version, len(body.encode("utf-8")), now, now
+        ))
+        # Eviction goes by last_access, so it must see the buffered hits
+        _apply_access(conn, _take_pending_access())
+        _evict(conn, now)
+
+def _evict(conn, now: float):
+    """Drop expired entries, then least recently used ones until under the size cap"""
+    evicted = conn.execute("DELETE FROM scrape_cache WHERE fetched_at < ?", (now - SCRAPE_CACHE_MAX_AGE,)).rowcount
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM scrape_cache").fetchone()[0]
+    if total > SCRAPE_CACHE_MAX_BYTES:
+        rows = conn.execute("SELECT url, size FROM scrape_cache ORDER BY last_access").fetchall()
+        victims = []
+        for row in rows:
+            if total <= SCRAPE_CACHE_MAX_BYTES:
+                break
+            victims.append((row['url'],))
+            total -= row['size']
+        conn.executemany("DELETE FROM scrape_cache WHERE url = ?", victims)
+        evicted += len(victims)
+    if evicted:
+        _count("evicted", evicted)
+
+def get_stats() -> Dict:
+    """Hit/miss counters for this process plus the cache's current size"""
+    conn = get_connection()
+    entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scrape_cache").fetchone()
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["revalidated"] + stats["refreshed"] + stats["misses"]
+    stats["hit_rate"] = round((stats["hits"] + stats["revalidated"]) / lookups, 4) if lookups else 0.0
+    stats["entries"] = entries
+    stats["size_bytes"] = size
+    return stats
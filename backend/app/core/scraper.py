@@ -1,37 +1,272 @@
 # backend/app/core/scraper.py
+import os
+import asyncio
+import logging
 import requests
-from bs4 import BeautifulSoup
-from typing import Dict
+import httpx
+from bs4 import BeautifulSoup, NavigableString, CData, Tag
+from collections import defaultdict
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from app.core import scrape_cache
+from app.core.extractors import extract_structured, extract_open_graph
 
-def scrape_job_text(url: str) -> Dict[str,str]:
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "ApplyPilotBot/1.0"
+REQUEST_TIMEOUT = 15
+
+# Batch scraping limits: total in-flight requests, and in-flight requests to
+# any single host so a large import doesn't hammer one job board
+SCRAPE_MAX_CONCURRENCY = int(os.getenv("SCRAPE_MAX_CONCURRENCY", "20"))
+SCRAPE_PER_HOST_CONCURRENCY = int(os.getenv("SCRAPE_PER_HOST_CONCURRENCY", "4"))
+
+# Keep-alive session shared by synchronous scrapes, so repeat requests to the
+# same board reuse the TCP/TLS connection
+_session = requests.Session()
+_session.headers.update({"User-Agent": USER_AGENT})
+
+# lxml builds the tree several times faster than the pure-Python parser; fall
+# back to html.parser when it isn't installed
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Main-content extraction: containers eligible as the description block, tags
+# whose text never counts, and what makes a block navigation or boilerplate
+# (a page-chrome tag, a class/id marker, or mostly link text)
+CONTENT_TAGS = {"div", "section", "article", "main"}
+SKIP_TAGS = {"script", "style", "noscript", "template", "head", "svg"}
+BOILERPLATE_TAGS = {"nav", "header", "footer", "aside", "form", "button"}
+BOILERPLATE_MARKERS = ("nav", "menu", "footer", "sidebar", "breadcrumb", "cookie", "share", "social", "related")
+LINK_HEAVY_RATIO = 0.5
+
+# Class/id markers used by common job boards
+COMPANY_CLASSES = ['company', 'topcard__org-name', 'posting-company', 'job-company']
+DESCRIPTION_CLASSES = {'description', 'job-description'}
+DESCRIPTION_IDS = {'jobDescriptionText'}
+MARKER_CLASSES = set(COMPANY_CLASSES) | DESCRIPTION_CLASSES
+
+# Bump when parse_job_html changes output, so cached pages are reparsed from
+# their stored HTML instead of being served with stale fields
+PARSER_VERSION = 4
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+def _main_content(root: Tag) -> Optional[Tag]:
     """
-    Basic scraper: fetch HTML and try to extract the job title, company, and description text.
-    For JS-heavy sites, extend with Playwright/selenium.
+    Find the block holding the page's main text in one bottom-up pass.
+    Every node's text length (and the part of it inside links) is summed from
+    its children exactly once, instead of calling get_text() on every nested
+    div. The block with the most non-link text wins, then we narrow it down
+    through wrapper divs while a single child block still holds most of it.
     """
-    r = requests.get(url, timeout=15, headers={"User-Agent": "ApplyPilotBot/1.0"})
-    r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
+    # Pre-order walk; reversed, it visits children before their parents
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(c for c in node.children if isinstance(c, Tag) and c.name not in SKIP_TAGS)
+
+    text_len, link_len = {}, {}
+    best, best_score = None, -1
+    for node in reversed(order):
+        total = links = 0
+        for child in node.children:
+            if isinstance(child, Tag):
+                if child.name not in SKIP_TAGS:
+                    total += text_len[id(child)]
+                    links += link_len[id(child)]
+            elif type(child) in (NavigableString, CData):
+                total += len(child.strip())
+        if node.name == "a":
+            links = total
+        text_len[id(node)], link_len[id(node)] = total, links
+        if node.name in CONTENT_TAGS and total - links > best_score:
+            best, best_score = node, total - links
+
+    def is_boilerplate(tag: Tag) -> bool:
+        if tag.name in BOILERPLATE_TAGS:
+            return True
+        total = text_len[id(tag)]
+        if total and link_len[id(tag)] >= LINK_HEAVY_RATIO * total:
+            return True
+        markers = " ".join(tag.get("class", ())) + " " + (tag.get("id") or "")
+        return any(marker in markers.lower() for marker in BOILERPLATE_MARKERS)
+
+    def holds_content(child) -> bool:
+        if isinstance(child, Tag):
+            return child.name not in SKIP_TAGS and text_len[id(child)] > 0 and not is_boilerplate(child)
+        return type(child) in (NavigableString, CData) and bool(child.strip())
+
+    while best is not None:
+        inner = max(
+            (c for c in best.children if isinstance(c, Tag) and c.name in CONTENT_TAGS),
+            key=lambda c: text_len[id(c)] - link_len[id(c)],
+            default=None,
+        )
+        if inner is None or text_len[id(inner)] - link_len[id(inner)] <= 0:
+            break
+        if any(holds_content(c) for c in best.children if c is not inner):
+            break
+        best = inner
+    return best
+
+def _is_marked(tag: Tag) -> bool:
+    classes = tag.get("class")
+    if classes and MARKER_CLASSES.intersection(classes):
+        return True
+    return tag.get("id") in DESCRIPTION_IDS
+
+def parse_job_html(html: str, url: str) -> Dict[str,str]:
+    """Extract the job title, company, and description text from a fetched page"""
+    # Fast path: JSON-LD JobPosting data and site extractors are pulled with
+    # regexes; most job boards provide everything we need this way
+    fields = extract_structured(html, url)
+    if fields.get("title") and fields.get("company") and fields.get("description"):
+        return {"title": fields["title"], "company": fields["company"], "description": fields["description"], "url": url}
+
+    soup = BeautifulSoup(html, HTML_PARSER)
 
     # Heuristics:
-    title = (soup.find("h1") or soup.find("h2") or soup.title)
-    title_text = title.get_text(strip=True) if title else ""
+    title_text = fields.get("title", "")
+    if not title_text:
+        title = (soup.find("h1") or soup.find("h2") or soup.title)
+        title_text = title.get_text(strip=True) if title else ""
+
+    # One native tree walk collects every company/description candidate;
+    # running each CSS selector through soupsieve walked the tree five times
+    marked = soup.find_all(_is_marked)
 
-    # company heuristics
-    company = ""
-    for sel in ['.company', '.topcard__org-name', '.posting-company', '.job-company']:
-        el = soup.select_one(sel)
+    # company heuristics, in priority order
+    company = fields.get("company", "")
+    for cls in ([] if company else COMPANY_CLASSES):
+        el = next((t for t in marked if cls in t.get("class", ())), None)
         if el:
             company = el.get_text(strip=True)
             break
 
-    # job description: most sites use .description, .job-description etc.
-    desc_candidates = soup.select(".description, .job-description, #jobDescriptionText")
-    if desc_candidates:
-        desc_text = "\n".join([c.get_text(separator="\n", strip=True) for c in desc_candidates])
-    else:
-        # fallback: take the largest <div> by text length
-        divs = soup.find_all("div")
-        candidate = max(divs, key=lambda d: len(d.get_text(strip=True) or ""))
-        desc_text = candidate.get_text(separator="\n", strip=True)
+    desc_text = fields.get("description", "")
+    if not desc_text:
+        # job description: most sites use .description, .job-description etc.
+        desc_candidates = [
+            t for t in marked
+            if t.get("id") in DESCRIPTION_IDS or DESCRIPTION_CLASSES.intersection(t.get("class", ()))
+        ]
+        if desc_candidates:
+            desc_text = "\n".join([c.get_text(separator="\n", strip=True) for c in desc_candidates])
+        else:
+            # fallback: the densest block of non-link text on the page
+            candidate = _main_content(soup.body or soup) or soup
+            desc_text = candidate.get_text(separator="\n", strip=True)
+
+    # OpenGraph tags are a last resort for pages with no usable title/company markup
+    if not title_text or not company:
+        og = extract_open_graph(html)
+        title_text = title_text or og.get("title", "")
+        company = company or og.get("company", "")
 
     return {"title": title_text, "company": company, "description": desc_text, "url": url}
+
+def _serve_cached(entry: Dict, url: str, revalidated: bool = False) -> Dict[str,str]:
+    """Return a cached result, reparsing the stored HTML if the parser changed since"""
+    if revalidated:
+        scrape_cache.mark_revalidated(url)
+    else:
+        scrape_cache.record_hit(url)
+    if entry['parser_version'] != PARSER_VERSION:
+        result = parse_job_html(entry['body'], url)
+        scrape_cache.update_result(url, result, PARSER_VERSION)
+        return result
+    return {**entry['result'], "url": url}
+
+def _parse_and_store(url: str, body: str, headers, entry: Optional[Dict]) -> Dict[str,str]:
+    """Parse a freshly fetched page and cache it"""
+    if entry is None:
+        scrape_cache.record_miss()
+    result = parse_job_html(body, url)
+    scrape_cache.store(url, body, headers, result, PARSER_VERSION, stale=entry is not None)
+    return result
+
+def scrape_job_text(url: str, use_cache: bool = True) -> Dict[str,str]:
+    """
+    Basic scraper: fetch HTML and try to extract the job title, company, and description text.
+    For JS-heavy sites, extend with Playwright/selenium.
+    Results are cached; pass use_cache=False to force a full refetch.
+    """
+    entry = scrape_cache.lookup(url) if use_cache else None
+    if entry and scrape_cache.is_fresh(entry):
+        return _serve_cached(entry, url)
+    
+    r = _session.get(url, timeout=REQUEST_TIMEOUT, headers=scrape_cache.conditional_headers(entry))
+    if r.status_code == 304 and entry:
+        return _serve_cached(entry, url, revalidated=True)
+    r.raise_for_status()
+    return _parse_and_store(url, r.text, r.headers, entry)
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive client used for batch scraping"""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=REQUEST_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=SCRAPE_MAX_CONCURRENCY,
+                max_keepalive_connections=SCRAPE_MAX_CONCURRENCY,
+            ),
+        )
+    return _async_client
+
+async def close_async_client():
+    """Close the shared batch-scraping client (called on app shutdown)"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+async def _scrape_one(client: httpx.AsyncClient, url: str, limit: asyncio.Semaphore,
+                      host_limit: asyncio.Semaphore, use_cache: bool) -> Dict:
+    # Cache reads/writes and parsing are blocking; keep them off the event loop
+    try:
+        entry = await asyncio.to_thread(scrape_cache.lookup, url) if use_cache else None
+        if entry and scrape_cache.is_fresh(entry):
+            data = await asyncio.to_thread(_serve_cached, entry, url)
+            return {"ok": True, **data}
+        
+        # Per-host slot first: a task waiting on a busy host must not hold a
+        # global slot that a URL on another host could use
+        async with host_limit, limit:
+            r = await client.get(url, headers=scrape_cache.conditional_headers(entry))
+        if r.status_code == 304 and entry:
+            data = await asyncio.to_thread(_serve_cached, entry, url, True)
+        else:
+            r.raise_for_status()
+            data = await asyncio.to_thread(_parse_and_store, url, r.text, r.headers, entry)
+        return {"ok": True, **data}
+    except Exception as e:
+        logger.warning(f"Batch scrape failed for {url}: {str(e)}")
+        return {"ok": False, "url": url, "error": str(e)}
+
+async def scrape_many(urls: List[str], use_cache: bool = True) -> List[Dict]:
+    """
+    Scrape many URLs concurrently over pooled keep-alive connections.
+    Returns one result per input URL, in order; failures are reported per URL
+    with ok=False and an error message instead of failing the whole batch.
+    """
+    client = _get_async_client()
+    limit = asyncio.Semaphore(SCRAPE_MAX_CONCURRENCY)
+    host_limits = defaultdict(lambda: asyncio.Semaphore(SCRAPE_PER_HOST_CONCURRENCY))
+
+    # Fetch each distinct URL once
+    unique_urls = list(dict.fromkeys(urls))
+    results = await asyncio.gather(*[
+        _scrape_one(client, url, limit, host_limits[urlparse(url).netloc.lower()], use_cache)
+        for url in unique_urls
+    ])
+    by_url = dict(zip(unique_urls, results))
+    return [by_url[url] for url in urls]
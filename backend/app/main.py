@@ -2,6 +2,9 @@
 from fastapi import FastAPI
 from app.api import jobs, resume, tracker, health, applications, files, profile
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.database import init_db, close_write_queue
+from app.core import scraper, scrape_cache, llm_client, llm_cache, file_parser, job_queue
+from app.middleware.rate_limit import rate_limit_middleware
 import logging
 
 # Configure logging
@@ -12,6 +15,10 @@ logging.basicConfig(
 
 app = FastAPI(title="ApplyPilot API")
 
+# Registered before CORS so that CORS stays the outermost layer and 429
+# responses still carry CORS headers
+app.middleware("http")(rate_limit_middleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -24,6 +31,22 @@ app.add_middleware(
     allow_headers=["Content-Type", "Authorization"],
 )
 
+@app.on_event("startup")
+async def startup():
+    # Apply pending schema migrations once per worker before serving requests
+    init_db()
+    job_queue.start_workers()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await job_queue.stop_workers()
+    await scraper.close_async_client()
+    await llm_client.close_async_client()
+    file_parser.shutdown_parse_pool()
+    llm_cache.flush_hits()
+    scrape_cache.flush_hits()
+    close_write_queue()
+
 app.include_router(health.router, prefix="/api/v1", tags=["health"])
 app.include_router(profile.router, prefix="/api/v1", tags=["profile"])
 app.include_router(files.router, prefix="/api/v1", tags=["files"])
@@ -1,32 +1,167 @@
 # backend/app/middleware/rate_limit.py
-from fastapi import Request, HTTPException
-from collections import defaultdict
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from collections import OrderedDict
+from typing import Tuple
+import os
+import math
 import time
+import sqlite3
+import threading
+
+# Request cost by path prefix (longest match wins). A key may spend
+# max_requests cost units per window, so LLM-backed endpoints use up the
+# allowance much faster than cheap reads. Cost 0 is never limited.
+ROUTE_COSTS = {
+    "/api/v1/health": 0,
+    "/jobs/tailor": 10,
+    "/jobs/cover-letter": 10,
+    "/jobs/cover-letter/batch": 100,
+    "/jobs/answer": 10,
+    "/jobs/scrape/batch": 20,
+    "/jobs/scrape": 2,
+    "/api/v1/upload-resume": 5,
+}
+DEFAULT_COST = 1
+
+def route_cost(method: str, path: str) -> int:
+    """Cost of a request in rate-limit units"""
+    if method == "OPTIONS" or path == "/":
+        return 0
+    best = None
+    for prefix in ROUTE_COSTS:
+        if path.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return ROUTE_COSTS[best] if best is not None else DEFAULT_COST
+
+class MemoryBackend:
+    """
+    Per-process GCRA state: one theoretical arrival time (TAT) per key.
+    Keys are kept in least-recently-updated order; a key whose TAT has
+    passed is indistinguishable from a new one, so idle keys are dropped
+    from the front as we go, and max_keys bounds memory outright.
+    """
+    blocking = False
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._tat = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, key: str, increment: float, capacity: float, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            tat = max(self._tat.get(key, now), now)
+            new_tat = tat + increment
+            if new_tat - now > capacity:
+                return False, new_tat - now - capacity
+            self._tat[key] = new_tat
+            self._tat.move_to_end(key)
+            self._evict(now)
+            return True, 0.0
+
+    def _evict(self, now: float):
+        while self._tat:
+            key, tat = next(iter(self._tat.items()))
+            if tat > now and len(self._tat) <= self.max_keys:
+                break
+            del self._tat[key]
+
+    def __len__(self):
+        return len(self._tat)
+
+class SQLiteBackend:
+    """
+    GCRA state in a SQLite file shared by every worker on the host, so the
+    limit holds across gunicorn processes. Each check is one short
+    BEGIN IMMEDIATE transaction; idle keys are purged periodically.
+    """
+    blocking = True
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._checks = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def update(self, key: str, increment: float, capacity: float, now: float) -> Tuple[bool, float]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tat = max(row[0] if row else now, now)
+            new_tat = tat + increment
+            if new_tat - now > capacity:
+                allowed, retry_after = False, new_tat - now - capacity
+            else:
+                conn.execute("INSERT OR REPLACE INTO rate_limits (key, tat) VALUES (?, ?)", (key, new_tat))
+                allowed, retry_after = True, 0.0
+            self._checks += 1
+            if self._checks % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return allowed, retry_after
 
 class RateLimiter:
-    def __init__(self, max_requests: int = 100, window_seconds: int = 3600):
+    """
+    Generic cell rate algorithm: equivalent to a token bucket holding
+    max_requests units that refills over window_seconds, in O(1) time and
+    state per key.
+    """
+    def __init__(self, max_requests: int = 100, window_seconds: int = 3600, backend=None):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests = defaultdict(list)
-    
-    def is_allowed(self, client_ip: str) -> bool:
-        now = time.time()
-        # Clean old requests
-        self.requests[client_ip] = [
-            req_time for req_time in self.requests[client_ip]
-            if now - req_time < self.window_seconds
-        ]
-        
-        if len(self.requests[client_ip]) >= self.max_requests:
-            return False
-        
-        self.requests[client_ip].append(now)
-        return True
-
-rate_limiter = RateLimiter()
+        self.emission_interval = window_seconds / max_requests
+        self.backend = backend if backend is not None else MemoryBackend()
+
+    def check(self, key: str, cost: int = 1) -> Tuple[bool, float]:
+        """Spend cost units for key; returns (allowed, seconds until it would be)"""
+        if cost <= 0:
+            return True, 0.0
+        return self.backend.update(key, cost * self.emission_interval, self.window_seconds, time.time())
+
+    def is_allowed(self, client_ip: str, cost: int = 1) -> bool:
+        return self.check(client_ip, cost)[0]
+
+def _build_rate_limiter() -> RateLimiter:
+    backend = None
+    if os.getenv("RATE_LIMIT_BACKEND", "memory") == "sqlite":
+        backend = SQLiteBackend(os.getenv("RATE_LIMIT_DB_PATH", "ratelimit.db"))
+    return RateLimiter(
+        max_requests=int(os.getenv("RATE_LIMIT_MAX_REQUESTS", "1000")),
+        window_seconds=int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "3600")),
+        backend=backend,
+    )
+
+rate_limiter = _build_rate_limiter()
 
 async def rate_limit_middleware(request: Request, call_next):
-    client_ip = request.client.host
-    if not rate_limiter.is_allowed(client_ip):
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
-    return await call_next(request)
\ No newline at end of file
+    cost = route_cost(request.method, request.url.path)
+    if cost:
+        client_ip = request.client.host if request.client else "unknown"
+        if rate_limiter.backend.blocking:
+            allowed, retry_after = await run_in_threadpool(rate_limiter.check, client_ip, cost)
+        else:
+            allowed, retry_after = rate_limiter.check(client_ip, cost)
+        if not allowed:
+            # Exceptions raised in HTTP middleware bypass FastAPI's handlers, so
+            # answer directly
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded"},
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+    return await call_next(request)
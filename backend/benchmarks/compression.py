@@ -0,0 +1,104 @@
+# backend/benchmarks/compression.py
+"""
+Database size, read latency and write cost of compressing job_text and
+generated content, for each codec.
+
+    cd backend && python -m benchmarks.compression [--rows 10000]
+
+The codec is chosen when app.core.compression is imported, so each one runs
+in a child process against its own fresh database.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+CODECS = ("none", "zlib", "zstd", "zstd+dict")
+
+def _p50_ms(fn, args) -> float:
+    times = []
+    for arg in args:
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+def run_codec(codec: str, rows: int) -> dict:
+    """Runs in the child process: build the database and measure it"""
+    from benchmarks.postings import postings
+    from app.core import database, compression
+
+    docs = postings(rows, seed=2)
+    letters = [letter[:2500] for letter in postings(rows, seed=3)]
+    database.init_db()
+    start = time.perf_counter()
+    database.import_applications(("Acme", "Engineer", "", doc, "") for doc in docs)
+    import_rate = rows / (time.perf_counter() - start)
+    database.save_generated_contents([(i + 1, "cover_letter", letter) for i, letter in enumerate(letters)])
+    if codec == "zstd+dict":
+        database.train_compression_dictionary()
+        with database.transaction() as conn:
+            compression.recompress_all(conn)
+
+    extra = postings(300, seed=4)
+    save_ms = _p50_ms(lambda doc: database.save_application("Beta", "Engineer", job_text=doc), extra)
+
+    conn = database.get_connection()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    stored = conn.execute("SELECT SUM(LENGTH(data)) FROM blobs").fetchone()[0]
+    plain = sum(len(doc.encode("utf-8")) for doc in docs + letters + extra)
+
+    rng = random.Random(5)
+    ids = [rng.randrange(1, rows) for _ in range(2000)]
+    result = {
+        "codec": codec,
+        "file_mb": os.path.getsize(database.DB_PATH) / 1e6,
+        "text_mb": plain / 1e6,
+        "stored_mb": stored / 1e6,
+        "import_rows_s": import_rate,
+        "save_p50_ms": save_ms,
+        "get_application_p50_ms": _p50_ms(database.get_application, ids),
+        "list50_with_text_p50_ms": _p50_ms(
+            lambda i: database.get_applications_by_ids(range(i, i + 50), fields=("id", "job_text")), ids[:500]),
+        "list50_no_text_p50_ms": _p50_ms(
+            lambda i: database.get_applications_by_ids(range(i, i + 50), fields=("id", "company")), ids[:500]),
+    }
+    database.close_write_queue()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--codec", choices=CODECS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.codec:
+        print(json.dumps(run_codec(args.codec, args.rows)))
+        return
+
+    print(f"{'codec':10} {'file MB':>8} {'text MB':>8} {'stored':>8} {'import/s':>9} {'save':>7} "
+          f"{'get app':>8} {'50+text':>8} {'50 no text':>10}")
+    for codec in CODECS:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, APPLYPILOT_DB_PATH=os.path.join(tmp, "bench.db"),
+                       APPLYPILOT_COMPRESSION="zstd" if codec.startswith("zstd") else codec)
+            try:
+                out = subprocess.run([sys.executable, "-m", "benchmarks.compression", "--codec", codec,
+                                      "--rows", str(args.rows)], env=env, check=True,
+                                     capture_output=True, text=True).stdout
+            except subprocess.CalledProcessError as e:
+                print(f"{codec:10} failed: {e.stderr.strip().splitlines()[-1]}")
+                continue
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{codec:10} {r['file_mb']:8.1f} {r['text_mb']:8.1f} {r['stored_mb']:8.1f} {r['import_rows_s']:9.0f} "
+              f"{r['save_p50_ms']:5.2f}ms {r['get_application_p50_ms']:6.3f}ms {r['list50_with_text_p50_ms']:6.2f}ms "
+              f"{r['list50_no_text_p50_ms']:8.3f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# backend/benchmarks/db_load.py
+"""
+Database throughput and latency under concurrent request threads: the
+original connect-per-call access in rollback-journal mode against the
+pooled WAL connections, with and without the group-commit writer.
+
+    cd backend && python -m benchmarks.db_load [--threads 8] [--seconds 5] [--write-rate 0.2]
+
+Each thread plays a request worker (FastAPI runs sync endpoints in a
+threadpool) issuing a mix of reads (one application, a page of 50, the
+profile) and writes (new application, status change). The statements and
+the migrated schema are the same in every mode, so only connection
+handling, journal mode and commit grouping differ. Each mode runs in a
+child process against a fresh database, since the settings are read when
+app.core.database is imported.
+"""
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import threading
+import subprocess
+from benchmarks.postings import postings
+from app.core import database, compression
+
+MODES = ("per-call", "pooled", "pooled+queue")
+SEED_ROWS = 5000
+STATUSES = ("applied", "reviewing", "interview", "rejected")
+
+# The same statements run in every mode; only how a connection is obtained
+# and how writes are committed differ
+READ_APPLICATION = "SELECT id, company, position, status, applied_date, notes FROM applications WHERE id = ?"
+READ_PAGE = """SELECT id, company, position, status, applied_date FROM applications
+               ORDER BY applied_date DESC, id DESC LIMIT 50"""
+READ_PROFILE = "SELECT * FROM user_profile ORDER BY id LIMIT 1"
+INSERT_APPLICATION = "INSERT INTO applications (company, position, job_url, notes) VALUES (?, ?, '', ?)"
+UPDATE_STATUS = "UPDATE applications SET status = ?, notes = '' WHERE id = ?"
+
+class _PerCallDB:
+    """Database access as it was before pooling: a new connection, rollback
+    journal and commit per call"""
+
+    def __init__(self, path: str):
+        self.path = path
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        # The schema's triggers call the compression functions
+        compression.register_functions(conn)
+        return conn
+
+    def read(self, sql: str, params: tuple = ()):
+        conn = self._connect()
+        rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+        conn.close()
+        return rows
+
+    def write(self, sql: str, params: tuple):
+        conn = self._connect()
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+
+class _PooledDB:
+    """The pooled connections: reads on the thread's connection, writes
+    through database._write (the writer queue when it is enabled)"""
+
+    def read(self, sql: str, params: tuple = ()):
+        return [dict(row) for row in database.get_connection().execute(sql, params).fetchall()]
+
+    def write(self, sql: str, params: tuple):
+        database._write(lambda conn: conn.execute(sql, params))
+
+def _percentile_ms(times, q: float) -> float:
+    times = sorted(times)
+    return times[min(int(len(times) * q), len(times) - 1)] * 1000 if times else 0.0
+
+def run_mode(mode: str, threads: int, seconds: float, write_rate: float) -> dict:
+    """Runs in the child process: seed the database, then load it"""
+    docs = postings(200, seed=8)
+    database.init_db()
+    database.save_user_profile(name="Bench", resume_text=docs[0])
+    database.import_applications(("Acme", "Engineer", "", docs[i % len(docs)], "") for i in range(SEED_ROWS))
+    if mode == "per-call":
+        database.close_write_queue()
+        database.close_connection()
+        db = _PerCallDB(database.DB_PATH)
+    else:
+        db = _PooledDB()
+
+    stop = threading.Event()
+    reads, writes, errors = [], [], []
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            is_write = rng.random() < write_rate
+            op = rng.random()
+            start = time.perf_counter()
+            try:
+                if is_write and op < 0.5:
+                    db.write(INSERT_APPLICATION, ("Beta", "Engineer", f"note {op}"))
+                elif is_write:
+                    db.write(UPDATE_STATUS, (rng.choice(STATUSES), rng.randrange(1, SEED_ROWS)))
+                elif op < 0.5:
+                    db.read(READ_APPLICATION, (rng.randrange(1, SEED_ROWS),))
+                elif op < 0.8:
+                    db.read(READ_PAGE)
+                else:
+                    db.read(READ_PROFILE)
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+                continue
+            (writes if is_write else reads).append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    database.close_write_queue()
+    return {
+        "ops_s": (len(reads) + len(writes)) / elapsed,
+        "read_p50_ms": _percentile_ms(reads, 0.5),
+        "read_p99_ms": _percentile_ms(reads, 0.99),
+        "write_p50_ms": _percentile_ms(writes, 0.5),
+        "write_p99_ms": _percentile_ms(writes, 0.99),
+        "errors": len(errors),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--write-rate", type=float, default=0.2)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.threads, args.seconds, args.write_rate)))
+        return
+
+    print(f"{args.threads} threads for {args.seconds:g} s, {args.write_rate:.0%} writes, {SEED_ROWS} applications")
+    print(f"{'mode':13} {'ops/s':>8} {'read p50':>9} {'read p99':>9} {'write p50':>10} {'write p99':>10} {'errors':>7}")
+    for mode in MODES:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, APPLYPILOT_DB_PATH=os.path.join(tmp, "bench.db"),
+                       APPLYPILOT_WRITE_QUEUE="1" if mode == "pooled+queue" else "0")
+            try:
+                out = subprocess.run([sys.executable, "-m", "benchmarks.db_load", "--mode", mode,
+                                      "--threads", str(args.threads), "--seconds", str(args.seconds),
+                                      "--write-rate", str(args.write_rate)],
+                                     env=env, check=True, capture_output=True, text=True).stdout
+            except subprocess.CalledProcessError as e:
+                print(f"{mode:13} failed: {e.stderr.strip().splitlines()[-1]}")
+                continue
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{mode:13} {r['ops_s']:8.0f} {r['read_p50_ms']:7.2f}ms {r['read_p99_ms']:7.2f}ms "
+              f"{r['write_p50_ms']:8.2f}ms {r['write_p99_ms']:8.2f}ms {r['errors']:7}")
+
+if __name__ == "__main__":
+    main()
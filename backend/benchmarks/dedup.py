@@ -0,0 +1,86 @@
+# backend/benchmarks/dedup.py
+"""
+Near-duplicate detection at scale: bulk import rate with the check on, how
+many reposts are flagged (and how many originals are flagged wrongly),
+save and similar-lookup latency, and how long other writes wait while an
+import runs.
+
+    cd backend && python -m benchmarks.dedup [--rows 100000]
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+def _percentiles(times):
+    times = sorted(times)
+    return times[len(times) // 2] * 1000, times[int(len(times) * 0.99)] * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repost-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["APPLYPILOT_DB_PATH"] = os.path.join(tmp.name, "bench.db")
+    from benchmarks.postings import postings, repost, REPOST_HEADER
+    from app.core import database
+
+    rng = random.Random(7)
+    originals = iter(postings(args.rows, seed=11, min_paragraphs=3, max_paragraphs=6))
+    docs = []
+    for _ in range(args.rows):
+        if docs and rng.random() < args.repost_rate:
+            docs.append(repost(docs[rng.randrange(len(docs))], rng))
+        else:
+            docs.append(next(originals))
+    reposts = sum(doc.startswith(REPOST_HEADER) for doc in docs)
+
+    database.init_db()
+    seed_id = database.save_application("Seed", "Seed", job_text="status updates go here")
+    # Another client's writes, timed while the import holds the writer
+    stop, waits = threading.Event(), []
+    def other_writes():
+        while not stop.is_set():
+            start = time.perf_counter()
+            database.update_application_status(seed_id, "reviewing")
+            waits.append(time.perf_counter() - start)
+            time.sleep(0.005)
+    writer = threading.Thread(target=other_writes)
+    writer.start()
+    start = time.perf_counter()
+    database.import_applications(("Acme", "Engineer", "", doc, "") for doc in docs)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    writer.join()
+    print(f"import {args.rows} postings: {elapsed:.1f} s, {args.rows / elapsed:.0f} rows/s")
+    print("status update during import: p50 %.2f ms, p99 %.2f ms" % _percentiles(waits))
+
+    conn = database.get_connection()
+    flagged = conn.execute("SELECT COUNT(*) FROM applications WHERE duplicate_of IS NOT NULL").fetchone()[0]
+    wrong = sum(1 for app_id, in conn.execute("SELECT id FROM applications WHERE duplicate_of IS NOT NULL")
+                if not docs[app_id - seed_id - 1].startswith(REPOST_HEADER))
+    print(f"flagged {flagged} of {reposts} reposts; {wrong} flagged postings were not reposts")
+
+    save_times = []
+    for _ in range(200):
+        doc = repost(docs[rng.randrange(len(docs))], rng) if rng.random() < 0.5 else next(originals, docs[0][::-1])
+        start = time.perf_counter()
+        database.save_application("Beta", "Engineer", job_text=doc)
+        save_times.append(time.perf_counter() - start)
+    print("save_application: p50 %.2f ms, p99 %.2f ms" % _percentiles(save_times))
+
+    lookup_times = []
+    for _ in range(200):
+        app_id = rng.randrange(seed_id + 1, seed_id + args.rows)
+        start = time.perf_counter()
+        database.find_similar_applications(app_id)
+        lookup_times.append(time.perf_counter() - start)
+    print("similar lookup: p50 %.2f ms, p99 %.2f ms" % _percentiles(lookup_times))
+    database.close_write_queue()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# backend/benchmarks/documents.py
+import io
+import random
+import textwrap
+from typing import List
+from docx import Document
+from benchmarks.postings import paragraphs
+
+# Synthetic resumes for the upload and parse benchmarks: text PDFs of a given
+# page count and DOCX files of a given paragraph count, filled with the same
+# stdlib prose as the postings. The PDF writer is a few lines of PDF syntax
+# (one Helvetica text stream per page), so no PDF library is needed.
+
+LINES_PER_PAGE = 52
+LINE_WIDTH = 95
+
+def _lines(rng: random.Random, count: int) -> List[str]:
+    paras = paragraphs()
+    lines = []
+    while len(lines) < count:
+        lines.extend(textwrap.wrap(rng.choice(paras), LINE_WIDTH))
+        lines.append("")
+    return lines[:count]
+
+def _pdf_string(line: str) -> bytes:
+    line = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"(" + line.encode("latin-1", "replace") + b")"
+
+def resume_pdf(pages: int, seed: int = 1) -> bytes:
+    """A text PDF of the given number of pages"""
+    rng = random.Random(seed)
+    # 1: catalog, 2: page tree, 3: font, then a page and its content stream per page
+    page_ids = [4 + 2 * i for i in range(pages)]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % i for i in page_ids) + b"] /Count %d >>" % pages,
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    for page_id in page_ids:
+        text = b" T*\n".join(_pdf_string(line) + b" Tj" for line in _lines(rng, LINES_PER_PAGE))
+        stream = b"BT /F1 10 Tf 14 TL 50 770 Td\n" + text + b"\nET"
+        objects[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (page_id + 1))
+        objects[page_id + 1] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = out.tell()
+        out.write(b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for obj_id in sorted(objects):
+        out.write(b"%010d 00000 n \n" % offsets[obj_id])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+def resume_docx(paragraph_count: int, seed: int = 1) -> bytes:
+    """A DOCX of the given number of paragraphs"""
+    rng = random.Random(seed)
+    doc = Document()
+    paras = paragraphs()
+    for _ in range(paragraph_count):
+        doc.add_paragraph(rng.choice(paras))
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
@@ -0,0 +1,229 @@
+# backend/benchmarks/extraction.py
+"""
+Description extraction on saved job pages with no description markup: time
+and quality of parse_job_html's text-density fallback against the original
+largest-<div> extractor.
+
+    cd backend && python -m benchmarks.extraction [--repeat 5]
+    cd backend && python -m benchmarks.extraction --write-pages
+
+Quality is scored against benchmarks/pages/expected.json: "kept" is the
+share of the posting's lines (headings, paragraphs, list items, sidebars
+with facts like salary) found in the output, "junk" the share of
+navigation, footer, cookie and related-job lines that leaked into it.
+The pages follow the layouts of common career sites (real postings can't be
+shipped) and are rebuilt with --write-pages.
+"""
+import os
+import json
+import html
+import time
+import random
+import argparse
+import statistics
+from bs4 import BeautifulSoup
+from app.core import scraper
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), "pages")
+URL = "https://careers.example.com/jobs/1"
+SNIPPET_CHARS = 60
+
+def _original_extract(page: str) -> str:
+    """The fallback before the text-density extractor: the <div> with the most text"""
+    soup = BeautifulSoup(page, "html.parser")
+    divs = soup.find_all("div")
+    candidate = max(divs, key=lambda d: len(d.get_text(strip=True) or ""))
+    return candidate.get_text(separator="\n", strip=True)
+
+class _Page:
+    """Collects a page's HTML along with which of its lines are posting and which are chrome"""
+
+    def __init__(self, seed: int):
+        from benchmarks.postings import paragraphs
+        self.rng = random.Random(seed)
+        self.paras = paragraphs()
+        self.keep, self.junk = [], []
+
+    def para(self, tag: str = "p") -> str:
+        text = self.rng.choice(self.paras)
+        self.keep.append(text)
+        return f"<{tag}>{html.escape(text)}</{tag}>"
+
+    def heading(self, text: str, tag: str = "h2") -> str:
+        self.keep.append(text)
+        return f"<{tag}>{text}</{tag}>"
+
+    def items(self, count: int) -> str:
+        return "<ul>" + "".join(self.para("li") for _ in range(count)) + "</ul>"
+
+    def fact(self, label: str, value: str) -> str:
+        self.keep.append(f"{label}: {value}")
+        return f"<div><strong>{label}:</strong> {value}</div>"
+
+    def links(self, label: str, count: int, wrap: str = "li") -> str:
+        self.junk.extend(f"{label} {i}" for i in range(0, count, max(1, count // 5)))
+        return "".join(f"<{wrap}><a href='/{label.lower().replace(' ', '-')}/{i}'>{label} {i}</a></{wrap}>"
+                       for i in range(count))
+
+    def chrome(self, text: str) -> str:
+        self.junk.append(text)
+        return text
+
+def _head(title: str) -> str:
+    script = "window.__STATE__ = " + json.dumps({"flags": ["x"] * 400}) + ";"
+    return (f"<!DOCTYPE html><html><head><title>{title}</title><script>{script}</script>"
+            f"<style>body {{ font-family: sans-serif; }}</style></head>")
+
+def _sections(p: _Page) -> str:
+    """Description and requirements as sibling blocks inside one wrapper"""
+    return (_head("Backend Engineer") + "<body><div id='app'>"
+            "<nav class='top'><ul>" + p.links("Menu item", 12) + "</ul></nav>"
+            "<div class='page'>"
+            "<div class='job-body'>" + p.heading("Backend Engineer", "h1") +
+            "<section>" + p.heading("About the role") + p.para() + p.para() + p.para() + p.para() + "</section>"
+            "<section>" + p.heading("Responsibilities") + p.items(6) + "</section></div>"
+            "<div class='job-reqs'>" + p.heading("Requirements", "h3") + p.items(3) + "</div>"
+            "</div>"
+            "<div class='site-footer'><ul>" + p.links("Footer link", 30) + "</ul>"
+            "<p>" + p.chrome("Copyright Example Corp. All rights reserved.") + "</p></div>"
+            "</div></body></html>")
+
+def _deep(p: _Page) -> str:
+    """Posting buried in forty wrappers between large link lists"""
+    posting = ("<div class='posting'>" + p.heading("About the role") +
+               "".join(p.para() for _ in range(12)) + p.heading("What you will do") + p.items(15) + "</div>")
+    for depth in range(40):
+        posting = f"<div class='wrap-{depth}'>{posting}</div>"
+    return (_head("Data Engineer") + "<body><h1>Data Engineer</h1>"
+            "<div class='links'>" + p.links("Browse category", 600, "div") + "</div>"
+            "<div id='root'>" + posting +
+            "<div class='bottom'>" + p.links("Site map entry", 400, "div") + "</div></div></body></html>")
+
+def _article(p: _Page) -> str:
+    """Semantic layout: header, main > article, aside of related jobs"""
+    related = "".join(
+        f"<li><a href='/jobs/{i}'>{p.chrome(f'Related job {i}')}</a> <span>Remote</span></li>" for i in range(8))
+    return (_head("Platform Engineer") + "<body>"
+            "<header><div class='brand'>Example Corp</div><nav>" + p.links("Menu item", 8, "span") + "</nav></header>"
+            "<main><article>" + p.heading("Platform Engineer", "h1") + p.para() + p.para() +
+            p.heading("Responsibilities") + p.items(5) + p.heading("Qualifications") + p.items(5) +
+            p.heading("Benefits") + p.para() + "</article>"
+            "<aside><h3>" + p.chrome("Similar jobs") + "</h3><ul>" + related + "</ul></aside></main>"
+            "<footer>" + p.links("Footer link", 20, "span") + "</footer></body></html>")
+
+def _board(p: _Page) -> str:
+    """Career-site listing page: filters, the posting beside a facts column, every other opening"""
+    return (_head("Site Reliability Engineer") + "<body><div class='container'>"
+            "<div class='filters'>" + p.links("Filter by team", 25, "span") + "</div>"
+            "<div class='row'>"
+            "<div class='col-8'>" + p.heading("Site Reliability Engineer", "h1") +
+            "".join(p.para() for _ in range(6)) + p.items(8) + "</div>"
+            "<div class='col-4'>" + p.heading("At a glance", "h3") + p.fact("Location", "Berlin or remote") +
+            p.fact("Salary", "80,000 to 95,000 EUR") + p.fact("Team", "Infrastructure") + "</div>"
+            "</div>"
+            "<div class='openings'><ul>" + p.links("Open position", 1500) + "</ul></div>"
+            "</div></body></html>")
+
+def _cookie(p: _Page) -> str:
+    """A long cookie-consent banner next to the posting"""
+    consent = " ".join(p.chrome(f"We use cookies for purpose number {i} as described in our policy.") for i in range(12))
+    return (_head("Security Engineer") + "<body><div id='root'>"
+            "<div class='cookie-consent'><p>" + consent + "</p><button>Accept</button></div>"
+            "<div class='posting'>" + p.heading("Security Engineer", "h1") +
+            "".join(p.para() for _ in range(5)) + p.items(6) + "</div>"
+            "</div></body></html>")
+
+def _flat(p: _Page) -> str:
+    """Paragraphs directly in the content column, share links in a sidebar"""
+    return (_head("Frontend Engineer") + "<body><div id='page'>"
+            "<div class='wrapper'>" + p.heading("Frontend Engineer", "h1") +
+            "".join(p.para() for _ in range(7)) + p.items(4) +
+            "<div class='apply'><a href='/apply'>" + p.chrome("Apply for this job") + "</a></div></div>"
+            "<div class='sidebar'><p>" + p.chrome("Share on social networks") + "</p>" +
+            p.links("Share on network", 6, "div") + "</div>"
+            "</div></body></html>")
+
+def _widgets(p: _Page) -> str:
+    """Application-style markup: attribute-heavy nested blocks, a similar-jobs widget"""
+    detail = "".join(
+        f"<div data-automation-id='section-{i}'><div class='css-{i}x'>{p.heading(name, 'h3')}"
+        f"<div class='css-body'>{p.para()}{p.para()}</div></div></div>"
+        for i, name in enumerate(("Overview", "Your impact", "Skills", "Compensation")))
+    return (_head("Machine Learning Engineer") + "<body><div id='wd-root'>"
+            "<div class='css-header'>" + p.links("Menu item", 10, "span") + "</div>"
+            "<div class='css-main'><div data-automation-id='jobPostingPage'>" +
+            p.heading("Machine Learning Engineer", "h2") + detail + "</div>"
+            "<div class='css-similar'>" + p.links("Similar job", 20, "div") + "</div></div>"
+            "</div></body></html>")
+
+def _minimal(p: _Page) -> str:
+    """No chrome at all"""
+    return (_head("Analyst") + "<body><div>" + p.heading("Analyst", "h1") +
+            "".join(p.para() for _ in range(4)) + p.items(3) + "</div></body></html>")
+
+LAYOUTS = {
+    "sections": _sections, "deep": _deep, "article": _article, "board": _board,
+    "cookie": _cookie, "flat": _flat, "widgets": _widgets, "minimal": _minimal,
+}
+
+def write_pages():
+    os.makedirs(PAGES_DIR, exist_ok=True)
+    expected = {}
+    for seed, (name, layout) in enumerate(LAYOUTS.items()):
+        p = _Page(seed)
+        page = layout(p)
+        with open(os.path.join(PAGES_DIR, f"{name}.html"), "w", encoding="utf-8") as f:
+            f.write(page)
+        expected[f"{name}.html"] = {"keep": [line[:SNIPPET_CHARS] for line in p.keep],
+                                    "junk": [line[:SNIPPET_CHARS] for line in p.junk]}
+        print(f"wrote {name}.html ({len(page)} bytes, {len(p.keep)} posting lines, {len(p.junk)} chrome lines)")
+    with open(os.path.join(PAGES_DIR, "expected.json"), "w", encoding="utf-8") as f:
+        json.dump(expected, f, indent=1)
+
+def _score(text: str, expected: dict):
+    text = " ".join(text.split())
+    kept = sum(" ".join(line.split()) in text for line in expected["keep"]) / len(expected["keep"])
+    junk = sum(" ".join(line.split()) in text for line in expected["junk"]) / max(len(expected["junk"]), 1)
+    return kept, junk
+
+def _median_ms(fn, page: str, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = fn(page)
+        times.append(time.perf_counter() - start)
+    return text, statistics.median(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--write-pages", action="store_true")
+    args = parser.parse_args()
+    if args.write_pages:
+        write_pages()
+        return
+
+    with open(os.path.join(PAGES_DIR, "expected.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+    current = lambda page: scraper.parse_job_html(page, URL)["description"]
+    print(f"parse_job_html with {scraper.HTML_PARSER}; kept = posting lines found, junk = chrome lines leaked")
+    print(f"{'page':10} {'KB':>5} | {'original':>9} {'kept':>5} {'junk':>5} | {'current':>9} {'kept':>5} {'junk':>5}")
+    totals = {"original": [0, 0, 0], "current": [0, 0, 0]}
+    for name, want in expected.items():
+        with open(os.path.join(PAGES_DIR, name), encoding="utf-8") as f:
+            page = f.read()
+        row = f"{name[:-5]:10} {len(page) / 1024:5.0f}"
+        for label, fn in (("original", _original_extract), ("current", current)):
+            text, ms = _median_ms(fn, page, args.repeat)
+            kept, junk = _score(text, want)
+            for i, value in enumerate((ms, kept, junk)):
+                totals[label][i] += value
+            row += f" | {ms:7.1f}ms {kept:5.0%} {junk:5.0%}"
+        print(row)
+    n = len(expected)
+    print(f"{'total/mean':16} | {totals['original'][0]:7.1f}ms {totals['original'][1] / n:5.0%} "
+          f"{totals['original'][2] / n:5.0%} | {totals['current'][0]:7.1f}ms {totals['current'][1] / n:5.0%} "
+          f"{totals['current'][2] / n:5.0%}")
+
+if __name__ == "__main__":
+    main()
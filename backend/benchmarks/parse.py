@@ -0,0 +1,96 @@
+# backend/benchmarks/parse.py
+"""
+Resume parse time over the fixture PDFs and DOCX files: the original
+serial parser, a cold parse through the process pool (page-parallel for
+large PDFs) and a repeat parse served from the content-hash cache.
+
+    cd backend && python -m benchmarks.parse [--repeat 5]
+    cd backend && python -m benchmarks.parse --write-fixtures
+
+The fixtures in benchmarks/fixtures are generated by benchmarks.documents;
+--write-fixtures rebuilds them.
+"""
+import io
+import os
+import time
+import asyncio
+import argparse
+import statistics
+import PyPDF2
+from docx import Document
+from app.core import file_parser
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+# name -> (kind, pages or paragraphs)
+FIXTURES = {
+    "resume-2p.pdf": ("pdf", 2),
+    "resume-12p.pdf": ("pdf", 12),
+    "resume-40p.pdf": ("pdf", 40),
+    "resume-30para.docx": ("docx", 30),
+    "resume-400para.docx": ("docx", 400),
+}
+
+def write_fixtures():
+    from benchmarks.documents import resume_pdf, resume_docx
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for seed, (name, (kind, size)) in enumerate(FIXTURES.items()):
+        data = resume_pdf(size, seed=seed) if kind == "pdf" else resume_docx(size, seed=seed)
+        with open(os.path.join(FIXTURES_DIR, name), "wb") as f:
+            f.write(data)
+        print(f"wrote {name} ({len(data)} bytes)")
+
+def _original_parse(kind: str, path: str) -> str:
+    """The parser before the pool and cache: serial pages, text built with +="""
+    with open(path, "rb") as f:
+        file_content = f.read()
+    text = ""
+    if kind == "pdf":
+        for page in PyPDF2.PdfReader(io.BytesIO(file_content)).pages:
+            text += page.extract_text() + "\n"
+    else:
+        for paragraph in Document(io.BytesIO(file_content)).paragraphs:
+            text += paragraph.text + "\n"
+    return text.strip()
+
+def _median_ms(times) -> float:
+    return statistics.median(times) * 1000
+
+async def main_async(repeat: int):
+    # Start the parser processes before timing
+    await file_parser.parse_resume_file_async("resume-2p.pdf", os.path.join(FIXTURES_DIR, "resume-2p.pdf"))
+    print(f"{file_parser.PARSE_WORKERS} parse workers, PDFs of {file_parser.PDF_PARALLEL_MIN_PAGES}+ pages split, "
+          f"median of {repeat}")
+    print(f"{'fixture':20} {'KB':>6} {'original':>10} {'pool':>10} {'cached':>9} {'same text':>10}")
+    for name, (kind, _) in FIXTURES.items():
+        path = os.path.join(FIXTURES_DIR, name)
+        original, cold, cached = [], [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            expected = _original_parse(kind, path)
+            original.append(time.perf_counter() - start)
+
+            file_parser._cache.clear()
+            start = time.perf_counter()
+            text = await file_parser.parse_resume_file_async(name, path)
+            cold.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await file_parser.parse_resume_file_async(name, path)
+            cached.append(time.perf_counter() - start)
+        same = text.split() == expected.split()
+        print(f"{name:20} {os.path.getsize(path) / 1024:6.0f} {_median_ms(original):8.1f}ms "
+              f"{_median_ms(cold):8.1f}ms {_median_ms(cached):7.2f}ms {str(same):>10}")
+    file_parser.shutdown_parse_pool()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--write-fixtures", action="store_true")
+    args = parser.parse_args()
+    if args.write_fixtures:
+        write_fixtures()
+    else:
+        asyncio.run(main_async(args.repeat))
+
+if __name__ == "__main__":
+    main()
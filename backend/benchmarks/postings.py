@@ -0,0 +1,59 @@
+# backend/benchmarks/postings.py
+import os
+import re
+import ast
+import glob
+import random
+import sysconfig
+from functools import lru_cache
+from typing import List
+
+# Synthetic job postings for the benchmarks. Real postings can't be shipped,
+# so paragraphs of English prose are taken from the docstrings of the Python
+# standard library, which is always installed: they compress, shingle and
+# tokenize like hand-written text, unlike random words. Half of the postings
+# share a company boilerplate block, as postings from one employer do.
+
+REPOST_HEADER = "Posted via JobBoard. Apply through the board to be considered."
+
+@lru_cache(maxsize=1)
+def paragraphs() -> List[str]:
+    """Docstring paragraphs of 150-1200 characters, in a stable order"""
+    stdlib = sysconfig.get_paths()["stdlib"]
+    paras = set()
+    for path in sorted(glob.glob(os.path.join(stdlib, "*.py")) + glob.glob(os.path.join(stdlib, "*", "*.py"))):
+        if f"{os.sep}test" in path:
+            continue
+        try:
+            with open(path, encoding="utf-8") as f:
+                tree = ast.parse(f.read())
+        except (SyntaxError, UnicodeDecodeError, ValueError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                doc = ast.get_docstring(node)
+                for para in re.split(r"\n\s*\n", doc or ""):
+                    para = " ".join(para.split())
+                    if 150 < len(para) < 1200 and ">>>" not in para:
+                        paras.add(para)
+    return sorted(paras)
+
+def postings(n: int, seed: int = 1, min_paragraphs: int = 6, max_paragraphs: int = 14) -> List[str]:
+    """n distinct postings of min-max paragraphs each"""
+    rng = random.Random(seed)
+    paras = paragraphs()
+    boilerplate = rng.sample(paras, 4)
+    docs = []
+    for _ in range(n):
+        body = rng.sample(paras, rng.randint(min_paragraphs, max_paragraphs))
+        if rng.random() < 0.5:
+            body += boilerplate
+        docs.append("\n\n".join(body))
+    return docs
+
+def repost(text: str, rng: random.Random, edits: int = 3) -> str:
+    """The same posting on another board: a header added and a few words changed"""
+    words = text.split(" ")
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = rng.choice(("senior", "remote", "hybrid", "lead", "staff"))
+    return REPOST_HEADER + "\n\n" + " ".join(words)
@@ -0,0 +1,94 @@
+# backend/benchmarks/uploads.py
+"""
+Concurrent resume uploads: throughput, per-upload latency and how late the
+event loop runs while they are parsed, for the upload route against the
+old handler that read the whole file and parsed it on the loop.
+
+    cd backend && python -m benchmarks.uploads [--uploads 32] [--concurrency 8] [--pages 20]
+
+Every upload is a distinct PDF, so the parse cache never answers.
+"""
+import time
+import asyncio
+import argparse
+import statistics
+import httpx
+from fastapi import FastAPI, File, UploadFile
+from benchmarks.documents import resume_pdf
+from app.api import files
+from app.core import file_parser
+
+TICK_SECONDS = 0.01
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(files.router, prefix="/api/v1")
+
+    @app.post("/inline/upload-resume")
+    async def upload_inline(file: UploadFile = File(...)):
+        # The handler before the pool: whole file in memory, parsed on the loop
+        text = file_parser.parse_resume_file(file.filename, await file.read())
+        return {"filename": file.filename, "text": text}
+
+    return app
+
+async def _ticker(lags: list, stop: asyncio.Event):
+    """Record how late each TICK_SECONDS sleep wakes up"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(loop.time() - start - TICK_SECONDS)
+
+async def _run(client: httpx.AsyncClient, url: str, docs: list, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def upload(i: int, doc: bytes):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(url, files={"file": (f"resume-{i}.pdf", doc, "application/pdf")})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    lags, stop = [], asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*[upload(i, doc) for i, doc in enumerate(docs)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    lags.sort()
+    return {
+        "uploads_s": len(docs) / elapsed,
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "lag_p50_ms": lags[len(lags) // 2] * 1000,
+        "lag_p99_ms": lags[int(len(lags) * 0.99)] * 1000,
+        "lag_max_ms": lags[-1] * 1000,
+    }
+
+async def main_async(args):
+    transport = httpx.ASGITransport(app=_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Start the parser processes before timing
+        warmup = resume_pdf(1, seed=0)
+        await client.post("/api/v1/upload-resume", files={"file": ("warmup.pdf", warmup, "application/pdf")})
+        print(f"{args.uploads} uploads of {args.pages} pages, {args.concurrency} at a time, "
+              f"{file_parser.PARSE_WORKERS} parse workers")
+        print(f"{'handler':8} {'uploads/s':>10} {'latency p50':>12} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}")
+        for name, url, seed in (("inline", "/inline/upload-resume", 1000), ("pool", "/api/v1/upload-resume", 2000)):
+            docs = [resume_pdf(args.pages, seed=seed + i) for i in range(args.uploads)]
+            r = await _run(client, url, docs, args.concurrency)
+            print(f"{name:8} {r['uploads_s']:10.1f} {r['latency_p50_ms']:10.0f}ms {r['lag_p50_ms']:7.1f}ms "
+                  f"{r['lag_p99_ms']:7.1f}ms {r['lag_max_ms']:7.1f}ms")
+    file_parser.shutdown_parse_pool()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--uploads", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=20)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# backend/tests/test_migrations.py
+import sqlite3
+import pytest
+from app.core.migrations import run_migrations, LATEST_VERSION
+from app.core.database import CONTENT_COLUMNS, _columns_sql, APPLICATION_SUMMARY_FIELDS
+
+# The hot-path queries as database.py issues them, with the index each must use
+LISTING_COLUMNS = _columns_sql(APPLICATION_SUMMARY_FIELDS)
+HOT_QUERIES = [
+    (
+        "status listing",
+        f"SELECT {LISTING_COLUMNS} FROM applications WHERE status = ? ORDER BY applied_date DESC, id DESC LIMIT ?",
+        ("applied", 50),
+        "idx_applications_status_date",
+    ),
+    (
+        "status listing, next page",
+        f"SELECT {LISTING_COLUMNS} FROM applications WHERE status = ? AND (applied_date, id) < (?, ?) "
+        "ORDER BY applied_date DESC, id DESC LIMIT ?",
+        ("applied", "2024-06-01 00:00:00", 500, 50),
+        "idx_applications_status_date",
+    ),
+    (
+        "date listing",
+        f"SELECT {LISTING_COLUMNS} FROM applications ORDER BY applied_date DESC, id DESC LIMIT ?",
+        (50,),
+        "idx_applications_applied_date",
+    ),
+    (
+        "date listing, next page",
+        f"SELECT {LISTING_COLUMNS} FROM applications WHERE (applied_date, id) < (?, ?) "
+        "ORDER BY applied_date DESC, id DESC LIMIT ?",
+        ("2024-06-01 00:00:00", 500, 50),
+        "idx_applications_applied_date",
+    ),
+    (
+        "generated content by application",
+        f"SELECT {CONTENT_COLUMNS} FROM generated_content WHERE application_id = ?",
+        (1,),
+        "idx_generated_content_application",
+    ),
+]
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "plan.db", isolation_level=None)
+    assert run_migrations(conn) == LATEST_VERSION
+    statuses = ['applied', 'reviewing', 'interview', 'rejected']
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO applications (company, position, status, applied_date) VALUES (?, ?, ?, ?)",
+        [(f"Company {i}", "Engineer", statuses[i % 4], f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 12:00:00")
+         for i in range(2000)]
+    )
+    conn.execute("COMMIT")
+    conn.execute("ANALYZE")
+    yield conn
+    conn.close()
+
+def _plan(conn, sql, params):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+@pytest.mark.parametrize("name,sql,params,index", HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_hot_queries_use_their_index(conn, name, sql, params, index):
+    plan = _plan(conn, sql, params)
+    assert any(index in step for step in plan), f"{name} does not use {index}: {plan}"
+    full_scans = [step for step in plan
+                  if step.startswith(("SCAN applications", "SCAN generated_content")) and "USING" not in step]
+    assert not full_scans, f"{name} scans a whole table: {plan}"
+    assert not any("USE TEMP B-TREE" in step for step in plan), f"{name} sorts instead of reading in index order: {plan}"
+
+def test_migrations_are_idempotent(conn):
+    assert run_migrations(conn) == LATEST_VERSION